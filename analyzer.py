@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Консольный анализатор DOCX/PDF без графического интерфейса
+Использование:
+  python -m analyzer batch <файлы/папки/маски> [--workers N] [--output results.jsonl]
+  python -m analyzer chunk <папки результатов> [--max-tokens N] [--overlap N]
+  python -m analyzer watch <папки> --output-dir <папка результатов> [--workers N] [--poll]
+  python -m analyzer serve [--port 8765 | --socket путь] [--root папка] [--workers N] [--queue-depth N]
+  python -m analyzer index <папки результатов> [--prune]
+  python -m analyzer search <запрос> [--limit N] [--prefix] [--json]
+"""
+
+import argparse
+import os
+import sys
+
+# Добавляем папку проекта в путь поиска модулей
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+
+def batch_options(args, file_count):
+    """Настройки анализа из аргументов командной строки"""
+    options = {}
+    if args.docx_engine:
+        options["engine"] = args.docx_engine
+    if args.level != "standard":
+        options["level"] = args.level
+    if args.output_dir:
+        options["output_dir"] = args.output_dir
+        if args.table_format != "csv":
+            options["table_format"] = args.table_format
+        if args.formula_format != "latex":
+            options["formula_format"] = args.formula_format
+        if args.chunk_tokens:
+            options["chunk_tokens"] = args.chunk_tokens
+            options["chunk_overlap"] = args.chunk_overlap
+    if args.memory_limit:
+        options["memory_limit_mb"] = args.memory_limit
+    if args.profile or args.metrics:
+        # Журнал метрик без явного режима - только время фаз (почти без накладных расходов)
+        options["profile"] = args.profile or "time"
+    if args.level == "full" or args.output_dir:
+        # Много файлов - ядра заняты разными файлами; один файл - делим его страницы
+        options["text_workers"] = args.text_workers or (1 if file_count > 1 else None)
+    return options
+
+
+def cmd_batch(args):
+    """Пакетный анализ: все файлы через пул процессов"""
+    # Неверное сочетание ключей - до поиска файлов и любого вывода о них
+    if args.index and not args.output_dir:
+        print("❌ Для --index нужен --output-dir: индексируется выгруженный текст", file=sys.stderr)
+        return 1
+
+    from core.batch import expand_paths, run_batch
+
+    files = expand_paths(args.paths)
+    if not files:
+        print("❌ Не найдено ни одного DOCX/PDF файла", file=sys.stderr)
+        return 1
+
+    print(f"🔍 Файлов к анализу: {len(files)}, процессов: {args.workers or os.cpu_count()}",
+          file=sys.stderr)
+
+    cache = None
+    if not args.no_cache:
+        from core.result_cache import ResultCache
+        cache = ResultCache(args.cache_path) if args.cache_path else ResultCache()
+
+    metrics = None
+    if args.metrics:
+        from core.instrument import open_metrics_sink
+        metrics = open_metrics_sink(args.metrics)
+
+    index = open_index(args) if args.index else None
+
+    try:
+        summary = run_batch(files, args.output, workers=args.workers,
+                            progress=not args.quiet, cache=cache,
+                            options=batch_options(args, len(files)), metrics=metrics,
+                            index=index)
+    finally:
+        if cache is not None:
+            cache.close()
+        if metrics is not None:
+            metrics.close()
+        if index is not None:
+            index.close()
+
+    print(f"✅ Готово: {summary['success']} успешно, {summary['errors']} с ошибками "
+          f"за {summary['seconds']} с ({summary['files_per_sec']} файлов/с)",
+          file=sys.stderr)
+    return 0 if summary["errors"] == 0 else 2
+
+
+def cmd_watch(args):
+    """Наблюдать за папками и анализировать новые файлы по мере появления"""
+    import json
+    import signal
+    import threading
+    from core.watcher import InotifySource, Watcher
+
+    for folder in args.folders:
+        if not os.path.isdir(folder):
+            print(f"❌ Нет такой папки: {folder}", file=sys.stderr)
+            return 1
+
+    metrics = None
+    if args.metrics:
+        from core.instrument import open_metrics_sink
+        # Файлы приходят сериями - метрики записываются раз в несколько секунд
+        # (и после последнего файла серии - через on_tick наблюдателя)
+        metrics = open_metrics_sink(args.metrics)
+
+    index = None
+    if args.index:
+        index = open_index(args, commit_every=1)
+        # Пока наблюдатель не работал, файлы могли удалить
+        index.prune()
+
+    output_path = args.output or os.path.join(args.output_dir, "watch_results.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    out = open(output_path, "a", encoding="utf-8")
+
+    def on_result(result):
+        out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+        if metrics is not None:
+            metrics.record(result)
+        if index is not None:
+            try:
+                index.add_result(result)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ {result['file']}: не добавлен в индекс - {e}", file=sys.stderr)
+        if not args.quiet:
+            mark = "✅" if result.get("status") == "success" else "❌"
+            print(f"{mark} {result['file']} ({result.get('seconds', 0)} с)", file=sys.stderr)
+
+    stop = threading.Event()
+    for name in ("SIGINT", "SIGTERM"):
+        signal.signal(getattr(signal, name), lambda signum, frame: stop.set())
+
+    try:
+        watcher = Watcher(args.folders, args.output_dir, options=batch_options(args, 2),
+                          workers=args.workers, settle=args.settle, poll=args.poll,
+                          interval=args.interval, state_path=args.state, on_result=on_result,
+                          on_tick=metrics.maybe_flush if metrics is not None else None)
+        source = "inotify" if isinstance(watcher.source, InotifySource) else "опрос папок"
+        print(f"👀 Наблюдение за {', '.join(watcher.folders)} ({source}), "
+              f"результаты - в {watcher.output_dir}. Остановка - Ctrl+C", file=sys.stderr)
+        watcher.run(stop)
+    finally:
+        out.close()
+        if metrics is not None:
+            metrics.close()
+        if index is not None:
+            index.close()
+
+    print(f"✅ Остановлено: обработано файлов - {watcher.processed}", file=sys.stderr)
+    return 0
+
+
+def cmd_serve(args):
+    """Постоянно работающий сервис анализа с теплыми воркерами"""
+    from core.service import run_service
+
+    def ready(address):
+        print(f"🟢 Сервис анализа: {address}, воркеров: {args.workers or os.cpu_count()}. "
+              f"Остановка - Ctrl+C", file=sys.stderr)
+
+    for root in args.root or []:
+        if not os.path.isdir(root):
+            print(f"❌ Нет такой папки: {root}", file=sys.stderr)
+            return 1
+
+    try:
+        service = run_service(host=args.host, port=args.port, socket_path=args.socket,
+                              workers=args.workers, max_concurrency=args.max_concurrency,
+                              queue_depth=args.queue_depth, ready=ready,
+                              allow_remote=args.allow_remote, roots=args.root)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ Остановлено: обработано файлов - {service.served}", file=sys.stderr)
+    return 0
+
+
+def document_folders(paths):
+    """Папки результатов документов (с manifest.json): сами папки или их подпапки"""
+    from core.export import MANIFEST_NAME
+
+    folders = []
+    for path in paths:
+        if os.path.isfile(os.path.join(path, MANIFEST_NAME)):
+            folders.append(path)
+        elif os.path.isdir(path):
+            for entry in sorted(os.scandir(path), key=lambda e: e.name):
+                if entry.is_dir() and os.path.isfile(os.path.join(entry.path, MANIFEST_NAME)):
+                    folders.append(entry.path)
+    return folders
+
+
+def cmd_chunk(args):
+    """Нарезать уже выгруженный текст документов на куски под окно контекста"""
+    from core.chunker import chunk_document_folder
+
+    folders = document_folders(args.paths)
+    if not folders:
+        print("❌ Не найдено ни одной папки результатов с manifest.json", file=sys.stderr)
+        return 1
+
+    errors = 0
+    for folder in folders:
+        try:
+            chunks = chunk_document_folder(folder, args.max_tokens, args.overlap)
+        except (OSError, ValueError) as e:
+            errors += 1
+            print(f"❌ {folder}: {str(e)}", file=sys.stderr)
+            continue
+        tokens = sum(chunk["tokens"] for chunk in chunks)
+        print(f"✂️ {folder}: {len(chunks)} кусков, ~{tokens} токенов", file=sys.stderr)
+    return 0 if errors == 0 else 2
+
+
+def open_index(args, **kwargs):
+    """Полнотекстовый индекс по --index-path (или по умолчанию)"""
+    from core.search_index import SearchIndex
+
+    return SearchIndex(args.index_path, **kwargs) if args.index_path else SearchIndex(**kwargs)
+
+
+def cmd_index(args):
+    """Проиндексировать уже выгруженные папки результатов"""
+    import time
+
+    folders = document_folders(args.paths)
+    if not folders and not args.prune:
+        print("❌ Не найдено ни одной папки результатов с manifest.json", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    index = open_index(args)
+    added = errors = 0
+    try:
+        if args.prune:
+            removed = index.prune()
+            if removed:
+                print(f"🗑️ Удалено из индекса: {removed}", file=sys.stderr)
+        for folder in folders:
+            try:
+                added += index.add_folder(folder)
+            except (OSError, ValueError) as e:
+                errors += 1
+                print(f"❌ {folder}: {str(e)}", file=sys.stderr)
+        if added:
+            index.optimize()
+        total = index.count()
+    finally:
+        index.close()
+
+    print(f"✅ Добавлено или обновлено: {added}, без изменений: {len(folders) - added - errors}, "
+          f"всего в индексе: {total} ({time.perf_counter() - started:.2f} с)", file=sys.stderr)
+    return 0 if errors == 0 else 2
+
+
+def cmd_search(args):
+    """Поиск по индексу: документы по релевантности с фрагментами текста"""
+    import json
+    import time
+
+    index = open_index(args)
+    try:
+        started = time.perf_counter()
+        found = index.search(" ".join(args.query), limit=args.limit, prefix=args.prefix,
+                             max_ranked=args.max_ranked)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        index.close()
+
+    hits = found["hits"]
+    if args.json:
+        print(json.dumps(found, ensure_ascii=False, indent=2))
+    else:
+        for number, hit in enumerate(hits, 1):
+            print(f"{number}. {hit['name']} ({hit['score']})")
+            print(f"   {hit['source']}")
+            print(f"   {hit['snippet']}")
+    print(f"🔍 Найдено: {found['matches']}, показано {len(hits)} за {elapsed_ms:.1f} мс", file=sys.stderr)
+    if found["truncated"]:
+        print(f"⚠️ По релевантности упорядочены только {found['ranked']} последних проиндексированных "
+              f"совпадений из {found['matches']} (--max-ranked)", file=sys.stderr)
+    return 0 if hits else 1
+
+
+def add_analysis_arguments(command, output_dir_required=False):
+    """Настройки анализа, общие для batch и watch (читает batch_options)"""
+    from core.defaults import DEFAULT_OVERLAP_TOKENS
+
+    command.add_argument("--level", choices=["metadata", "standard", "full"], default="standard",
+                         help="уровень анализа: metadata - только свойства документа, "
+                              "full - извлечь весь текст")
+    command.add_argument("--output-dir", default=None, required=output_dir_required,
+                         help="папка для результатов: текст, картинки, таблицы, формулы, manifest.json")
+    command.add_argument("--table-format", choices=["csv", "tsv"], default="csv",
+                         help="формат выгрузки таблиц DOCX")
+    command.add_argument("--formula-format", choices=["latex", "linear"], default="latex",
+                         help="формат выгрузки формул DOCX")
+    command.add_argument("--text-workers", type=int, default=None,
+                         help="процессов на извлечение текста одного PDF")
+    command.add_argument("--docx-engine", choices=["stream", "python-docx"], default=None,
+                         help="движок разбора DOCX (по умолчанию - потоковый)")
+    command.add_argument("--chunk-tokens", type=int, default=None,
+                         help="нарезать выгруженный текст на куски не больше N токенов (нужен --output-dir)")
+    command.add_argument("--chunk-overlap", type=int, default=DEFAULT_OVERLAP_TOKENS,
+                         help="перекрытие соседних кусков в токенах")
+    command.add_argument("--memory-limit", type=int, default=None, metavar="MB",
+                         help="потолок памяти на анализ одного файла в воркере: большие файлы разбираются потоково, "
+                              "не поместившиеся завершаются ошибкой")
+    command.add_argument("--profile", choices=["time", "memory"], default=None,
+                         help="замер фаз анализа (open, parse, text, metadata, export); "
+                              "memory - еще и выделения памяти (медленнее)")
+    command.add_argument("--metrics", default=None,
+                         help="журнал метрик: *.prom - файл Prometheus (textfile), иначе JSONL")
+    command.add_argument("--index", action="store_true",
+                         help="добавлять выгруженный текст в полнотекстовый индекс (нужен --output-dir)")
+    add_index_argument(command)
+
+
+def add_index_argument(command):
+    """Путь к базе полнотекстового индекса"""
+    command.add_argument("--index-path", default=None,
+                         help="база полнотекстового индекса (по умолчанию .cache/search.sqlite)")
+
+
+def build_parser():
+    """Описание команд и аргументов"""
+    from core.defaults import (DEFAULT_HOST, DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS,
+                               DEFAULT_POLL_INTERVAL, DEFAULT_PORT, DEFAULT_QUEUE_DEPTH,
+                               DEFAULT_SEARCH_LIMIT, DEFAULT_SETTLE)
+
+    parser = argparse.ArgumentParser(
+        prog="analyzer",
+        description="DOCX/PDF Analyzer for DeepSeek - консольный режим"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="проанализировать много файлов параллельно")
+    batch.add_argument("paths", nargs="+", help="файлы, папки или маски (*.docx, **/*.pdf)")
+    batch.add_argument("-w", "--workers", type=int, default=None,
+                       help="количество процессов (по умолчанию - по числу ядер)")
+    batch.add_argument("-o", "--output", default="analysis_results.jsonl",
+                       help="файл результатов JSONL ('-' - вывод в консоль)")
+    batch.add_argument("-q", "--quiet", action="store_true", help="не печатать прогресс по файлам")
+    add_analysis_arguments(batch)
+    batch.add_argument("--no-cache", action="store_true", help="не использовать кэш результатов")
+    batch.add_argument("--cache-path", default=None, help="путь к базе кэша (SQLite)")
+    batch.set_defaults(func=cmd_batch)
+
+    watch = commands.add_parser("watch", help="наблюдать за папками и анализировать новые файлы")
+    watch.add_argument("folders", nargs="+", help="папки, куда попадают документы")
+    watch.add_argument("-w", "--workers", type=int, default=None,
+                       help="количество процессов (по умолчанию - по числу ядер)")
+    watch.add_argument("-o", "--output", default=None,
+                       help="журнал результатов JSONL (по умолчанию - watch_results.jsonl в --output-dir)")
+    watch.add_argument("-q", "--quiet", action="store_true", help="не печатать файлы по мере обработки")
+    watch.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                       help="секунд без изменений, после которых файл считается дописанным")
+    watch.add_argument("--poll", action="store_true",
+                       help="опрашивать папки вместо inotify (нужно для сетевых папок)")
+    watch.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                       help="период опроса папок в секундах")
+    watch.add_argument("--state", default=None,
+                       help="база обработанных файлов (по умолчанию - в --output-dir)")
+    add_analysis_arguments(watch, output_dir_required=True)
+    watch.set_defaults(func=cmd_watch)
+
+    serve = commands.add_parser("serve", help="сервис анализа для других программ (HTTP)")
+    serve.add_argument("--host", default=DEFAULT_HOST, help="адрес (по умолчанию только localhost)")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="порт")
+    serve.add_argument("--socket", default=None, help="Unix-сокет вместо порта")
+    serve.add_argument("--allow-remote", action="store_true",
+                       help="разрешить адрес, доступный из сети (в --host)")
+    serve.add_argument("--root", action="append", default=None, metavar="ПАПКА",
+                       help="папка, внутри которой разрешены файлы и output_dir запросов "
+                            "(можно несколько раз; по умолчанию - текущая папка)")
+    serve.add_argument("-w", "--workers", type=int, default=None,
+                       help="количество процессов (по умолчанию - по числу ядер)")
+    serve.add_argument("--max-concurrency", type=int, default=None,
+                       help="сколько файлов анализируется одновременно (по умолчанию - по числу воркеров)")
+    serve.add_argument("--queue-depth", type=int, default=DEFAULT_QUEUE_DEPTH,
+                       help="сколько файлов может ждать очереди; сверх этого - ответ 503")
+    serve.set_defaults(func=cmd_serve)
+
+    chunk = commands.add_parser("chunk", help="нарезать выгруженный текст на куски по токенам")
+    chunk.add_argument("paths", nargs="+",
+                       help="папки результатов документов (или папка --output-dir целиком)")
+    chunk.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS,
+                       help="максимум токенов в куске (оценка)")
+    chunk.add_argument("--overlap", type=int, default=DEFAULT_OVERLAP_TOKENS,
+                       help="перекрытие соседних кусков в токенах")
+    chunk.set_defaults(func=cmd_chunk)
+
+    index = commands.add_parser("index", help="добавить выгруженные документы в полнотекстовый индекс")
+    index.add_argument("paths", nargs="*",
+                       help="папки результатов документов (или папка --output-dir целиком)")
+    index.add_argument("--prune", action="store_true",
+                       help="удалить из индекса документы, которых больше нет")
+    add_index_argument(index)
+    index.set_defaults(func=cmd_index)
+
+    search = commands.add_parser("search", help="найти документы по словам или номеру")
+    search.add_argument("query", nargs="+", help="слова запроса (должны встретиться все)")
+    search.add_argument("-n", "--limit", type=int, default=DEFAULT_SEARCH_LIMIT,
+                        help="сколько документов показать")
+    search.add_argument("--prefix", action="store_true",
+                        help="искать слова по началу (спектро -> спектрометр); "
+                             "по умолчанию - любая форма слова (поверка, поверки, поверками)")
+    search.add_argument("--json", action="store_true", help="результаты в JSON")
+    search.add_argument("--max-ranked", type=int, default=None, metavar="N",
+                        help="ранжировать только N последних проиндексированных совпадений "
+                             "(быстрее на очень частых словах; по умолчанию - все)")
+    add_index_argument(search)
+    search.set_defaults(func=cmd_search)
+
+    return parser
+
+
+def main(argv=None):
+    """Точка входа консольного режима"""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
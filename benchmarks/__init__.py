@@ -0,0 +1,10 @@
+"""Замеры скорости анализа на синтетических DOCX/PDF
+
+    python -m benchmarks corpus                       - сгенерировать корпус
+    python -m benchmarks run -o bench.json            - замерить плагины
+    python -m benchmarks run --baseline base.json     - замерить и сравнить с базой
+    python -m benchmarks compare bench.json base.json - сравнить два отчета
+    python -m benchmarks load -n 500 -c 16            - нагрузочный тест сервиса
+    python -m benchmarks startup                      - бюджет холодного старта
+    python -m benchmarks search                       - поиск по индексу из 100 000 документов
+"""
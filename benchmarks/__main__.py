@@ -0,0 +1,210 @@
+# benchmarks/__main__.py
+"""Командная строка замеров: python -m benchmarks <corpus|run|compare|load|startup|search>"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench import (
+    DEFAULT_REPEAT, DEFAULT_THRESHOLD, compare_reports, ensure_corpus,
+    print_comparison, run_benchmarks
+)
+from benchmarks.corpus import generate_corpus
+from benchmarks.search import (
+    DEFAULT_SEARCH_BUDGET_MS, DEFAULT_SEARCH_DOCUMENTS, DEFAULT_SEARCH_REPEAT
+)
+from benchmarks.startup import DEFAULT_BUDGET_MS, DEFAULT_RUNS
+
+# Корпус по умолчанию лежит в кэше проекта (в git не попадает)
+DEFAULT_CORPUS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "bench_corpus"
+)
+DEFAULT_SEARCH_INDEX = os.path.join(os.path.dirname(DEFAULT_CORPUS_DIR), "bench_search.sqlite")
+
+
+def load_report(path):
+    """Отчет замеров из JSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cmd_corpus(args):
+    """Сгенерировать корпус документов"""
+    manifest = generate_corpus(args.corpus, scale=args.scale, seed=args.seed)
+    for doc in manifest["documents"]:
+        print(f"📄 {doc['file']}: {doc['size'] / (1024 * 1024):.2f} МБ, {doc['pages']} стр.")
+    print(f"✅ Корпус готов: {args.corpus}")
+    return 0
+
+
+def cmd_run(args):
+    """Замерить плагины на корпусе и записать отчет"""
+    ensure_corpus(args.corpus, scale=args.scale, seed=args.seed)
+
+    options = {}
+    if args.level != "standard":
+        options["level"] = args.level
+        # Один процесс на документ - иначе замер зависит от числа ядер
+        options["text_workers"] = args.text_workers or 1
+    if args.docx_engine:
+        options["engine"] = args.docx_engine
+
+    report = run_benchmarks(args.corpus, repeat=args.repeat, options=options, export=args.export)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 Отчет: {args.output}")
+
+    if args.baseline:
+        rows = compare_reports(report, load_report(args.baseline), args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+    return 0
+
+
+def cmd_compare(args):
+    """Сравнить отчет с базовым"""
+    rows = compare_reports(load_report(args.current), load_report(args.baseline), args.threshold)
+    return 1 if print_comparison(rows, args.threshold) else 0
+
+
+def cmd_load(args):
+    """Нагрузочный тест сервиса анализа"""
+    from benchmarks.load import corpus_files, run_load, start_service
+
+    ensure_corpus(args.corpus, scale=args.scale, seed=args.seed)
+    files = corpus_files(args.corpus)
+    options = {"level": args.level} if args.level != "standard" else {}
+
+    process = None
+    url = args.url
+    if not url and not args.socket:
+        print("⏳ Запуск сервиса...", file=sys.stderr)
+        process, url = start_service(args.workers, args.max_concurrency, args.queue_depth,
+                                     root=args.corpus)
+    try:
+        report = run_load(files, requests=args.requests, concurrency=args.concurrency,
+                          url=url, socket_path=args.socket, options=options)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Отчет: {args.output}")
+    return 0 if report["errors"] == 0 else 1
+
+
+def cmd_startup(args):
+    """Проверка бюджета холодного старта"""
+    from benchmarks.startup import check_startup
+
+    report, failed = check_startup(args.budget_ms, args.runs)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Отчет: {args.output}")
+    return 1 if failed else 0
+
+
+def cmd_search(args):
+    """Скорость полнотекстового поиска на большом индексе"""
+    from benchmarks.search import build_index, run_queries
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.index)), exist_ok=True)
+    sample = build_index(args.index, args.documents, args.seed)
+    report, failed = run_queries(args.index, sample, args.repeat, args.budget_ms)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Отчет: {args.output}")
+    return 1 if failed else 0
+
+
+def build_parser():
+    """Описание команд и аргументов"""
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Замеры скорости анализа DOCX/PDF")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def corpus_args(command):
+        command.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="папка корпуса")
+        command.add_argument("--scale", type=float, default=1.0, help="множитель объема документов")
+        command.add_argument("--seed", type=int, default=1, help="seed генератора")
+
+    corpus = commands.add_parser("corpus", help="сгенерировать синтетические документы")
+    corpus_args(corpus)
+    corpus.set_defaults(func=cmd_corpus)
+
+    run = commands.add_parser("run", help="замерить плагины на корпусе")
+    corpus_args(run)
+    run.add_argument("-o", "--output", default="bench_results.json", help="файл отчета JSON")
+    run.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT, help="повторов на документ")
+    run.add_argument("--level", choices=["standard", "full"], default="standard", help="уровень анализа")
+    run.add_argument("--text-workers", type=int, default=None,
+                     help="процессов на текст PDF при --level full (по умолчанию 1)")
+    run.add_argument("--docx-engine", choices=["stream", "python-docx"], default=None,
+                     help="движок разбора DOCX")
+    run.add_argument("--export", action="store_true", help="замерять с выгрузкой во временную папку")
+    run.add_argument("--baseline", default=None, help="базовый отчет для сравнения")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help="допустимое ухудшение (доля, 0.1 = 10%%)")
+    run.set_defaults(func=cmd_run)
+
+    compare = commands.add_parser("compare", help="сравнить отчет с базовым")
+    compare.add_argument("current", help="новый отчет")
+    compare.add_argument("baseline", help="базовый отчет")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="допустимое ухудшение (доля, 0.1 = 10%%)")
+    compare.set_defaults(func=cmd_compare)
+
+    load = commands.add_parser("load", help="нагрузочный тест сервиса анализа (analyzer serve)")
+    corpus_args(load)
+    load.add_argument("--url", default=None,
+                      help="адрес запущенного сервиса (по умолчанию сервис запускается сам)")
+    load.add_argument("--socket", default=None, help="Unix-сокет запущенного сервиса")
+    load.add_argument("-n", "--requests", type=int, default=200, help="всего запросов")
+    load.add_argument("-c", "--concurrency", type=int, default=8, help="параллельных клиентов")
+    load.add_argument("--level", choices=["metadata", "standard", "full"], default="standard",
+                      help="уровень анализа в запросах")
+    load.add_argument("--workers", type=int, default=None, help="воркеров запускаемого сервиса")
+    load.add_argument("--max-concurrency", type=int, default=None,
+                      help="одновременных файлов у запускаемого сервиса")
+    load.add_argument("--queue-depth", type=int, default=None,
+                      help="длина очереди запускаемого сервиса")
+    load.add_argument("-o", "--output", default=None, help="файл отчета JSON")
+    load.set_defaults(func=cmd_load)
+
+    startup = commands.add_parser("startup", help="бюджет холодного старта (-X importtime)")
+    startup.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                         help="допустимое время запуска сценария, мс")
+    startup.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                         help="запусков на сценарий (в зачет - лучший)")
+    startup.add_argument("-o", "--output", default=None, help="файл отчета JSON")
+    startup.set_defaults(func=cmd_startup)
+
+    search = commands.add_parser("search", help="скорость полнотекстового поиска на большом индексе")
+    search.add_argument("--index", default=DEFAULT_SEARCH_INDEX,
+                        help="база индекса (готовая с тем же числом документов используется повторно)")
+    search.add_argument("--documents", type=int, default=DEFAULT_SEARCH_DOCUMENTS,
+                        help="документов в индексе")
+    search.add_argument("--seed", type=int, default=1, help="seed генератора")
+    search.add_argument("-r", "--repeat", type=int, default=DEFAULT_SEARCH_REPEAT, help="повторов на запрос")
+    search.add_argument("--budget-ms", type=float, default=DEFAULT_SEARCH_BUDGET_MS,
+                        help="допустимая медиана запроса, мс")
+    search.add_argument("-o", "--output", default=None, help="файл отчета JSON")
+    search.set_defaults(func=cmd_search)
+
+    return parser
+
+
+def main(argv=None):
+    """Точка входа"""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# benchmarks/bench.py
+"""Замеры скорости плагинов на синтетическом корпусе и сравнение с базой
+
+Каждый документ замеряется в отдельном свежем процессе: так пиковая
+память (peak RSS) относится именно к этому документу, а не ко всему
+прогону. Первый вызов analyze (импорт PyPDF2/lxml, прогрев) считается
+отдельно как first_seconds, в медиану не входит.
+"""
+
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import CORPUS_MANIFEST, generate_corpus
+
+try:
+    import resource
+except ImportError:
+    # Windows: пиковую память умеет отдавать только psutil (если установлен)
+    resource = None
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10
+# Разница меньше этой считается шумом таймера, а не регрессией
+MIN_SECONDS_DELTA = 0.005
+
+# Метрики, рост которых считается регрессией
+COMPARED_METRICS = ("seconds_median", "peak_rss_mb")
+
+
+def peak_rss_mb():
+    """Пиковая память текущего процесса в МБ или None, если ее не узнать"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдает КБ, macOS - байты
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+
+
+def measure(file_path, options, repeat, export=False):
+    """Замер одного документа (выполняется в отдельном процессе)"""
+    from core.registry import get_registry
+
+    plugin = get_registry().find(file_path)
+    if plugin is None:
+        return {"status": "unsupported"}
+
+    def run_once():
+        run_options = dict(options)
+        temp_dir = tempfile.mkdtemp(prefix="bench-") if export else None
+        if temp_dir:
+            # Каждый прогон - в чистую папку, иначе DOCX возьмет прошлый manifest.json
+            run_options["output_dir"] = temp_dir
+        try:
+            started = time.perf_counter()
+            result = plugin.analyze(file_path, **run_options)
+            return time.perf_counter() - started, result
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+    first, result = run_once()
+    if result.get("status") != "success":
+        return {"status": "error", "message": result.get("message", "")}
+
+    seconds = [run_once()[0] for _ in range(repeat)]
+    return {
+        "status": "success",
+        "plugin": plugin.name,
+        "plugin_version": plugin.version,
+        "first_seconds": round(first, 4),
+        "runs": [round(s, 4) for s in seconds],
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def environment():
+    """Где делались замеры - чтобы не сравнивать ноутбук с сервером вслепую"""
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+    for module in ("lxml", "PyPDF2", "docx"):
+        try:
+            info[module] = getattr(__import__(module), "__version__", "есть")
+        except ImportError:
+            info[module] = None
+    return info
+
+
+def run_benchmarks(corpus_dir, repeat=DEFAULT_REPEAT, options=None, export=False, progress=True):
+    """Прогнать плагины по всем документам корпуса; возвращает отчет (dict)"""
+    with open(os.path.join(corpus_dir, CORPUS_MANIFEST), 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    options = options or {}
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "corpus": {"seed": corpus["seed"], "scale": corpus["scale"]},
+        "options": dict(options, export=export),
+        "repeat": repeat,
+        "results": {}
+    }
+
+    # spawn - чистый процесс без унаследованной памяти родителя (и как в Windows)
+    context = multiprocessing.get_context("spawn")
+    for doc in corpus["documents"]:
+        path = os.path.join(corpus_dir, doc["file"])
+        with context.Pool(1) as pool:
+            measured = pool.apply(measure, (path, options, repeat, export))
+
+        entry = {"kind": doc["kind"], "size_mb": round(doc["size"] / (1024 * 1024), 3),
+                 "pages": doc["pages"]}
+        entry.update(measured)
+        if measured["status"] == "success":
+            median = statistics.median(measured["runs"])
+            entry["seconds_median"] = round(median, 4)
+            entry["seconds_min"] = min(measured["runs"])
+            entry["mb_per_s"] = round(doc["size"] / (1024 * 1024) / median, 2) if median else None
+            entry["pages_per_s"] = round(doc["pages"] / median, 1) if median else None
+
+        report["results"][doc["name"]] = entry
+        if progress:
+            if measured["status"] == "success":
+                print(f"⏱️ {doc['name']}: {entry['seconds_median']} с, {entry['mb_per_s']} МБ/с, "
+                      f"{entry['pages_per_s']} стр/с, пик памяти {entry['peak_rss_mb']} МБ",
+                      file=sys.stderr)
+            else:
+                print(f"❌ {doc['name']}: {measured.get('message', measured['status'])}", file=sys.stderr)
+
+    return report
+
+
+def ensure_corpus(corpus_dir, scale=1.0, seed=1):
+    """Сгенерировать корпус, если его еще нет (или он с другими параметрами)"""
+    manifest_path = os.path.join(corpus_dir, CORPUS_MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            corpus = json.load(f)
+        if corpus.get("scale") == scale and corpus.get("seed") == seed:
+            return corpus
+    return generate_corpus(corpus_dir, scale=scale, seed=seed)
+
+
+def compare_reports(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Сравнить отчет с базовым: список строк сравнения по документам и метрикам
+
+    Регрессия - рост времени или памяти больше чем на threshold (доля).
+    """
+    rows = []
+    for name, entry in sorted(current["results"].items()):
+        base = baseline.get("results", {}).get(name)
+        if not base or entry.get("status") != "success" or base.get("status") != "success":
+            continue
+        for metric in COMPARED_METRICS:
+            new, old = entry.get(metric), base.get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            regression = change > threshold
+            if metric.startswith("seconds") and new - old < MIN_SECONDS_DELTA:
+                regression = False
+            rows.append({
+                "document": name,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 4),
+                "regression": regression
+            })
+    return rows
+
+
+def print_comparison(rows, threshold=DEFAULT_THRESHOLD):
+    """Таблица сравнения в консоль; возвращает количество регрессий"""
+    regressions = 0
+    for row in rows:
+        mark = "⚠️" if row["regression"] else "✅"
+        regressions += row["regression"]
+        print(f"{mark} {row['document']:<14} {row['metric']:<15} "
+              f"{row['baseline']:>10} -> {row['current']:<10} ({row['change']:+.1%})")
+    if regressions:
+        print(f"⚠️ Регрессий (хуже базы больше чем на {threshold:.0%}): {regressions}")
+    else:
+        print("✅ Регрессий нет")
+    return regressions
@@ -0,0 +1,315 @@
+# benchmarks/corpus.py
+"""Генератор синтетических DOCX/PDF для замеров скорости
+
+Документы собираются вручную (zip-части DOCX, объекты PDF), без сети
+и без сторонних библиотек. Случайность задается seed, а время в архивах
+фиксировано, поэтому при тех же параметрах получаются байт-в-байт те же
+файлы - замеры на разных машинах и в разные дни сравнимы.
+
+Текст - русские слова из предметной области (средства измерений),
+чтобы размер и разбор XML были похожи на наши настоящие документы.
+"""
+
+import json
+import os
+import random
+import struct
+import zipfile
+import zlib
+
+CORPUS_MANIFEST = "corpus.json"
+ZIP_DATE = (2024, 1, 1, 0, 0, 0)
+
+WORDS = (
+    "средство измерений поверка калибровка погрешность диапазон эталон методика "
+    "давление температура расход напряжение сопротивление частота манометр "
+    "термометр счетчик преобразователь датчик регистрация испытания протокол "
+    "свидетельство утверждение типа метрологические характеристики интервал "
+    "между поверками предел допускаемой основной относительной абсолютной "
+    "приведенной класс точности измерительный канал модификация заводской номер "
+    "результат соответствует требованиям государственный реестр изготовитель "
+    "заявитель описание программное обеспечение идентификационные данные"
+).split()
+
+# Наборы документов: имя -> параметры; scale умножает объемы
+PROFILES = {
+    "docx_small": {"kind": "docx", "paragraphs": 300, "tables": 2, "rows": 10, "images": 2},
+    "docx_medium": {"kind": "docx", "paragraphs": 5000, "tables": 20, "rows": 40, "images": 20},
+    "docx_large": {"kind": "docx", "paragraphs": 40000, "tables": 80, "rows": 200, "images": 60},
+    "pdf_small": {"kind": "pdf", "pages": 20},
+    "pdf_large": {"kind": "pdf", "pages": 400},
+}
+
+PARAGRAPHS_PER_PAGE = 25
+LINES_PER_PAGE = 55
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+IMAGE_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+
+
+def sentence(rng, words=12):
+    """Случайное предложение из русских слов"""
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def paragraph(rng):
+    """Абзац из нескольких предложений"""
+    return " ".join(sentence(rng, rng.randint(6, 16)) for _ in range(rng.randint(1, 4)))
+
+
+def png_image(rng, width, height):
+    """Простая картинка PNG (шум в оттенках серого, плохо сжимается - как фото)"""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xffffffff)
+
+    rows = b"".join(b"\x00" + bytes(rng.getrandbits(8) for _ in range(width)) for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b""))
+
+
+def _escape_xml(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _zip_info(name):
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def _docx_paragraph(text):
+    return (f'<w:p><w:r><w:t xml:space="preserve">{_escape_xml(text)}</w:t></w:r></w:p>')
+
+
+def _docx_table(rng, rows, columns):
+    grid = "".join('<w:gridCol w:w="2000"/>' for _ in range(columns))
+    body = []
+    for _ in range(rows):
+        cells = "".join(
+            f'<w:tc><w:tcPr><w:tcW w:w="2000" w:type="dxa"/></w:tcPr>'
+            f'{_docx_paragraph(sentence(rng, rng.randint(1, 4)))}</w:tc>'
+            for _ in range(columns)
+        )
+        body.append(f"<w:tr>{cells}</w:tr>")
+    return f'<w:tbl><w:tblPr/><w:tblGrid>{grid}</w:tblGrid>{"".join(body)}</w:tbl>'
+
+
+def _docx_image(number):
+    emu = 952500
+    return (
+        '<w:p><w:r><w:drawing><wp:inline>'
+        f'<wp:extent cx="{emu}" cy="{emu}"/><wp:docPr id="{number}" name="Рисунок {number}"/>'
+        '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        f'<pic:pic><pic:nvPicPr><pic:cNvPr id="{number}" name="image{number}.png"/><pic:cNvPicPr/></pic:nvPicPr>'
+        f'<pic:blipFill><a:blip r:embed="rIdImg{number}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+        f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{emu}" cy="{emu}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"/></pic:spPr></pic:pic>'
+        '</a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>'
+    )
+
+
+def write_docx(path, paragraphs, tables=0, rows=10, images=0, columns=4, seed=1):
+    """Синтетический DOCX; возвращает количество страниц (по разрывам страниц)"""
+    rng = random.Random(seed)
+    pages = 1
+    # Таблицы и картинки равномерно распределены по тексту
+    table_at = {paragraphs * (i + 1) // (tables + 1) for i in range(tables)}
+    image_at = {paragraphs * (i + 1) // (images + 1) + 1 for i in range(images)}
+
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Default Extension="png" ContentType="image/png"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '<Override PartName="/docProps/core.xml" '
+        'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+        '<Override PartName="/docProps/app.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>'
+        '</Types>'
+    )
+    root_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>'
+        '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/extended-properties" Target="docProps/app.xml"/>'
+        '</Relationships>'
+    )
+    core = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+        '<dc:title>Синтетический документ</dc:title><dc:creator>Бенчмарк</dc:creator>'
+        '<dcterms:created xsi:type="dcterms:W3CDTF">2024-01-01T00:00:00Z</dcterms:created>'
+        '</cp:coreProperties>'
+    )
+    document_rels = [
+        f'<Relationship Id="rIdImg{i}" Type="{IMAGE_REL}" Target="media/image{i}.png"/>'
+        for i in range(1, images + 1)
+    ]
+
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr(_zip_info('[Content_Types].xml'), content_types)
+        zf.writestr(_zip_info('_rels/.rels'), root_rels)
+        zf.writestr(_zip_info('docProps/core.xml'), core)
+
+        # document.xml пишем потоком - большой документ не собирается в памяти
+        with zf.open(_zip_info('word/document.xml'), 'w') as raw:
+            def out(text):
+                raw.write(text.encode('utf-8'))
+
+            out('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}" '
+                'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+                'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+                'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"><w:body>')
+            image_number = 0
+            for i in range(1, paragraphs + 1):
+                out(_docx_paragraph(paragraph(rng)))
+                if i in image_at:
+                    image_number += 1
+                    out(_docx_image(image_number))
+                if i in table_at:
+                    out(_docx_table(rng, rows, columns))
+                if i % PARAGRAPHS_PER_PAGE == 0 and i < paragraphs:
+                    out('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+                    pages += 1
+            out('<w:sectPr/></w:body></w:document>')
+
+        zf.writestr(_zip_info('word/_rels/document.xml.rels'),
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    + "".join(document_rels) + '</Relationships>')
+        zf.writestr(_zip_info('docProps/app.xml'),
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+                    f'<Pages>{pages}</Pages><Paragraphs>{paragraphs}</Paragraphs></Properties>')
+
+        for i in range(1, images + 1):
+            # Картинки хранятся без повторного сжатия, как в Word
+            info = _zip_info(f'word/media/image{i}.png')
+            info.compress_type = zipfile.ZIP_STORED
+            side = rng.randint(64, 256)
+            zf.writestr(info, png_image(rng, side, side))
+
+    return pages
+
+
+# Латиница как есть, кириллица - в cp1251; ToUnicode шрифта возвращает
+# Unicode при извлечении текста
+_TO_UNICODE = (
+    b"/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+    b"/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+    b"/CMapName /Cp1251-UCS def /CMapType 2 def\n"
+    b"1 begincodespacerange <00> <FF> endcodespacerange\n"
+    b"3 beginbfrange\n<20> <7E> <0020>\n<C0> <DF> <0410>\n<E0> <FF> <0430>\nendbfrange\n"
+    b"2 beginbfchar\n<A8> <0401>\n<B8> <0451>\nendbfchar\n"
+    b"endcmap CMapName currentdict /CMap defineresource pop end end\n"
+)
+
+
+def _pdf_string(text):
+    """Строка PDF в байтах cp1251 (скобки, обратная косая черта и не-ASCII экранируются)"""
+    out = bytearray(b"(")
+    for byte in text.encode('cp1251', 'replace'):
+        if byte in b"()\\":
+            out += b"\\" + bytes([byte])
+        elif 32 <= byte < 127:
+            out.append(byte)
+        else:
+            out += b"\\%03o" % byte
+    return bytes(out + b")")
+
+
+def _pdf_text_string(text):
+    """Строка метаданных PDF (UTF-16BE с BOM)"""
+    return b"<FEFF" + text.encode('utf-16-be').hex().upper().encode() + b">"
+
+
+def write_pdf(path, pages, seed=1):
+    """Синтетический PDF: pages страниц текста, сжатые потоки, шрифт с ToUnicode"""
+    rng = random.Random(seed)
+    offsets = {}
+
+    with open(path, 'wb') as f:
+        def obj(number, body, stream=None):
+            offsets[number] = f.tell()
+            f.write(b"%d 0 obj\n" % number)
+            if stream is None:
+                f.write(body + b"\nendobj\n")
+            else:
+                f.write(body[:-2] + b" /Length %d >>\nstream\n" % len(stream)
+                        + stream + b"\nendstream\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /ToUnicode 4 0 R >>")
+        obj(4, b"<< >>", _TO_UNICODE)
+        obj(5, b"<< /Title " + _pdf_text_string("Синтетический отчет")
+            + b" /Author " + _pdf_text_string("Бенчмарк") + b" >>")
+
+        kids = []
+        number = 6
+        for page in range(pages):
+            lines = [f"Страница {page + 1}"]
+            while len(lines) < LINES_PER_PAGE:
+                lines.append(sentence(rng, rng.randint(8, 14)))
+            content = b"BT /F1 9 Tf 40 800 Td 13 TL\n" + b"".join(
+                _pdf_string(line) + b" '\n" for line in lines
+            ) + b"ET"
+            obj(number + 1, b"<< /Filter /FlateDecode >>", zlib.compress(content, 6))
+            obj(number, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                        b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (number + 1))
+            kids.append(b"%d 0 R" % number)
+            number += 2
+
+        obj(2, b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % pages)
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % number)
+        for i in range(1, number):
+            f.write(b"%010d 00000 n \n" % offsets[i])
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                % (number, xref))
+
+    return pages
+
+
+def generate_corpus(output_dir, profiles=None, scale=1.0, seed=1):
+    """Сгенерировать набор документов и corpus.json с их параметрами"""
+    os.makedirs(output_dir, exist_ok=True)
+    documents = []
+
+    for name, params in sorted((profiles or PROFILES).items()):
+        params = dict(params)
+        kind = params.pop("kind")
+        scaled = {key: max(1, int(value * scale)) if key != "rows" else value
+                  for key, value in params.items()}
+        path = os.path.join(output_dir, f"{name}.{kind}")
+
+        if kind == "docx":
+            pages = write_docx(path, seed=seed, **scaled)
+        else:
+            pages = write_pdf(path, scaled["pages"], seed=seed)
+
+        documents.append({
+            "name": name,
+            "file": os.path.basename(path),
+            "kind": kind,
+            "params": scaled,
+            "pages": pages,
+            "size": os.path.getsize(path)
+        })
+
+    manifest = {"seed": seed, "scale": scale, "documents": documents}
+    with open(os.path.join(output_dir, CORPUS_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
@@ -0,0 +1,144 @@
+# benchmarks/load.py
+"""Нагрузочный тест локального сервиса анализа (core.service)
+
+N клиентов-потоков параллельно шлют запросы по одному файлу из корпуса
+(по кругу) и замеряют задержку - от отправки до последнего результата.
+В отчете: запросов в секунду, задержки p50/p95/p99, ошибки и отказы 503
+(очередь сервиса заполнена).
+
+Без адреса сервиса тест сам запускает его отдельным процессом
+(python -m analyzer serve) на свободном порту и останавливает в конце.
+"""
+
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import CORPUS_MANIFEST
+from core.service_client import ServiceClient, ServiceError
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START_TIMEOUT = 60.0
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку (ближайший ранг)"""
+    if not values:
+        return None
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def corpus_files(corpus_dir):
+    """Пути документов корпуса"""
+    with open(os.path.join(corpus_dir, CORPUS_MANIFEST), 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    return [os.path.abspath(os.path.join(corpus_dir, doc["file"])) for doc in corpus["documents"]]
+
+
+def free_port():
+    """Свободный TCP-порт на localhost"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(workers=None, max_concurrency=None, queue_depth=None, root=None):
+    """Запустить сервис отдельным процессом; (процесс, url) после его готовности
+
+    root - папка с файлами запросов (сервис отклоняет пути вне ее).
+    """
+    port = free_port()
+    command = [sys.executable, os.path.join(PROJECT_DIR, "analyzer.py"), "serve", "--port", str(port)]
+    if root:
+        command += ["--root", root]
+    if workers:
+        command += ["--workers", str(workers)]
+    if max_concurrency:
+        command += ["--max-concurrency", str(max_concurrency)]
+    if queue_depth:
+        command += ["--queue-depth", str(queue_depth)]
+    process = subprocess.Popen(command)
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Сервис завершился при запуске (код {process.returncode})")
+        try:
+            with ServiceClient(url, timeout=1.0) as client:
+                client.health()
+            return process, url
+        except (OSError, ServiceError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Сервис не запустился за отведенное время")
+
+
+def run_load(files, requests=200, concurrency=8, url=None, socket_path=None, options=None,
+             progress=True):
+    """Прогнать нагрузку и вернуть отчет (dict)"""
+    options = options or {}
+    latencies = []
+    counts = {"success": 0, "errors": 0, "rejected": 0}
+    lock = threading.Lock()
+    next_request = iter(range(requests))
+
+    def client_loop():
+        with ServiceClient(url or "http://127.0.0.1:8765", socket_path=socket_path) as client:
+            while True:
+                with lock:
+                    number = next(next_request, None)
+                if number is None:
+                    return
+                path = files[number % len(files)]
+                started = time.perf_counter()
+                try:
+                    results = list(client.analyze([path], **options))
+                    status = "success" if all(r.get("status") == "success" for r in results) else "errors"
+                except ServiceError as e:
+                    status = "rejected" if e.status == 503 else "errors"
+                except OSError:
+                    status = "errors"
+                elapsed = time.perf_counter() - started
+                with lock:
+                    counts[status] += 1
+                    if status == "success":
+                        latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    report = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "options": options,
+        "seconds": round(seconds, 3),
+        "requests_per_s": round(requests / seconds, 1) if seconds else None,
+        "latency_ms": {
+            name: round(value * 1000, 2) if value is not None else None
+            for name, value in (("p50", percentile(latencies, 0.50)),
+                                ("p95", percentile(latencies, 0.95)),
+                                ("p99", percentile(latencies, 0.99)),
+                                ("max", latencies[-1] if latencies else None))
+        }
+    }
+    report.update(counts)
+    if progress:
+        latency = report["latency_ms"]
+        print(f"🚀 {report['requests_per_s']} запросов/с, p50 {latency['p50']} мс, "
+              f"p95 {latency['p95']} мс, p99 {latency['p99']} мс; успешно {counts['success']}, "
+              f"ошибок {counts['errors']}, отказов 503 {counts['rejected']}", file=sys.stderr)
+    return report
@@ -0,0 +1,126 @@
+# benchmarks/search.py
+"""Скорость полнотекстового поиска (core.search_index) на большом индексе
+
+Индекс заполняется синтетическими документами из слов корпуса
+(benchmarks.corpus) напрямую, без анализа файлов: в каждом документе
+есть наименование прибора и регистрационный номер вида 12345-24, как
+в настоящих описаниях типа. Готовый индекс с тем же числом документов
+и seed используется повторно. Запросы - частые и редкие слова, номера,
+поиск по началу слова; каждый повторяется, в отчет идут медиана и
+худшее время. Проверка не проходит, если медиана запроса больше бюджета.
+Частые слова есть почти в каждом документе и ранжируются по всем
+совпадениям (сотни миллисекунд), поэтому бюджет рассчитан на них; тот же
+запрос с max_ranked показывает цену усеченного ранжирования.
+"""
+
+import os
+import random
+import statistics
+import time
+
+from benchmarks.corpus import paragraph
+from core.search_index import SearchIndex
+
+DEFAULT_SEARCH_DOCUMENTS = 100_000
+DEFAULT_SEARCH_REPEAT = 5
+DEFAULT_SEARCH_BUDGET_MS = 500.0
+
+INSTRUMENTS = (
+    "манометр", "термометр", "расходомер", "вольтметр", "амперметр", "осциллограф",
+    "хроматограф", "спектрометр", "динамометр", "тахеометр", "нивелир", "гигрометр",
+)
+
+# Имя -> (запрос, по началу слова, max_ranked); {number} и {instrument} -
+# номер и прибор первого документа индекса
+QUERIES = {
+    "частое слово": ("поверка", False, None),
+    "частое слово, 10000 последних": ("поверка", False, 10000),
+    "другая форма слова": ("поверками", False, None),
+    "два частых слова": ("методика поверки", False, None),
+    "три частых слова": ("средства измерений поверка", False, None),
+    "прибор": ("хроматографы", False, None),
+    "регистрационный номер": ("{number}", False, None),
+    "прибор и номер": ("{instrument} {number}", False, None),
+    "начало слова": ("спектро", True, None),
+    "буква ё": ("расходомёр", False, None),
+    "нет совпадений": ("ксилофон", False, None),
+}
+
+
+def synthetic_document(rng, number):
+    """(имя, текст, {"instrument": прибор, "number": номер}) синтетического описания типа"""
+    instrument = rng.choice(INSTRUMENTS)
+    registry = f"{10000 + number % 90000}-{rng.randint(10, 25)}"
+    paragraphs = [f"{instrument.capitalize()} {rng.choice(('МП', 'ТС', 'АКИП'))}-{rng.randint(1, 999)}. "
+                  f"Регистрационный номер {registry}."]
+    paragraphs.extend(paragraph(rng) for _ in range(rng.randint(3, 12)))
+    return (f"описание_типа_{number:06d}.pdf", "\n\n".join(paragraphs),
+            {"instrument": instrument, "number": registry})
+
+
+def build_index(path, documents=DEFAULT_SEARCH_DOCUMENTS, seed=1, progress=True):
+    """Заполнить индекс синтетическими документами; возвращает поля для запросов"""
+    rng = random.Random(seed)
+    _, _, sample = synthetic_document(random.Random(seed), 0)
+    index = SearchIndex(path, commit_every=5000)
+    if index.count() == documents:
+        index.close()
+        return sample
+    if index.count():
+        # Индекс другого размера - собираем заново
+        index.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        index = SearchIndex(path, commit_every=5000)
+
+    try:
+        started = time.perf_counter()
+        for number in range(documents):
+            name, text, _ = synthetic_document(rng, number)
+            index.add(os.path.join("/bench", name), "/bench", name, text)
+            if progress and (number + 1) % 20000 == 0:
+                print(f"⏳ В индексе {number + 1} документов "
+                      f"({time.perf_counter() - started:.1f} с)")
+        index.optimize()
+        if progress:
+            print(f"✅ Индекс: {documents} документов за {time.perf_counter() - started:.1f} с, "
+                  f"{os.path.getsize(path) / (1024 * 1024):.0f} МБ")
+    finally:
+        index.close()
+    return sample
+
+
+def run_queries(path, sample, repeat=DEFAULT_SEARCH_REPEAT, budget_ms=DEFAULT_SEARCH_BUDGET_MS, progress=True):
+    """Замерить запросы; (отчет, есть ли нарушения)"""
+    index = SearchIndex(path)
+    rows = []
+    try:
+        documents = index.count()
+        for name, (template, prefix, max_ranked) in QUERIES.items():
+            query = template.format(**sample)
+            times = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                found = index.search(query, prefix=prefix, max_ranked=max_ranked)
+                times.append((time.perf_counter() - started) * 1000)
+            row = {
+                "query": name,
+                "text": query,
+                "hits": len(found["hits"]),
+                "matches": found["matches"],
+                "ranked": found["ranked"],
+                "median_ms": round(statistics.median(times), 2),
+                "max_ms": round(max(times), 2),
+            }
+            row["ok"] = row["median_ms"] <= budget_ms
+            rows.append(row)
+            if progress:
+                mark = "✅" if row["ok"] else "⚠️"
+                print(f"{mark} {name} ({query}): {row['median_ms']} мс (худшее {row['max_ms']}), "
+                      f"совпадений {row['matches']}, ранжировано {row['ranked']}")
+    finally:
+        index.close()
+
+    failed = any(not row["ok"] for row in rows)
+    return {"documents": documents, "budget_ms": budget_ms, "queries": rows}, failed
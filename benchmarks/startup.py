@@ -0,0 +1,99 @@
+# benchmarks/startup.py
+"""Бюджет холодного старта консольного режима (python -X importtime)
+
+Каждый сценарий запускается свежим процессом несколько раз, в зачет идет
+лучшее время (меньше всего шума от диска и планировщика). Еще один запуск
+с -X importtime показывает, какие модули загружены и сколько стоил их
+импорт. Проверка не проходит, если сценарий не уложился в бюджет или
+загрузил запрещенный модуль: Qt, python-docx, PyPDF2 и lxml в консольном
+режиме до первого файла не нужны.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 300.0
+DEFAULT_RUNS = 5
+TOP_IMPORTS = 8
+
+# Модули, которых не должно быть при старте без анализа файлов
+FORBIDDEN_MODULES = ("PyQt5", "docx", "PyPDF2", "lxml")
+
+# Имя -> аргументы интерпретатора (запуск из папки проекта)
+SCENARIOS = {
+    "analyzer --help": ["analyzer.py", "--help"],
+    "main.py batch --help": ["main.py", "batch", "--help"],
+    "поиск плагина": ["-c", "from core.batch import find_plugin; "
+                            "find_plugin('a.docx'); find_plugin('a.pdf')"],
+}
+
+
+def parse_importtime(stderr):
+    """Строки -X importtime: [(модуль, собственное мкс, накопленное мкс, вложенность)]"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # строка заголовка
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), self_us, cumulative_us, depth))
+    return imports
+
+
+def run_once(args):
+    """Один запуск: (секунды, stderr)"""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable] + args, cwd=PROJECT_DIR, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace')
+    seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)}: код выхода {completed.returncode}\n{completed.stderr}")
+    return seconds, completed.stderr
+
+
+def measure(name, args, runs=DEFAULT_RUNS):
+    """Замер одного сценария"""
+    best = min(run_once(args)[0] for _ in range(runs))
+    _, stderr = run_once(["-X", "importtime"] + args)
+    imports = parse_importtime(stderr)
+    top_level = [item for item in imports if item[3] == 0]
+    modules = {module.split(".")[0] for module, _, _, _ in imports}
+    return {
+        "scenario": name,
+        "wall_ms": round(best * 1000, 1),
+        "import_ms": round(sum(item[2] for item in top_level) / 1000, 1),
+        "modules": len(imports),
+        "forbidden": sorted(modules.intersection(FORBIDDEN_MODULES)),
+        "top_imports": [
+            {"module": module, "ms": round(cumulative / 1000, 1)}
+            for module, _, cumulative, _ in sorted(top_level, key=lambda item: -item[2])[:TOP_IMPORTS]
+        ]
+    }
+
+
+def check_startup(budget_ms=DEFAULT_BUDGET_MS, runs=DEFAULT_RUNS, progress=True):
+    """Замерить все сценарии; (отчет, есть ли нарушения)"""
+    rows = [measure(name, args, runs) for name, args in SCENARIOS.items()]
+    failed = False
+    for row in rows:
+        row["budget_ms"] = budget_ms
+        row["ok"] = row["wall_ms"] <= budget_ms and not row["forbidden"]
+        failed = failed or not row["ok"]
+        if progress:
+            mark = "✅" if row["ok"] else "⚠️"
+            print(f"{mark} {row['scenario']}: {row['wall_ms']} мс (бюджет {budget_ms:g}), "
+                  f"импорт {row['import_ms']} мс, модулей {row['modules']}")
+            if row["forbidden"]:
+                print(f"   загружены лишние модули: {', '.join(row['forbidden'])}")
+            heaviest = ", ".join(f"{item['module']} {item['ms']}" for item in row["top_imports"][:4])
+            print(f"   самые дорогие импорты (мс): {heaviest}")
+    return {"python": sys.version.split()[0], "scenarios": rows}, failed
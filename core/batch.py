@@ -0,0 +1,318 @@
+# core/batch.py
+"""Пакетный анализ файлов в пуле процессов (без GUI)"""
+
+import glob
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.chunker import DEFAULT_OVERLAP_TOKENS, chunk_document_folder
+from core.instrument import profile_for, span
+from core.memory import MemoryLimitExceeded, memory_limit_for
+from core.registry import get_registry
+
+# Настройки, которые влияют на то, как идет анализ, но не на его результат -
+# в ключ кэша не входят
+RUNTIME_OPTIONS = ("memory_limit_mb", "text_workers")
+
+# Пул процессов переиспользуется между пакетами: в его воркерах плагины
+# уже загружены, и второй пакет не платит за импорт заново
+_pool = None
+_pool_workers = 0
+
+
+def find_plugin(file_path):
+    """Найти плагин, который умеет обрабатывать файл"""
+    return get_registry().find(file_path)
+
+
+def supported_extensions():
+    """Все расширения, которые понимают загруженные плагины"""
+    return get_registry().extensions()
+
+
+def warm_up():
+    """Загрузить плагины в воркере заранее, до первого файла"""
+    get_registry().discover()
+
+
+def get_pool(workers):
+    """Общий пул процессов нужного размера"""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+        _pool_workers = workers
+    return _pool
+
+
+def reset_pool():
+    """Выбросить пул (например, после падения воркера - такой пул больше не работает)"""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _pool_workers = 0
+
+
+def expand_paths(patterns):
+    """Развернуть пути, папки и маски (*.docx, **/*.pdf) в список файлов"""
+    extensions = supported_extensions()
+    files = []
+    seen = set()
+
+    def add(path):
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            files.append(path)
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, names in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in extensions:
+                        add(os.path.join(root, name))
+        elif os.path.isfile(pattern):
+            # Явно указанный файл берем как есть
+            add(pattern)
+        else:
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path) and os.path.splitext(path)[1].lower() in extensions:
+                    add(path)
+
+    return files
+
+
+def analyze_one(file_path, options=None):
+    """Проанализировать один файл (выполняется в процессе-воркере)
+
+    options - настройки анализа, передаются плагину как именованные аргументы.
+    chunk_tokens/chunk_overlap из options плагину не передаются: после
+    выгрузки в папку (output_dir) текст режется на куски (core.chunker).
+    profile ('time' или 'memory') включает замер фаз (core.instrument),
+    итог - в result["profile"]. memory_limit_mb - потолок памяти (core.memory).
+    """
+    started = time.perf_counter()
+    options = dict(options or {})
+    chunk_tokens = options.pop("chunk_tokens", None)
+    chunk_overlap = options.pop("chunk_overlap", None)
+    profile = profile_for(options.pop("profile", None))
+    limit = memory_limit_for(options.pop("memory_limit_mb", None))
+    plugin = find_plugin(file_path)
+
+    if plugin is None:
+        result = {
+            "status": "unsupported",
+            "message": "Формат файла не поддерживается"
+        }
+    else:
+        try:
+            with profile or nullcontext(), limit or nullcontext():
+                result = plugin.analyze(file_path, **options)
+                if chunk_tokens and result.get("status") == "success" and result.get("output_folder"):
+                    with span("export"):
+                        result["chunks"] = len(chunk_document_folder(
+                            result["output_folder"], chunk_tokens,
+                            DEFAULT_OVERLAP_TOKENS if chunk_overlap is None else chunk_overlap
+                        ))
+            if profile is not None:
+                result["profile"] = profile.as_dict()
+        except MemoryLimitExceeded as e:
+            result = {
+                "status": "error",
+                "message": str(e)
+            }
+        except Exception as e:
+            result = {
+                "status": "error",
+                "message": f"Ошибка при анализе: {str(e)}"
+            }
+        result["plugin"] = plugin.name
+
+    result["file"] = file_path
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def iter_batch(file_paths, workers=None, cancel_event=None, cache=None, options=None):
+    """Анализировать файлы в пуле процессов, отдавая результаты по мере готовности
+
+    В очереди пула держим не больше workers * 4 задач, чтобы тысячи файлов
+    не превращались в тысячи висящих Future. cancel_event (threading.Event)
+    позволяет прервать пакет: новые файлы не запускаются, ожидающие снимаются.
+    cache (ResultCache) - файлы, уже проанализированные раньше, не разбираются,
+    а для изменившихся плагин получает прошлый результат (previous).
+    options - настройки анализа для всех файлов пакета. Если text_workers
+    не задан, а файлы идут в пул, каждый файл разбирается в одном процессе:
+    ядра и так заняты разными файлами, и страницы не делятся еще на
+    cpu_count процессов в каждом воркере.
+    """
+    file_paths = list(file_paths)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(file_paths) > 1 and "text_workers" not in (options or {}):
+        options = dict(options or {}, text_workers=1)
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    # При выгрузке в папку результаты нужно записать заново, а при замере
+    # фаз нужен настоящий разбор - кэш не помогает
+    if options and (options.get("output_dir") or options.get("profile")):
+        cache = None
+
+    cache_options = {key: value for key, value in (options or {}).items()
+                     if key not in RUNTIME_OPTIONS} or None
+
+    def from_cache(path):
+        if cache is None:
+            return None
+        plugin = find_plugin(path)
+        return cache.get(path, plugin, cache_options) if plugin else None
+
+    def file_options(path):
+        # Прошлый результат того же пути - плагин пересчитает только изменения
+        if cache is None:
+            return options
+        plugin = find_plugin(path)
+        previous = cache.previous(path, plugin, cache_options) if plugin else None
+        if previous is None:
+            return options
+        return dict(options or {}, previous=previous)
+
+    def to_cache(path, result):
+        if cache is None:
+            return
+        plugin = find_plugin(path)
+        if not plugin:
+            return
+        try:
+            cache.put(path, plugin, result, cache_options)
+        except Exception as e:
+            # Кэш - только ускорение: файл уже проанализирован, результат не теряем
+            print(f"⚠️ Результат не сохранен в кэш ({path}): {e}", file=sys.stderr)
+
+    if workers == 1:
+        for path in file_paths:
+            if cancelled():
+                return
+            result = from_cache(path)
+            if result is None:
+                result = analyze_one(path, file_options(path))
+                to_cache(path, result)
+            yield result
+        return
+
+    max_in_flight = workers * 4
+    pending = iter(file_paths)
+    ready = []
+    pool = get_pool(workers)
+    in_flight = {}
+
+    def submit_next():
+        for path in pending:
+            cached = from_cache(path)
+            if cached is not None:
+                ready.append(cached)
+                continue
+            in_flight[pool.submit(analyze_one, path, file_options(path))] = (path, pool)
+            return True
+        return False
+
+    try:
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+
+        while (in_flight or ready) and not cancelled():
+            while ready:
+                yield ready.pop(0)
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, owner = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Воркер упал целиком (например, убит ОС) - пул придется пересоздать
+                    if isinstance(e, BrokenProcessPool) and owner is pool:
+                        reset_pool()
+                        pool = get_pool(workers)
+                    result = {
+                        "status": "error",
+                        "message": f"Воркер завершился с ошибкой: {str(e)}",
+                        "file": path
+                    }
+                else:
+                    to_cache(path, result)
+                yield result
+                if not cancelled():
+                    submit_next()
+    finally:
+        # При отмене снимаем ожидающие файлы; уже запущенные доработают в фоне
+        for future in in_flight:
+            future.cancel()
+
+
+def run_batch(file_paths, output_path, workers=None, progress=True, cache=None, options=None,
+              metrics=None, index=None):
+    """Проанализировать файлы и записать по одной JSON-строке на файл
+
+    metrics - журнал метрик (core.instrument.open_metrics_sink), получает
+    каждый результат. index - полнотекстовый индекс (core.search_index),
+    в него добавляется текст, выгруженный в папку результатов.
+
+    Возвращает сводку: количество файлов, ошибок и скорость (файлов/с).
+    """
+    file_paths = list(file_paths)
+    total = len(file_paths)
+    summary = {"files": total, "success": 0, "errors": 0, "seconds": 0.0, "files_per_sec": 0.0}
+    started = time.perf_counter()
+
+    if output_path == "-":
+        out = sys.stdout
+    else:
+        out = open(output_path, "w", encoding="utf-8")
+
+    try:
+        for done, result in enumerate(iter_batch(file_paths, workers, cache=cache, options=options), 1):
+            out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            if metrics is not None:
+                metrics.record(result)
+            if index is not None:
+                try:
+                    index.add_result(result)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ {os.path.basename(result['file'])}: не добавлен в индекс - {e}",
+                          file=sys.stderr)
+
+            if result.get("status") == "success":
+                summary["success"] += 1
+            else:
+                summary["errors"] += 1
+
+            if progress:
+                elapsed = time.perf_counter() - started
+                rate = done / elapsed if elapsed > 0 else 0.0
+                mark = "✅" if result.get("status") == "success" else "❌"
+                source = " (кэш)" if result.get("cached") else ""
+                print(f"{mark} [{done}/{total}] {os.path.basename(result['file'])}{source} "
+                      f"({rate:.1f} файлов/с)", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    if summary["seconds"] > 0:
+        summary["files_per_sec"] = round(total / summary["seconds"], 2)
+    return summary
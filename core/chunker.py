@@ -0,0 +1,173 @@
+# core/chunker.py
+"""Нарезка извлеченного текста на куски под окно контекста DeepSeek
+
+Текст читается построчно (абзац DOCX = строка, страница PDF начинается
+со строки "--- Страница N ---") и собирается в куски не больше
+заданного числа токенов. Разрезы делаются по границам абзацев, а по
+возможности - по границам страниц; слишком длинный абзац режется по
+предложениям. Соседние куски могут перекрываться на overlap токенов.
+
+Токены считаются приблизительно и быстро, без настоящего токенизатора:
+латиница ~4 символа на токен, кириллица и прочее ~2.5 символа.
+Готовые куски сразу пишутся в файлы chunk_0001.txt, chunk_0002.txt, ...,
+в памяти держится только текущий кусок.
+"""
+
+import os
+import re
+from collections import deque
+
+from core.defaults import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS
+from core.export import DocumentExporter, MANIFEST_NAME
+
+ASCII_CHARS_PER_TOKEN = 4.0
+OTHER_CHARS_PER_TOKEN = 2.5
+
+# Перевод строки между абзацами куска
+SEPARATOR_TOKENS = 1
+
+# Страницу начинаем с новой порции, если текущая заполнена хотя бы наполовину
+PAGE_BREAK_FILL = 0.5
+
+PAGE_HEADER_RE = re.compile(r"^--- Страница \d+ ---$")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?…;])\s+")
+
+
+def estimate_tokens(text):
+    """Приблизительное число токенов в тексте"""
+    if not text:
+        return 0
+    if text.isascii():
+        return int(len(text) / ASCII_CHARS_PER_TOKEN) + 1
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    other_chars = len(text) - ascii_chars
+    return int(ascii_chars / ASCII_CHARS_PER_TOKEN + other_chars / OTHER_CHARS_PER_TOKEN) + 1
+
+
+def _split_long(block, max_tokens):
+    """Разрезать слишком длинный абзац: по предложениям, в крайнем случае - по символам"""
+    pieces = []
+    current = []
+    current_tokens = 0
+
+    max_tokens -= SEPARATOR_TOKENS
+    for sentence in SENTENCE_END_RE.split(block):
+        tokens = estimate_tokens(sentence) + SEPARATOR_TOKENS
+        if tokens > max_tokens:
+            # Одно "предложение" больше окна (таблица, код) - режем по длине
+            if current:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            step = max(1, int(len(sentence) * max_tokens / tokens))
+            pieces.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def iter_chunks(lines, max_tokens=DEFAULT_MAX_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    """Куски текста (строки) из потока строк
+
+    lines - любые строки: файл, открытый на чтение, или список.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens должен быть больше нуля")
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    blocks = deque()  # (текст, токены) текущего куска
+    total = 0
+    fresh = False  # есть ли в куске что-то кроме перекрытия
+
+    def flush():
+        nonlocal total, fresh
+        chunk = "\n".join(text for text, _ in blocks)
+
+        # Хвост текущего куска становится началом следующего
+        kept = deque()
+        kept_tokens = 0
+        while blocks and kept_tokens + blocks[-1][1] <= overlap_tokens:
+            text, tokens = blocks.pop()
+            kept.appendleft((text, tokens))
+            kept_tokens += tokens
+        blocks.clear()
+        blocks.extend(kept)
+        total = kept_tokens
+        fresh = False
+        return chunk
+
+    header = None  # заголовок страницы держим вместе с ее первым абзацем
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+
+        if PAGE_HEADER_RE.match(line):
+            if header is None and fresh and total >= max_tokens * PAGE_BREAK_FILL:
+                yield flush()
+            # Пустая страница - заголовки идут подряд
+            header = line if header is None else header + "\n" + line
+            continue
+        if header is not None:
+            line = header + "\n" + line
+            header = None
+
+        tokens = estimate_tokens(line) + SEPARATOR_TOKENS
+        pieces = [(line, tokens)] if tokens <= max_tokens else \
+            [(piece, estimate_tokens(piece) + SEPARATOR_TOKENS) for piece in _split_long(line, max_tokens)]
+
+        for text, tokens in pieces:
+            if fresh and total + tokens > max_tokens:
+                yield flush()
+            # Перекрытие не должно вытеснять новый текст из окна
+            while blocks and not fresh and total + tokens > max_tokens:
+                total -= blocks.popleft()[1]
+            blocks.append((text, tokens))
+            total += tokens
+            fresh = True
+
+    if fresh:
+        yield flush()
+
+
+def write_chunks(lines, exporter, max_tokens=DEFAULT_MAX_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    """Записать куски в chunks/ папки документа; возвращает описание кусков"""
+    chunks = []
+    for number, chunk in enumerate(iter_chunks(lines, max_tokens, overlap_tokens), 1):
+        name = f"chunk_{number:04d}.txt"
+        path = exporter.write_text("chunks", name, chunk + "\n")
+        chunks.append({"path": path, "tokens": estimate_tokens(chunk)})
+    return chunks
+
+
+def chunk_document_folder(folder, max_tokens=DEFAULT_MAX_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    """Нарезать text/text.txt папки документа и дописать куски в manifest.json"""
+    text_path = os.path.join(folder, "text", "text.txt")
+    if not os.path.exists(text_path):
+        raise FileNotFoundError(f"Нет извлеченного текста: {text_path}")
+    if not os.path.exists(os.path.join(folder, MANIFEST_NAME)):
+        raise FileNotFoundError(f"Нет {MANIFEST_NAME} в папке {folder}")
+
+    exporter = DocumentExporter.resume(folder)
+    try:
+        exporter.forget("chunks")
+        with open(text_path, 'r', encoding='utf-8') as lines:
+            chunks = write_chunks(lines, exporter, max_tokens, overlap_tokens)
+        exporter.finish({
+            "chunks": {
+                "max_tokens": max_tokens,
+                "overlap_tokens": overlap_tokens,
+                "count": len(chunks),
+                "files": chunks
+            }
+        })
+    finally:
+        exporter.close()
+    return chunks
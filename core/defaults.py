@@ -0,0 +1,24 @@
+# core/defaults.py
+"""Значения по умолчанию для командной строки
+
+Модуль нарочно ничего не импортирует: analyzer строит справку и разбирает
+аргументы, не загружая asyncio, пул процессов и плагины. Модули, которым
+принадлежат эти настройки (core.chunker, core.watcher, core.service),
+берут значения отсюда.
+"""
+
+# Нарезка текста на куски (core.chunker)
+DEFAULT_MAX_TOKENS = 4000
+DEFAULT_OVERLAP_TOKENS = 200
+
+# Наблюдение за папками (core.watcher)
+DEFAULT_SETTLE = 2.0
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Сервис анализа (core.service)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_DEPTH = 256
+
+# Поиск по индексу (core.search_index)
+DEFAULT_SEARCH_LIMIT = 20
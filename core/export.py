@@ -0,0 +1,276 @@
+# core/export.py
+"""Выгрузка результатов анализа в папку документа
+
+Структура для каждого документа:
+    <папка результатов>/<имя файла>-<хэш пути>/
+        text/  images/  tables/  formulas/
+        manifest.json  - список всех файлов с размером и SHA-256
+
+Каждый файл сначала пишется во временный файл рядом и только потом
+переименовывается (os.replace), поэтому в папке никогда не остаются
+недописанные файлы. Мелкие файлы (формулы, картинки) пишутся через
+небольшой пул потоков: на медленном сетевом диске (H:/) запись идет
+параллельно, а не по одному файлу.
+"""
+
+import datetime
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ARTIFACT_KINDS = ("text", "images", "tables", "formulas")
+MANIFEST_NAME = "manifest.json"
+DEFAULT_IO_WORKERS = 4
+
+
+def document_folder(output_dir, file_path):
+    """Папка результатов документа: <output_dir>/<имя файла с расширением>-<хэш пути>
+
+    Хэш полного пути нужен, чтобы report.docx и report.pdf или одноименные
+    файлы из разных папок не писали в одну папку результатов.
+    """
+    path_hash = hashlib.sha1(os.path.abspath(file_path).encode('utf-8', 'surrogatepass')).hexdigest()[:8]
+    return os.path.join(output_dir, f"{os.path.basename(file_path)}-{path_hash}")
+
+
+def _temp_path(path):
+    """Временный файл в той же папке (чтобы переименование было атомарным)"""
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def atomic_write_bytes(path, data):
+    """Записать файл целиком: временный файл + os.replace"""
+    temp = _temp_path(path)
+    try:
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+class _HashingFile(io.RawIOBase):
+    """Файл, который считает SHA-256 и размер всего, что в него записано"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+    def close(self):
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+class ArtifactWriter:
+    """Потоковая запись одного файла (таблица, полный текст)
+
+    Данные идут во временный файл; commit() переименовывает его в
+    настоящее имя и добавляет в манифест, discard() удаляет.
+    Можно использовать как контекстный менеджер.
+    """
+
+    def __init__(self, exporter, kind, name, text=True, encoding='utf-8', newline=None):
+        self.exporter = exporter
+        self.kind = kind
+        self.name = name
+        self.path = exporter.path(kind, name)
+        self.temp = _temp_path(self.path)
+
+        self._hashing = _HashingFile(open(self.temp, 'wb'))
+        buffered = io.BufferedWriter(self._hashing)
+        if text:
+            self.file = io.TextIOWrapper(buffered, encoding=encoding, newline=newline)
+        else:
+            self.file = buffered
+        self._done = False
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def commit(self):
+        """Дописать и опубликовать файл"""
+        if self._done:
+            return
+        self._done = True
+        self.file.close()
+        os.replace(self.temp, self.path)
+        self.exporter.record(self.kind, self.name, self._hashing.size, self._hashing.digest.hexdigest())
+
+    def discard(self):
+        """Отказаться от файла (ошибка при разборе)"""
+        if self._done:
+            return
+        self._done = True
+        self.file.close()
+        if os.path.exists(self.temp):
+            os.remove(self.temp)
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+class DocumentExporter:
+    """Папка результатов одного документа и ее манифест"""
+
+    def __init__(self, output_dir, file_path, io_workers=DEFAULT_IO_WORKERS):
+        self.file_path = file_path
+        self.root = document_folder(output_dir, file_path)
+        self.io_workers = io_workers
+        self.artifacts = []
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = []
+        self._folders = set()
+        self.previous = {}  # поля манифеста, если папка уже была выгружена
+
+    @classmethod
+    def resume(cls, root, io_workers=DEFAULT_IO_WORKERS):
+        """Дописать файлы в уже выгруженную папку документа
+
+        Прежние файлы и поля manifest.json сохраняются; finish() запишет
+        манифест заново вместе с новыми файлами.
+        """
+        with open(os.path.join(root, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        exporter = cls(os.path.dirname(root), manifest.get("source") or root, io_workers)
+        exporter.root = root
+        exporter.artifacts = manifest.pop("artifacts", [])
+        exporter.previous = manifest
+        return exporter
+
+    def forget(self, kind):
+        """Удалить ранее выгруженные файлы одного вида (перед повторной выгрузкой)"""
+        with self._lock:
+            kept = []
+            for artifact in self.artifacts:
+                if artifact["kind"] != kind:
+                    kept.append(artifact)
+                    continue
+                path = os.path.join(self.root, *artifact["path"].split("/"))
+                if os.path.exists(path):
+                    os.remove(path)
+            self.artifacts = kept
+            self.previous.pop(kind, None)
+
+    def path(self, kind, name):
+        """Полный путь файла внутри папки документа (папка создается при первой записи)"""
+        if kind not in self._folders:
+            os.makedirs(os.path.join(self.root, kind), exist_ok=True)
+            self._folders.add(kind)
+        return os.path.join(self.root, kind, name)
+
+    @staticmethod
+    def relative(kind, name):
+        """Путь относительно папки документа (как в манифесте и ссылках)"""
+        return f"{kind}/{name}"
+
+    def record(self, kind, name, size, sha256):
+        """Добавить файл в манифест"""
+        with self._lock:
+            self.artifacts.append({
+                "path": self.relative(kind, name),
+                "kind": kind,
+                "size": size,
+                "sha256": sha256
+            })
+
+    def write_bytes(self, kind, name, data):
+        """Записать небольшой файл в фоне (через пул потоков ввода-вывода)"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.io_workers,
+                                            thread_name_prefix="export-io")
+        path = self.path(kind, name)
+        digest = hashlib.sha256(data).hexdigest()
+
+        def job():
+            atomic_write_bytes(path, data)
+            self.record(kind, name, len(data), digest)
+
+        self._pending.append(self._pool.submit(job))
+        return self.relative(kind, name)
+
+    def write_text(self, kind, name, text, encoding='utf-8'):
+        """Записать небольшой текстовый файл в фоне"""
+        return self.write_bytes(kind, name, text.encode(encoding))
+
+    def open_text(self, kind, name, encoding='utf-8', newline=None):
+        """Потоковая запись большого текстового файла"""
+        return ArtifactWriter(self, kind, name, text=True, encoding=encoding, newline=newline)
+
+    def open_binary(self, kind, name):
+        """Потоковая запись большого двоичного файла"""
+        return ArtifactWriter(self, kind, name, text=False)
+
+    def wait(self):
+        """Дождаться фоновых записей; первая ошибка пробрасывается"""
+        pending, self._pending = self._pending, []
+        error = None
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def finish(self, extra=None):
+        """Дождаться всех записей и записать manifest.json
+
+        extra - дополнительные поля манифеста (плагин, статистика...).
+        Возвращает путь к манифесту.
+        """
+        try:
+            self.wait()
+        finally:
+            self.close()
+
+        manifest = dict(self.previous)
+        manifest.update({
+            "document": os.path.basename(self.file_path),
+            "source": os.path.abspath(self.file_path),
+            "exported": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        if extra:
+            manifest.update(extra)
+        manifest["artifacts"] = sorted(self.artifacts, key=lambda a: a["path"])
+
+        # Полная структура папок - даже если, например, формул в документе нет
+        for kind in ARTIFACT_KINDS:
+            self.path(kind, "")
+
+        manifest_path = os.path.join(self.root, MANIFEST_NAME)
+        atomic_write_bytes(
+            manifest_path,
+            json.dumps(manifest, ensure_ascii=False, indent=2, default=str).encode('utf-8')
+        )
+        return manifest_path
+
+    def close(self):
+        """Остановить пул потоков (без манифеста - например, при ошибке)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,299 @@
+# core/instrument.py
+"""Замеры фаз анализа: время и выделения памяти по именованным участкам
+
+Плагины размечают фазы так:
+
+    with span("open"):
+        zf = zipfile.ZipFile(file_path)
+
+Пока замер не включен (нет активного Profile), span() возвращает один
+и тот же пустой объект - это одна проверка ContextVar на фазу, то есть
+практически бесплатно. Фазы крупные (открытие, разбор, текст,
+метаданные, выгрузка), внутрь циклов по абзацам span() не ставится.
+
+Profile(memory=True) дополнительно включает tracemalloc и для каждой
+фазы считает прирост выделенной памяти и пик внутри фазы; это заметно
+замедляет разбор, поэтому есть режим только времени (memory=False).
+
+Итоги уходят в результат анализа ("profile") и в журнал метрик:
+JSONL (строка на файл) или текстовый файл Prometheus для node_exporter.
+"""
+
+import atexit
+import contextvars
+import datetime
+import json
+import os
+import re
+import time
+import tracemalloc
+
+from core.export import atomic_write_bytes
+
+PROFILE_MODES = ("time", "memory")
+METRICS_PREFIX = "docx_analyzer"
+
+_current = contextvars.ContextVar("docx_analyzer_profile", default=None)
+
+
+class _NullSpan:
+    """Фаза при выключенном замере - ничего не делает"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Одна фаза при включенном замере"""
+
+    __slots__ = ("profile", "name", "path", "started", "start_memory", "peak")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile._enter(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile._exit(self)
+        return False
+
+
+def span(name):
+    """Участок анализа с именем name (open, parse, text, metadata, export)"""
+    profile = _current.get()
+    if profile is None:
+        return _NULL_SPAN
+    return _Span(profile, name)
+
+
+class Profile:
+    """Замер одного вызова analyze: фазы с одинаковым путем суммируются
+
+    Путь фазы - имена вложенных фаз через "/", например "export/text".
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.spans = {}
+        self.seconds = 0.0
+        self._stack = []
+        self._token = None
+        self._own_tracing = False
+        self._started = 0.0
+
+    def __enter__(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+        self._token = _current.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._started
+        _current.reset(self._token)
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+        return False
+
+    def _enter(self, sp):
+        parent = self._stack[-1] if self._stack else None
+        sp.path = f"{parent.path}/{sp.name}" if parent else sp.name
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Пик до входа принадлежит родителю; дальше считаем пик заново
+            if parent is not None:
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+            sp.start_memory = current
+            sp.peak = current
+        self._stack.append(sp)
+        sp.started = time.perf_counter()
+
+    def _exit(self, sp):
+        seconds = time.perf_counter() - sp.started
+        self._stack.pop()
+
+        entry = self.spans.get(sp.path)
+        if entry is None:
+            entry = self.spans[sp.path] = {"span": sp.path, "calls": 0, "seconds": 0.0}
+            if self.memory:
+                entry.update({"alloc_bytes": 0, "peak_bytes": 0})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            sp.peak = max(sp.peak, peak)
+            entry["alloc_bytes"] += current - sp.start_memory
+            entry["peak_bytes"] = max(entry["peak_bytes"], sp.peak - sp.start_memory)
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, sp.peak)
+
+    def as_dict(self):
+        """Итог замера для результата анализа"""
+        spans = []
+        for entry in self.spans.values():
+            entry = dict(entry, seconds=round(entry["seconds"], 6))
+            spans.append(entry)
+        return {
+            "mode": "memory" if self.memory else "time",
+            "seconds": round(self.seconds, 6),
+            "spans": spans
+        }
+
+
+def profile_for(mode):
+    """Profile для режима из настроек: 'time', 'memory' (True - 'memory') или None"""
+    if not mode:
+        return None
+    if mode is True:
+        mode = "memory"
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Неизвестный режим замера: {mode}")
+    return Profile(memory=mode == "memory")
+
+
+class JsonlMetricsSink:
+    """Журнал метрик: одна JSON-строка на проанализированный файл (дописывается)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def record(self, result):
+        """Записать метрики результата анализа"""
+        line = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "file": result.get("file"),
+            "plugin": result.get("plugin"),
+            "status": result.get("status"),
+            "seconds": result.get("seconds")
+        }
+        if "profile" in result:
+            line["profile"] = result["profile"]
+        self.file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def maybe_flush(self):
+        """Строки уже записаны в record - ничего не делает"""
+
+    def close(self):
+        self.file.close()
+
+
+_PROM_LINE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$')
+
+
+def _prom_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class PrometheusMetricsSink:
+    """Счетчики в текстовом файле Prometheus (коллектор textfile у node_exporter)
+
+    Файл переписывается целиком и атомарно (node_exporter не должен увидеть
+    его наполовину). Счетчики из прежнего файла подхватываются при открытии,
+    поэтому между запусками пакета они только растут, как и положено counter.
+    Файл записывается после каждых flush_every результатов, при очередном
+    результате, если с прошлой записи прошло flush_interval секунд, и в
+    maybe_flush() - ее долгоживущий процесс (watch) вызывает в цикле, чтобы
+    последние результаты серии не ждали следующего файла. close() (и выход
+    из программы, если close не вызвали) записывает все, что осталось.
+    """
+
+    HELP = {
+        "files_total": "Проанализировано файлов",
+        "file_seconds_total": "Суммарное время анализа файлов, с",
+        "phase_seconds_total": "Суммарное время фаз анализа, с",
+        "phase_calls_total": "Количество входов в фазу",
+        "phase_alloc_bytes_total": "Суммарный прирост выделенной памяти в фазе, байт",
+    }
+
+    def __init__(self, path, flush_every=50, flush_interval=5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.counters = {}
+        self._unsaved = 0
+        self._flushed_at = time.monotonic()
+        self._load()
+        atexit.register(self.close)
+
+    def _load(self):
+        """Подхватить счетчики из ранее записанного файла"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = _PROM_LINE_RE.match(line.strip())
+                if match and match.group(1).startswith(METRICS_PREFIX + "_"):
+                    try:
+                        self.counters[(match.group(1), match.group(2) or "")] = float(match.group(3))
+                    except ValueError:
+                        pass
+
+    def _add(self, name, labels, value):
+        key = (f"{METRICS_PREFIX}_{name}",
+               "{" + ",".join(f'{k}="{_prom_label(v)}"' for k, v in labels) + "}")
+        self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def record(self, result):
+        """Добавить результат анализа к счетчикам"""
+        plugin = result.get("plugin") or "unknown"
+        self._add("files_total", [("plugin", plugin), ("status", result.get("status"))], 1)
+        self._add("file_seconds_total", [("plugin", plugin)], result.get("seconds") or 0.0)
+        for entry in result.get("profile", {}).get("spans", []):
+            labels = [("plugin", plugin), ("phase", entry["span"])]
+            self._add("phase_seconds_total", labels, entry["seconds"])
+            self._add("phase_calls_total", labels, entry["calls"])
+            if "alloc_bytes" in entry:
+                self._add("phase_alloc_bytes_total", labels, max(0, entry["alloc_bytes"]))
+
+        self._unsaved += 1
+        if self._unsaved >= self.flush_every:
+            self.flush()
+        else:
+            self.maybe_flush()
+
+    def maybe_flush(self):
+        """Записать файл, если есть незаписанные результаты и прошло flush_interval секунд"""
+        if self._unsaved and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Записать файл метрик"""
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            short = name[len(METRICS_PREFIX) + 1:]
+            lines.append(f"# HELP {name} {self.HELP.get(short, short)}")
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(self.counters.items()):
+                if metric == name:
+                    lines.append(f"{metric}{labels} {value:.10g}")
+        atomic_write_bytes(self.path, ("\n".join(lines) + "\n").encode('utf-8'))
+        self._unsaved = 0
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        atexit.unregister(self.close)
+        self.flush()
+
+
+def open_metrics_sink(path):
+    """Журнал метрик по расширению файла: .prom - Prometheus, иначе JSONL"""
+    if path.endswith(".prom"):
+        return PrometheusMetricsSink(path)
+    return JsonlMetricsSink(path)
@@ -0,0 +1,98 @@
+# core/memory.py
+"""Ограничение памяти при анализе очень больших файлов
+
+memory_limit_mb - потолок памяти (RSS), которую может занять анализ
+одного файла сверх того, что процесс-воркер занимал до него. Воркеры
+переиспользуются, а освобожденную память процесс системе почти не
+возвращает, поэтому отсчет идет от RSS на входе в MemoryLimit: после
+одного тяжелого файла следующие не упираются в потолок. С ним:
+
+* файлы больше четверти потолка обрабатываются потоково: PDF - по одной
+  странице в этом же процессе с освобождением разобранных объектов,
+  DOCX - только потоковым движком, картинки - кусками из архива;
+* по ходу разбора текущая память сверяется с потолком, и при
+  превышении анализ файла прерывается понятной ошибкой
+  (MemoryLimitExceeded), а не убийством воркера системой.
+
+Проверка устроена как span() в core.instrument: без активного потолка
+check_memory() - одна проверка ContextVar.
+"""
+
+import contextvars
+import os
+import sys
+
+# Файлы больше этой доли потолка разбираются потоково
+STREAMING_FRACTION = 0.25
+
+_current = contextvars.ContextVar("docx_analyzer_memory_limit", default=None)
+
+
+class MemoryLimitExceeded(MemoryError):
+    """Файл не помещается в заданный потолок памяти"""
+
+
+def current_rss():
+    """Текущая память процесса (RSS) в байтах или None, если ее не узнать"""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class MemoryLimit:
+    """Потолок памяти на время анализа одного файла (контекстный менеджер)"""
+
+    def __init__(self, limit_mb):
+        if limit_mb <= 0:
+            raise ValueError("Потолок памяти должен быть больше нуля")
+        self.limit_mb = limit_mb
+        self.limit_bytes = int(limit_mb * 1024 * 1024)
+        self.baseline = 0
+        self._token = None
+
+    def streaming(self, file_path):
+        """Нужно ли обрабатывать файл потоково"""
+        return os.path.getsize(file_path) > self.limit_bytes * STREAMING_FRACTION
+
+    def check(self, where):
+        """Прервать анализ, если с начала файла память выросла больше потолка"""
+        rss = current_rss()
+        if rss is not None and rss - self.baseline > self.limit_bytes:
+            raise MemoryLimitExceeded(
+                f"Превышен потолок памяти {self.limit_mb} МБ ({where}: "
+                f"+{(rss - self.baseline) // (1024 * 1024)} МБ) - файл слишком большой для этого лимита"
+            )
+
+    def __enter__(self):
+        self.baseline = current_rss() or 0
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+
+def memory_limit_for(limit_mb):
+    """MemoryLimit из настроек анализа или None (без потолка)"""
+    return MemoryLimit(limit_mb) if limit_mb else None
+
+
+def active_limit():
+    """Действующий потолок памяти или None"""
+    return _current.get()
+
+
+def check_memory(where):
+    """Проверить память против действующего потолка (без потолка ничего не делает)"""
+    limit = _current.get()
+    if limit is not None:
+        limit.check(where)
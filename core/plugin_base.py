@@ -1,6 +1,13 @@
 # core/plugin_base.py
 """Базовый класс для всех плагинов"""
 
+import os
+
+# Уровни анализа: metadata - только свойства документа без разбора
+# содержимого, standard - статистика и начало текста,
+# full - дополнительно весь текст документа
+ANALYSIS_LEVELS = ("metadata", "standard", "full")
+
 
 class DocumentPlugin:
     """Простейший плагин для анализа документов"""
@@ -13,12 +20,15 @@ class DocumentPlugin:
     def can_handle(self, file_path):
         """Может ли этот плагин обработать файл?"""
         # Проверяем расширение файла
-        import os
         file_ext = os.path.splitext(file_path)[1].lower()
         return file_ext in self.supported_extensions
 
-    def analyze(self, file_path):
-        """Проанализировать файл - БАЗОВЫЙ МЕТОД"""
+    def analyze(self, file_path, **options):
+        """Проанализировать файл - БАЗОВЫЙ МЕТОД
+
+        options - настройки анализа (level, output_dir, engine для DOCX...);
+        незнакомые плагину настройки он просто пропускает.
+        """
         # Этот метод будут переопределять конкретные плагины
         return {
             "status": "not_implemented",
@@ -0,0 +1,106 @@
+# core/registry.py
+"""Реестр плагинов: поиск по расширению, ленивая загрузка, "теплые" экземпляры
+
+Плагины находятся в папке plugins/ (модули *_plugin.py) и в точках входа
+пакетов (группа docx_analyzer.plugins). Модули импортируются один раз -
+при первом обращении к реестру, а тяжелые библиотеки (python-docx, PyPDF2)
+плагины подгружают только при анализе своего первого файла. Экземпляры
+плагинов живут столько же, сколько процесс, и переиспользуются между
+вызовами и пакетами.
+"""
+
+import importlib
+import inspect
+import os
+import pkgutil
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.append(PROJECT_DIR)
+
+from core.plugin_base import DocumentPlugin
+
+PLUGINS_DIR = os.path.join(PROJECT_DIR, "plugins")
+ENTRY_POINT_GROUP = "docx_analyzer.plugins"
+
+
+class PluginRegistry:
+    """Все доступные плагины и словарь расширение -> плагин"""
+
+    def __init__(self, plugins_dir=PLUGINS_DIR, package="plugins", entry_point_group=ENTRY_POINT_GROUP):
+        self.plugins_dir = plugins_dir
+        self.package = package
+        self.entry_point_group = entry_point_group
+        self.by_extension = {}
+        self._plugins = []
+        self._discovered = False
+
+    def discover(self):
+        """Найти и загрузить плагины (выполняется один раз)"""
+        if self._discovered:
+            return
+        self._discovered = True
+
+        for module_info in sorted(pkgutil.iter_modules([self.plugins_dir]), key=lambda m: m.name):
+            if not module_info.name.endswith("_plugin"):
+                continue
+            module_name = f"{self.package}.{module_info.name}"
+            try:
+                module = importlib.import_module(module_name)
+            except Exception as e:
+                print(f"⚠️ Плагин {module_name} не загружен: {e}", file=sys.stderr)
+                continue
+
+            for _, cls in inspect.getmembers(module, inspect.isclass):
+                if (issubclass(cls, DocumentPlugin) and cls is not DocumentPlugin
+                        and cls.__module__ == module.__name__):
+                    self.register(cls())
+
+        for entry_point in self._entry_points():
+            try:
+                loaded = entry_point.load()
+                self.register(loaded() if inspect.isclass(loaded) else loaded)
+            except Exception as e:
+                print(f"⚠️ Плагин {entry_point.name} не загружен: {e}", file=sys.stderr)
+
+    def _entry_points(self):
+        """Плагины, установленные отдельными пакетами"""
+        try:
+            from importlib.metadata import entry_points
+            return list(entry_points(group=self.entry_point_group))
+        except Exception:
+            return []
+
+    def register(self, plugin):
+        """Добавить плагин; первое зарегистрированное расширение выигрывает"""
+        self._plugins.append(plugin)
+        for ext in plugin.supported_extensions:
+            self.by_extension.setdefault(ext.lower(), plugin)
+
+    def plugins(self):
+        """Список загруженных плагинов"""
+        self.discover()
+        return list(self._plugins)
+
+    def extensions(self):
+        """Все поддерживаемые расширения"""
+        self.discover()
+        return set(self.by_extension)
+
+    def find(self, file_path):
+        """Плагин для файла (по расширению) или None"""
+        self.discover()
+        return self.by_extension.get(os.path.splitext(file_path)[1].lower())
+
+
+# Один реестр на процесс - плагины остаются "теплыми" между вызовами
+_registry = None
+
+
+def get_registry():
+    """Общий реестр плагинов текущего процесса"""
+    global _registry
+    if _registry is None:
+        _registry = PluginRegistry()
+    return _registry
@@ -0,0 +1,195 @@
+# core/result_cache.py
+"""Постоянный кэш результатов анализа (SQLite)
+
+Ключ результата - хэш содержимого файла + имя и версия плагина, поэтому
+переименованный или скопированный документ тоже берется из кэша, а смена
+версии плагина автоматически делает старые записи недействительными.
+Для неизменных файлов хэш не пересчитывается: достаточно сверить
+mtime и размер из os.stat с сохраненными.
+
+Для каждого пути помнится и последний результат (previous): если файл
+изменился, плагин может пересчитать только изменившиеся части.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Кэш лежит рядом с app_config.json (в папке проекта)
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "results.sqlite"
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path):
+    """SHA-256 содержимого файла (читаем кусками, без загрузки целиком)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Кэш результатов с вытеснением давно не использованных (LRU) по размеру"""
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+            CREATE TABLE IF NOT EXISTS latest (
+                path TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (path, scope)
+            );
+        """)
+        self.conn.commit()
+        self.total_bytes = self.conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM results"
+        ).fetchone()[0]
+
+    def close(self):
+        """Закрыть базу"""
+        self.conn.close()
+
+    def file_hash(self, file_path):
+        """Хэш файла: пересчитывается только если изменились mtime или размер"""
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+
+        row = self.conn.execute(
+            "SELECT mtime_ns, size, sha256 FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return row[2]
+
+        digest = file_sha256(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+            (path, st.st_mtime_ns, st.st_size, digest)
+        )
+        self.conn.commit()
+        return digest
+
+    @staticmethod
+    def make_scope(plugin, options=None):
+        """Плагин + его версия + настройки анализа"""
+        scope = f"{plugin.name}:{plugin.version}"
+        if options:
+            scope += ":" + json.dumps(options, sort_keys=True, ensure_ascii=False, default=str)
+        return scope
+
+    @classmethod
+    def make_key(cls, digest, plugin, options=None):
+        """Ключ результата: содержимое + плагин + его версия + настройки анализа"""
+        return f"{digest}:{cls.make_scope(plugin, options)}"
+
+    def get(self, file_path, plugin, options=None):
+        """Готовый результат из кэша или None"""
+        try:
+            key = self.make_key(self.file_hash(file_path), plugin, options)
+        except OSError:
+            return None
+
+        row = self.conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        self.conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+
+        result = json.loads(row[0])
+        # Тот же документ мог прийти под другим именем
+        if "stats" in result:
+            result["stats"]["file_name"] = os.path.basename(file_path)
+        result["file"] = file_path
+        result["cached"] = True
+        return result
+
+    def previous(self, file_path, plugin, options=None):
+        """Последний сохраненный результат для этого пути (файл мог с тех пор измениться)"""
+        row = self.conn.execute(
+            "SELECT results.result FROM latest JOIN results ON results.key = latest.key "
+            "WHERE latest.path = ? AND latest.scope = ?",
+            (os.path.abspath(file_path), self.make_scope(plugin, options))
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, file_path, plugin, result, options=None):
+        """Сохранить успешный результат анализа"""
+        if result.get("status") != "success":
+            return
+
+        try:
+            key = self.make_key(self.file_hash(file_path), plugin, options)
+        except OSError:
+            return
+
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        nbytes = len(payload.encode('utf-8'))
+
+        old = self.conn.execute("SELECT nbytes FROM results WHERE key = ?", (key,)).fetchone()
+        if old:
+            self.total_bytes -= old[0]
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (key, result, nbytes, last_access) VALUES (?, ?, ?, ?)",
+            (key, payload, nbytes, time.time())
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO latest (path, scope, key) VALUES (?, ?, ?)",
+            (os.path.abspath(file_path), self.make_scope(plugin, options), key)
+        )
+        self.total_bytes += nbytes
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        """Удалить самые давно использованные записи, пока кэш больше лимита"""
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        rows = self.conn.execute("SELECT key, nbytes FROM results ORDER BY last_access")
+        to_delete = []
+        for key, nbytes in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            self.total_bytes -= nbytes
+
+        self.conn.executemany("DELETE FROM results WHERE key = ?", to_delete)
+
+    def clear(self):
+        """Полностью очистить кэш"""
+        self.conn.execute("DELETE FROM results")
+        self.conn.execute("DELETE FROM files")
+        self.conn.execute("DELETE FROM latest")
+        self.conn.commit()
+        self.total_bytes = 0
@@ -0,0 +1,377 @@
+# core/search_index.py
+"""Полнотекстовый поиск по проанализированным документам (SQLite FTS5)
+
+В индекс попадает полный текст из папок результатов (text/text.txt,
+см. core.export): пакетный анализ и наблюдение за папками с --index
+добавляют документы по мере готовности, а уже выгруженные папки можно
+проиндексировать командой analyzer index. Документ определяется путем
+исходного файла: повторный анализ заменяет прежнюю запись, а если
+SHA-256 текста из manifest.json не изменился, текст не перечитывается.
+prune() удаляет документы, исходного файла или папки результатов
+которых больше нет.
+
+Русские слова индексируются по основе: у слова отрезается окончание
+(поверка, поверки, поверками -> поверк), "ё" заменяется на "е", и так
+же разбирается запрос. Поэтому форма слова в запросе не важна, а каждое
+слово запроса - это один список документов FTS5, без перебора всех слов
+с общим началом. Поиск по началу слова (--prefix) тоже есть, но на
+частых словах он медленнее.
+
+BM25 считается по всем совпадениям, поэтому порядок точный, но слово,
+которое есть почти в каждом документе, на 100 тысячах документов
+ранжируется за сотни миллисекунд. search(max_ranked=N) ограничивает
+ранжирование N последними проиндексированными совпадениями; сколько
+всего совпадений и сколько из них ранжировано, видно в результате
+(matches, ranked, truncated) - усечение никогда не бывает молчаливым. Фрагмент с
+найденными словами вырезается в Python из сжатого исходного текста:
+snippet() из FTS5 заново разбирает весь документ и на больших текстах
+стоит сотни миллисекунд.
+"""
+
+import functools
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+
+from core.defaults import DEFAULT_SEARCH_LIMIT
+from core.export import MANIFEST_NAME
+
+# Индекс лежит рядом с кэшем результатов (в папке проекта)
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "search.sqlite"
+)
+TEXT_ARTIFACT = "text/text.txt"
+# Пакетная вставка: фиксируем транзакцию раз в столько документов
+DEFAULT_COMMIT_EVERY = 64
+# Больше этого текст документа не индексируется (огромные PDF)
+MAX_TEXT_BYTES = 64 * 1024 * 1024
+# Короче этого начало слова (--prefix) ищется только целиком - иначе "в*" совпадет со всем
+MIN_PREFIX_CHARS = 3
+SNIPPET_CHARS = 200
+# Для выбора фрагмента хватает первых совпадений
+SNIPPET_MATCHES = 5000
+
+# Основа короче этого не укорачивается (мер, вес, тип)
+MIN_STEM_CHARS = 4
+# Окончания русских существительных и прилагательных, длинные - первыми
+ENDINGS = tuple(sorted((
+    "ами ями ого его ому ему ыми ими ией иях иям ах ях ам ям ов ев ей ой ий ый ая яя ое ее "
+    "ые ие ую юю ым им ых их ом ем ию ия ье ья ью а я о е ы и у ю ь й"
+).split(), key=len, reverse=True))
+
+# Как в токенизаторе unicode61: буквы и цифры, подчеркивание - разделитель
+_WORD = re.compile(r"[^\W_]+")
+
+
+def without_yo(text):
+    """ё -> е (str.replace на кириллице намного быстрее str.translate)"""
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+
+def normalize(text):
+    """Текст для сравнения: нижний регистр, ё -> е"""
+    return without_yo(text.lower())
+
+
+@functools.lru_cache(maxsize=200_000)
+def stem(word):
+    """Основа слова (в нижнем регистре): без окончания, если основа останется не короче 4 букв"""
+    if len(word) > MIN_STEM_CHARS:
+        for ending in ENDINGS:
+            if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_CHARS:
+                return word[:-len(ending)]
+    return word
+
+
+def index_form(text):
+    """Текст в том виде, в каком его видит FTS5: основы слов через пробел"""
+    return " ".join(map(stem, _WORD.findall(normalize(text))))
+
+
+def query_terms(query, prefix=False):
+    """Слова запроса: [(основы частей слова, искать ли по началу)]
+
+    Номер вида 12345-67 - одно слово из двух частей (ищется как фраза).
+    prefix=True - последняя часть ищется по началу, без отрезания окончания.
+    """
+    terms = []
+    for word in normalize(query).split():
+        tokens = _WORD.findall(word)
+        if not tokens:
+            continue
+        is_prefix = prefix and len(tokens[-1]) >= MIN_PREFIX_CHARS
+        stems = [stem(token) for token in tokens[:-1]] + [tokens[-1] if is_prefix else stem(tokens[-1])]
+        terms.append((stems, is_prefix))
+    return terms
+
+
+def build_query(terms):
+    """Слова запроса -> выражение FTS5 (все слова должны встретиться)
+
+    Каждое слово превращается в фразу из его частей в кавычках, поэтому
+    знаки препинания и операторы FTS5 в запросе ничего не ломают.
+    """
+    return " AND ".join('"' + " ".join(tokens) + '"' + (" *" if is_prefix else "")
+                        for tokens, is_prefix in terms)
+
+
+def highlight_pattern(terms):
+    """Регулярное выражение для исходного текста: слова, начинающиеся с основ запроса
+
+    Числа (номера) выделяются только целиком.
+    """
+    parts = []
+    for tokens, _ in terms:
+        body = r"[\W_]+".join(re.escape(token) + (r"(?!\w)" if token.isdigit() else r"\w*")
+                              for token in tokens)
+        parts.append(rf"(?<!\w)({body})")
+    return re.compile("|".join(parts), re.IGNORECASE)
+
+
+def make_snippet(text, pattern, width=SNIPPET_CHARS):
+    """Фрагмент текста шириной ~width с наибольшим числом разных слов запроса
+
+    Найденные слова выделяются [квадратными скобками]; если в тексте слов
+    нет (совпало только имя файла) - начало текста. Слова ищутся в тексте
+    с "ё", замененной на "е" (как в индексе), а фрагмент вырезается из
+    исходного текста: замена не меняет длину, поэтому позиции совпадают.
+    """
+    folded = without_yo(text)
+    # Скользящее окно по совпадениям: сколько разных слов запроса в нем
+    window = []
+    counts = {}
+    best = 0
+    start = None
+    for number, match in enumerate(pattern.finditer(folded)):
+        if number >= SNIPPET_MATCHES:
+            break
+        window.append((match.start(), match.lastindex))
+        counts[match.lastindex] = counts.get(match.lastindex, 0) + 1
+        while len(window) > 1 and match.end() - window[0][0] > width:
+            _, term = window.pop(0)
+            counts[term] -= 1
+            if not counts[term]:
+                del counts[term]
+        if len(counts) > best:
+            best, start = len(counts), window[0][0]
+            if best == pattern.groups:
+                break
+
+    if start is None:
+        start = end = 0
+    else:
+        end = start
+        # Немного текста перед первым словом, с начала слова
+        start = max(0, start - width // 4)
+        while 0 < start < len(text) and not text[start - 1].isspace():
+            start += 1
+
+    end = min(len(text), end + width)
+    while end < len(text) and not text[end].isspace():
+        end += 1
+    parts = []
+    position = start
+    for match in pattern.finditer(folded[start:end]):
+        parts.append(text[position:start + match.start()])
+        parts.append(f"[{text[start + match.start():start + match.end()]}]")
+        position = start + match.end()
+    parts.append(text[position:end])
+    fragment = " ".join("".join(parts).split())
+    return ("…" if start > 0 else "") + fragment + ("…" if end < len(text) else "")
+
+
+class SearchIndex:
+    """Индекс документов: таблица documents (путь, сжатый текст) + FTS5-таблица texts с тем же rowid"""
+
+    def __init__(self, db_path=DEFAULT_INDEX_PATH, commit_every=DEFAULT_COMMIT_EVERY):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL UNIQUE,
+                folder TEXT NOT NULL,
+                name TEXT NOT NULL,
+                text_sha256 TEXT,
+                size INTEGER NOT NULL,
+                indexed REAL NOT NULL,
+                text BLOB NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS texts USING fts5(
+                name, body,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            );
+        """)
+        self.conn.commit()
+
+    def close(self):
+        """Записать несохраненное и закрыть базу"""
+        self.flush()
+        self.conn.close()
+
+    def flush(self):
+        """Зафиксировать добавленные документы (после этого их видит поиск)"""
+        if self._uncommitted:
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def _changed(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.flush()
+
+    def add(self, source, folder, name, text, text_sha256=None):
+        """Добавить или заменить документ; False - тот же текст уже в индексе"""
+        source = os.path.abspath(source)
+        row = self.conn.execute(
+            "SELECT id, text_sha256 FROM documents WHERE source = ?", (source,)
+        ).fetchone()
+        if row is not None and text_sha256 is not None and row[1] == text_sha256:
+            return False
+        if row is not None:
+            self.conn.execute("DELETE FROM texts WHERE rowid = ?", (row[0],))
+            self.conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+        cursor = self.conn.execute(
+            "INSERT INTO documents (source, folder, name, text_sha256, size, indexed, text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (source, os.path.abspath(folder), name, text_sha256, len(text), time.time(),
+             zlib.compress(text.encode('utf-8'), 1))
+        )
+        self.conn.execute(
+            "INSERT INTO texts (rowid, name, body) VALUES (?, ?, ?)",
+            (cursor.lastrowid, index_form(name), index_form(text))
+        )
+        self._changed()
+        return True
+
+    def add_folder(self, folder):
+        """Проиндексировать папку результатов документа (manifest.json + text/text.txt)
+
+        Возвращает True, если документ добавлен или обновлен. Папка без
+        выгруженного текста - ValueError.
+        """
+        with open(os.path.join(folder, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        artifact = next((a for a in manifest.get("artifacts", []) if a["path"] == TEXT_ARTIFACT), None)
+        if artifact is None:
+            raise ValueError("в папке нет выгруженного текста (text/text.txt)")
+
+        source = manifest.get("source") or folder
+        name = manifest.get("document") or os.path.basename(source)
+        row = self.conn.execute(
+            "SELECT text_sha256 FROM documents WHERE source = ?", (os.path.abspath(source),)
+        ).fetchone()
+        if row is not None and row[0] == artifact.get("sha256"):
+            return False
+
+        with open(os.path.join(folder, *TEXT_ARTIFACT.split("/")), 'rb') as f:
+            text = f.read(MAX_TEXT_BYTES).decode('utf-8', errors='replace')
+        return self.add(source, folder, name, text, artifact.get("sha256"))
+
+    def add_result(self, result):
+        """Добавить результат анализа, если его текст выгружен в папку; иначе False"""
+        folder = result.get("output_folder")
+        if result.get("status") != "success" or not folder:
+            return False
+        return self.add_folder(folder)
+
+    def remove(self, source):
+        """Удалить документ по пути исходного файла; False - его не было"""
+        row = self.conn.execute(
+            "SELECT id FROM documents WHERE source = ?", (os.path.abspath(source),)
+        ).fetchone()
+        if row is None:
+            return False
+        self.conn.execute("DELETE FROM texts WHERE rowid = ?", (row[0],))
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+        self._changed()
+        return True
+
+    def prune(self):
+        """Удалить документы, исходного файла или папки результатов которых больше нет"""
+        gone = [(doc_id,) for doc_id, source, folder
+                in self.conn.execute("SELECT id, source, folder FROM documents").fetchall()
+                if not os.path.exists(source)
+                or not os.path.isfile(os.path.join(folder, MANIFEST_NAME))]
+        self.conn.executemany("DELETE FROM texts WHERE rowid = ?", gone)
+        self.conn.executemany("DELETE FROM documents WHERE id = ?", gone)
+        self.conn.commit()
+        self._uncommitted = 0
+        return len(gone)
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT, prefix=False, max_ranked=None):
+        """Найденные документы по убыванию релевантности (BM25, имя файла весомее текста)
+
+        Возвращает {"matches": всего совпадений, "ranked": сколько из них
+        ранжировано, "truncated": ranked < matches, "hits": [...]}. Каждый
+        hit: source, folder, name, score и snippet - фрагмент текста, где
+        найденные слова выделены [квадратными скобками].
+        prefix=True - слова ищутся по началу (спектро -> спектрометр).
+        max_ranked - ранжировать не больше стольких последних
+        проиндексированных совпадений (по умолчанию - все).
+        """
+        terms = query_terms(query, prefix)
+        if not terms:
+            return {"matches": 0, "ranked": 0, "truncated": False, "hits": []}
+        match = build_query(terms)
+        matches = self.conn.execute("SELECT count(*) FROM texts WHERE texts MATCH ?", (match,)).fetchone()[0]
+
+        if max_ranked is not None and matches > max_ranked:
+            # Вложенный запрос отдает совпадения от новых к старым (по rowid) -
+            # BM25 считается только для них
+            ranked = max_ranked
+            rows = self.conn.execute(
+                "SELECT rowid, score FROM ("
+                "    SELECT rowid, bm25(texts, 5.0, 1.0) AS score FROM texts "
+                "    WHERE texts MATCH ? ORDER BY rowid DESC LIMIT ?"
+                ") ORDER BY score LIMIT ?",
+                (match, max_ranked, limit)
+            ).fetchall()
+        else:
+            ranked = matches
+            rows = self.conn.execute(
+                "SELECT rowid, bm25(texts, 5.0, 1.0) AS score FROM texts "
+                "WHERE texts MATCH ? ORDER BY score LIMIT ?",
+                (match, limit)
+            ).fetchall()
+
+        pattern = highlight_pattern(terms)
+        hits = []
+        for doc_id, score in rows:
+            source, folder, name, text = self.conn.execute(
+                "SELECT source, folder, name, text FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone()
+            body = zlib.decompress(text).decode('utf-8')
+            hits.append({
+                "source": source,
+                "folder": folder,
+                "name": name,
+                # bm25 в SQLite отрицательный: чем меньше, тем лучше
+                "score": round(-score, 6),
+                "snippet": make_snippet(body, pattern)
+            })
+        return {"matches": matches, "ranked": ranked, "truncated": ranked < matches, "hits": hits}
+
+    def count(self):
+        """Сколько документов в индексе"""
+        return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def optimize(self):
+        """Слить сегменты FTS5 после массовой загрузки (поиск становится быстрее)"""
+        self.flush()
+        self.conn.execute("INSERT INTO texts (texts) VALUES ('optimize')")
+        self.conn.commit()
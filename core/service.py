@@ -0,0 +1,345 @@
+# core/service.py
+"""Постоянно работающий локальный сервис анализа (asyncio, HTTP)
+
+Каждый запуск analyzer платит за старт Python и импорт python-docx/PyPDF2.
+Сервис запускается один раз: воркеры пула при старте загружают плагины и
+тяжелые библиотеки и дальше только анализируют.
+
+Протокол - HTTP/1.1 на 127.0.0.1 или на Unix-сокете (соединения keep-alive):
+
+    GET  /health   - состояние: воркеры, файлов в работе и в очереди
+    POST /analyze  - {"files": [...], "level": "metadata"|"standard"|"full", ...}
+    POST /extract  - то же с level="full": результат содержит весь текст
+
+Ответ на /analyze и /extract - NDJSON по частям (chunked): строка с
+результатом уходит клиенту, как только готов очередной файл, в порядке
+готовности. Настройки анализа - те же, что у analyzer batch
+(ANALYSIS_OPTIONS), для каждого запроса свои.
+
+Нагрузка ограничена двумя числами: max_concurrency - сколько файлов
+анализируется одновременно, queue_depth - сколько файлов может ждать
+своей очереди. Запрос, который не помещается в очередь, сразу получает
+503 с Retry-After, а не висит неограниченно.
+
+Сервис читает и пишет файлы по путям из запроса, поэтому по умолчанию
+слушает только loopback (другой адрес - только с allow_remote), а пути
+файлов и output_dir должны лежать внутри разрешенных папок (roots, по
+умолчанию - текущая папка); иначе 403.
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core.batch import analyze_one, warm_up
+from core.defaults import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_QUEUE_DEPTH
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADER_LINES = 100
+
+# Настройки, которые клиент может передать в запросе (остальные отбрасываются)
+ANALYSIS_OPTIONS = ("level", "output_dir", "table_format", "formula_format", "engine",
+                    "chunk_tokens", "chunk_overlap", "memory_limit_mb", "profile")
+
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    """Ошибка запроса - уходит клиенту кодом и JSON с сообщением"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def is_loopback(host):
+    """Адрес доступен только с этой машины (localhost, 127.0.0.0/8, ::1)"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def inside_roots(path, roots):
+    """Лежит ли путь (после раскрытия ссылок) внутри одной из папок roots"""
+    real = os.path.normcase(os.path.realpath(path))
+    return any(real == root or real.startswith(root.rstrip(os.sep) + os.sep) for root in roots)
+
+
+def warm_worker():
+    """Инициализация воркера: плагины и тяжелые библиотеки - до первого запроса"""
+    # Обработчики сигналов цикла asyncio наследуются при fork - воркеру они не нужны
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    warm_up()
+    for module in ("PyPDF2", "lxml.etree", "docx"):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+async def read_request(reader):
+    """Прочитать HTTP-запрос: (метод, путь, заголовки, тело) или None при закрытии"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Неверная строка запроса")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(400, "Слишком много заголовков")
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HttpError(400, "Неверный Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Слишком большой запрос")
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], headers, body
+
+
+def response_head(status, headers):
+    """Строка статуса и заголовки ответа"""
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+
+class AnalysisService:
+    """Сервис: теплый пул процессов + ограничение одновременных и ожидающих файлов"""
+
+    def __init__(self, workers=None, max_concurrency=None, queue_depth=DEFAULT_QUEUE_DEPTH, roots=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.roots = [os.path.normcase(os.path.realpath(root)) for root in (roots or [os.getcwd()])]
+        self.max_concurrency = max_concurrency or self.workers
+        self.queue_depth = queue_depth
+        self.pool = None
+        self.semaphore = None
+        self.running = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self.started = time.time()
+
+    def start_pool(self):
+        """Запустить воркеры и дождаться, пока они прогреются"""
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker)
+        # Пул запускает процессы лениво - пустые задачи поднимают и прогревают все сразу
+        for future in [self.pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def health(self):
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "running": self.running,
+            "waiting": self.waiting,
+            "served": self.served,
+            "rejected": self.rejected,
+            "uptime": round(time.time() - self.started, 1)
+        }
+
+    def parse_job(self, path, body):
+        """Список файлов и настройки анализа из тела запроса"""
+        try:
+            job = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Тело запроса - не JSON")
+        if not isinstance(job, dict):
+            raise HttpError(400, "Ожидался JSON-объект")
+
+        files = job.get("files")
+        if files is None and "file" in job:
+            files = [job["file"]]
+        if not files or not isinstance(files, list) or not all(isinstance(f, str) for f in files):
+            raise HttpError(400, "Нужен список files (пути к файлам на этой машине)")
+
+        options = {key: job[key] for key in ANALYSIS_OPTIONS if job.get(key) is not None}
+        targets = list(files)
+        if "output_dir" in options:
+            targets.append(options["output_dir"])
+        for target in targets:
+            if not isinstance(target, str) or not inside_roots(target, self.roots):
+                raise HttpError(403, f"Путь вне разрешенных папок: {target}")
+        if path == "/extract":
+            options["level"] = "full"
+        if options.get("level") == "standard":
+            del options["level"]
+        # Весь пул занят разными файлами - один файл не должен делить страницы
+        # по процессам (и запрос не может обойти max_concurrency своими процессами)
+        options["text_workers"] = 1
+        return files, options
+
+    def _release(self, _future):
+        self.running -= 1
+        self.served += 1
+        self.semaphore.release()
+
+    async def analyze_file(self, path, options, job):
+        """Один файл: дождаться свободного места и отдать его пулу
+
+        job["waiting"] - сколько файлов запроса еще ждут очереди.
+        """
+        await self.semaphore.acquire()
+        job["waiting"] -= 1
+        self.waiting -= 1
+        self.running += 1
+        pool = self.pool
+        future = asyncio.get_running_loop().run_in_executor(pool, analyze_one, path, options)
+        # Место освобождается, когда воркер действительно закончил, даже если клиент ушел
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.shield(future)
+        except BrokenProcessPool as e:
+            # Воркер убит (например, ОС по памяти) - такой пул больше не работает
+            if pool is self.pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker)
+            return {"status": "error", "message": f"Воркер завершился с ошибкой: {str(e)}",
+                    "file": path}
+
+    async def stream_job(self, writer, files, options):
+        """Запустить файлы и отдавать результаты NDJSON-строками по мере готовности"""
+        if self.waiting + len(files) > self.queue_depth:
+            self.rejected += 1
+            raise HttpError(503, f"Очередь заполнена ({self.waiting} файлов ждут, "
+                                 f"лимит {self.queue_depth})")
+
+        job = {"waiting": len(files)}
+        self.waiting += len(files)
+        tasks = [asyncio.ensure_future(self.analyze_file(path, options, job)) for path in files]
+        try:
+            writer.write(response_head(200, {"Content-Type": "application/x-ndjson; charset=utf-8",
+                                             "Transfer-Encoding": "chunked"}))
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                line = (json.dumps(result, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+                writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            # Клиент ушел - файлы, которые еще ждут очереди, не запускаем
+            for task in tasks:
+                task.cancel()
+            self.waiting -= job["waiting"]
+            job["waiting"] = 0
+
+    async def handle(self, reader, writer):
+        """Соединение клиента: запросы один за другим (keep-alive)"""
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    if path == "/health":
+                        if method != "GET":
+                            raise HttpError(405, "Нужен GET")
+                        await self.send_json(writer, 200, self.health())
+                    elif path in ("/analyze", "/extract"):
+                        if method != "POST":
+                            raise HttpError(405, "Нужен POST")
+                        files, options = self.parse_job(path, body)
+                        await self.stream_job(writer, files, options)
+                    else:
+                        raise HttpError(404, "Нет такого адреса")
+                except HttpError as e:
+                    extra = {"Retry-After": "1"} if e.status == 503 else {}
+                    await self.send_json(writer, e.status, {"status": "error", "message": e.message},
+                                         extra)
+                    if e.status in (400, 413):
+                        break
+                    continue
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def send_json(writer, status, data, extra_headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        headers = {"Content-Type": "application/json; charset=utf-8",
+                   "Content-Length": str(len(body))}
+        headers.update(extra_headers or {})
+        writer.write(response_head(status, headers) + body)
+        await writer.drain()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, ready=None):
+        """Работать до Ctrl+C/SIGTERM; ready(адрес) вызывается, когда сервис готов"""
+        loop = asyncio.get_running_loop()
+        stopped = loop.create_future()
+        for name in ("SIGINT", "SIGTERM"):
+            try:
+                loop.add_signal_handler(getattr(signal, name),
+                                        lambda: stopped.done() or stopped.set_result(None))
+            except (NotImplementedError, AttributeError):
+                # Windows: остается Ctrl+C (KeyboardInterrupt в run_service)
+                pass
+
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        await loop.run_in_executor(None, self.start_pool)
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            address = socket_path
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            address = "http://%s:%d" % server.sockets[0].getsockname()[:2]
+        if ready is not None:
+            ready(address)
+        # Остановка - штатная, чтобы run_service закрыл пул и воркеры не остались сиротами
+        async with server:
+            await stopped
+
+
+def run_service(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, workers=None,
+                max_concurrency=None, queue_depth=DEFAULT_QUEUE_DEPTH, ready=None,
+                allow_remote=False, roots=None):
+    """Запустить сервис в этом процессе (до Ctrl+C)
+
+    Не-loopback адрес без allow_remote - ValueError: сервис без
+    авторизации не должен быть виден из сети случайно.
+    """
+    if not socket_path and not allow_remote and not is_loopback(host):
+        raise ValueError(f"Адрес {host} доступен из сети - нужен явный allow_remote")
+    service = AnalysisService(workers, max_concurrency, queue_depth, roots)
+    try:
+        asyncio.run(service.serve(host, port, socket_path, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+    return service
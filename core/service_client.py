@@ -0,0 +1,101 @@
+# core/service_client.py
+"""Клиент локального сервиса анализа (core.service) на http.client
+
+    client = ServiceClient("http://127.0.0.1:8765")   # или ServiceClient(socket_path=...)
+    for result in client.analyze(["отчет.pdf", "письмо.docx"], level="metadata"):
+        print(result["file"], result["status"])
+
+Результаты приходят по одному, по мере готовности файлов. Соединение
+держится открытым (keep-alive) и переиспользуется между запросами.
+"""
+
+import http.client
+import json
+import socket
+from urllib.parse import urlsplit
+
+
+class ServiceError(Exception):
+    """Сервис ответил ошибкой (status - HTTP-код, 503 - очередь заполнена)"""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    """HTTP поверх Unix-сокета"""
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    """Запросы к сервису: health, analyze, extract"""
+
+    def __init__(self, url="http://127.0.0.1:8765", socket_path=None, timeout=None):
+        if socket_path:
+            self.conn = _UnixConnection(socket_path, timeout=timeout)
+        else:
+            parts = urlsplit(url)
+            self.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            # Сервис закрыл простаивавшее соединение - повторяем на новом
+            self.conn.close()
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+        if response.status != 200:
+            data = response.read()
+            try:
+                message = json.loads(data).get("message", "")
+            except ValueError:
+                message = data.decode('utf-8', 'replace')
+            raise ServiceError(response.status, message)
+        return response
+
+    def health(self):
+        """Состояние сервиса (dict)"""
+        return json.loads(self._request("GET", "/health").read())
+
+    def analyze(self, files, **options):
+        """Результаты анализа файлов по мере готовности (генератор dict)
+
+        options - настройки анализа как у analyzer batch: level, output_dir,
+        table_format, formula_format, engine, chunk_tokens...
+        """
+        response = self._request("POST", "/analyze", dict(options, files=list(files)))
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+
+    def extract(self, files, **options):
+        """Полный текст файлов (level="full") по мере готовности"""
+        response = self._request("POST", "/extract", dict(options, files=list(files)))
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
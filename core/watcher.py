@@ -0,0 +1,422 @@
+# core/watcher.py
+"""Наблюдение за папками: новые DOCX/PDF анализируются сами по мере появления
+
+Источник событий - inotify (Linux, без сторонних библиотек через ctypes)
+или, где его нет, опрос папок через os.scandir. inotify не видит записей,
+сделанных другими машинами в сетевую папку (SMB/NFS), поэтому для
+сетевых папок нужен опрос (poll=True); при inotify папки вдобавок изредка
+пересматриваются целиком на случай потерянных событий.
+
+Файл берется в работу, только когда он "успокоился": размер и mtime не
+менялись settle секунд и файл открывается на чтение (сканер или
+копирование по сети его уже дописали). Готовые файлы уходят в общий пул
+процессов (core.batch) - в работе не больше workers * 4 файлов, остальные
+ждут в очереди, так что пачка из сотен файлов не раздувает память.
+
+Обработанные файлы (путь, размер, mtime, настройки) помнятся в SQLite
+в папке результатов - после перезапуска разбираются только новые и
+изменившиеся.
+"""
+
+import collections
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import sqlite3
+import struct
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from core.batch import RUNTIME_OPTIONS, analyze_one, get_pool, reset_pool, supported_extensions
+from core.defaults import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE
+
+STATE_NAME = ".watch_state.sqlite"
+# При inotify папки все равно пересматриваются раз в столько секунд
+DEFAULT_RESCAN_INTERVAL = 600.0
+
+# Временные файлы Word (~$отчет.docx) и недокачанные копии не трогаем
+IGNORED_PREFIXES = ("~$", ".~", ".")
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class ProcessedState:
+    """Какие файлы уже обработаны (SQLite, переживает перезапуск)"""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                scope TEXT NOT NULL,
+                status TEXT NOT NULL,
+                processed_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def is_current(self, path, st, scope):
+        """Файл в этом виде и с этими настройками уже обработан"""
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, scope FROM processed WHERE path = ?", (path,)
+        ).fetchone()
+        return row is not None and row == (st.st_size, st.st_mtime_ns, scope)
+
+    def mark(self, path, st, scope, status):
+        """Запомнить обработанный файл (и с ошибкой - чтобы не разбирать его по кругу)"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO processed (path, size, mtime_ns, scope, status, processed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, scope, status, time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def iter_files(folder, extensions):
+    """Все подходящие файлы папки и подпапок (os.scandir, stat берется из DirEntry)"""
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith(IGNORED_PREFIXES):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in extensions:
+                    yield entry
+            except OSError:
+                continue
+
+
+class PollingSource:
+    """Изменения по опросу: снимок (размер, mtime) всех файлов раз в interval секунд"""
+
+    def __init__(self, folders, extensions, interval=DEFAULT_POLL_INTERVAL):
+        self.folders = folders
+        self.extensions = extensions
+        self.interval = interval
+        self.snapshot = {}
+        self.next_scan = 0.0
+
+    def poll(self, timeout):
+        """Пути, которые появились или изменились с прошлого опроса"""
+        now = time.monotonic()
+        if now < self.next_scan:
+            time.sleep(min(timeout, self.next_scan - now))
+            return []
+        self.next_scan = time.monotonic() + self.interval
+
+        changed = []
+        snapshot = {}
+        for folder in self.folders:
+            for entry in iter_files(folder, self.extensions):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+                if self.snapshot.get(entry.path) != snapshot[entry.path]:
+                    changed.append(entry.path)
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifySource:
+    """Изменения от inotify: закрытие после записи и перемещение в папку
+
+    Новые подпапки берутся под наблюдение сразу при создании. При
+    переполнении очереди событий ядра и раз в rescan_interval секунд
+    папки пересматриваются целиком.
+    """
+
+    def __init__(self, folders, extensions, rescan_interval=DEFAULT_RESCAN_INTERVAL):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.folders = folders
+        self.extensions = extensions
+        self.rescan_interval = rescan_interval
+        self.watches = {}
+        self.next_rescan = 0.0
+
+    def _watch_tree(self, folder):
+        """Наблюдать за папкой и всеми ее подпапками"""
+        stack = [folder]
+        while stack:
+            current = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(current), _WATCH_MASK)
+            if wd < 0:
+                continue
+            self.watches[wd] = current
+            try:
+                for entry in os.scandir(current):
+                    if entry.is_dir(follow_symlinks=False) and not entry.name.startswith(IGNORED_PREFIXES):
+                        stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _rescan(self):
+        """Полный пересмотр: новые папки под наблюдение, все файлы - в кандидаты"""
+        self.next_rescan = time.monotonic() + self.rescan_interval
+        for folder in self.folders:
+            self._watch_tree(folder)
+        return [entry.path for folder in self.folders for entry in iter_files(folder, self.extensions)]
+
+    def poll(self, timeout):
+        """Пути из событий inotify за время ожидания (не дольше timeout)"""
+        if time.monotonic() >= self.next_rescan:
+            return self._rescan()
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                # Ядро потеряло события - надежнее пересмотреть все
+                return self._rescan()
+            folder = self.watches.get(wd)
+            if folder is None or not name or name.startswith(IGNORED_PREFIXES):
+                continue
+            path = os.path.join(folder, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # Папку могли создать уже с файлами - их событий не будет
+                    self._watch_tree(path)
+                    paths.extend(entry.path for entry in iter_files(path, self.extensions))
+            elif os.path.splitext(name)[1].lower() in self.extensions:
+                paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_source(folders, extensions, poll=False, interval=DEFAULT_POLL_INTERVAL):
+    """inotify, если он есть и не просили опрос, иначе опрос папок"""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifySource(folders, extensions)
+        except (OSError, AttributeError):
+            pass
+    return PollingSource(folders, extensions, interval)
+
+
+def _readable(path):
+    """Открывается ли файл на чтение (в Windows файл, в который еще пишут, заблокирован)"""
+    try:
+        with open(path, 'rb'):
+            return True
+    except OSError:
+        return False
+
+
+class Watcher:
+    """Очередь "успокоившихся" файлов в пул процессов с учетом обработанного
+
+    on_result(результат) вызывается для каждого обработанного файла,
+    on_tick() - на каждом проходе цикла (не реже раза в секунду), в том
+    числе когда файлов нет: например, чтобы дописать журнал метрик.
+    """
+
+    def __init__(self, folders, output_dir, options=None, workers=None, settle=DEFAULT_SETTLE,
+                 poll=False, interval=DEFAULT_POLL_INTERVAL, state_path=None,
+                 on_result=None, on_tick=None):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.output_dir = os.path.abspath(output_dir)
+        self.options = dict(options or {}, output_dir=self.output_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.settle = settle
+        self.on_result = on_result
+        self.on_tick = on_tick
+
+        self.extensions = supported_extensions()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.state = ProcessedState(state_path or os.path.join(self.output_dir, STATE_NAME))
+        self.scope = json.dumps({key: value for key, value in self.options.items()
+                                 if key not in RUNTIME_OPTIONS},
+                                sort_keys=True, ensure_ascii=False, default=str)
+        self.source = open_source(self.folders, self.extensions, poll, interval)
+
+        self.pending = {}              # путь -> (размер, mtime, когда последний раз менялся)
+        self.queue = collections.deque()
+        self.queued = set()
+        self.in_flight = {}            # Future -> (путь, stat на момент постановки)
+        self.suspects = set()          # были в работе, когда упал воркер; идут по одному
+        self.processed = 0
+
+    def _skip(self, path):
+        # Папка результатов может лежать внутри наблюдаемой - ее файлы не анализируем
+        if path.startswith(self.output_dir + os.sep):
+            return True
+        # Уже в очереди или в работе; изменения за это время заметит collect
+        return path in self.queued
+
+    def observe(self, path):
+        """Файл появился или изменился: ждать, пока он успокоится"""
+        path = os.path.abspath(path)
+        if self._skip(path):
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        if self.state.is_current(path, st, self.scope):
+            return
+        signature = (st.st_size, st.st_mtime_ns)
+        old = self.pending.get(path)
+        if old is None or old[:2] != signature:
+            self.pending[path] = signature + (time.monotonic(),)
+
+    def promote(self):
+        """Перенести в очередь файлы, которые не менялись settle секунд"""
+        now = time.monotonic()
+        for path, (size, mtime_ns, changed_at) in list(self.pending.items()):
+            if now - changed_at < self.settle:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns) or st.st_size == 0 \
+                    or not _readable(path):
+                # Еще пишется (пустой файл - сканер только создал его)
+                self.pending[path] = (st.st_size, st.st_mtime_ns, now)
+                continue
+            del self.pending[path]
+            self.queue.append(path)
+            self.queued.add(path)
+
+    def submit(self, pool):
+        """Отправить файлы из очереди в пул, пока в работе меньше workers * 4
+
+        Подозреваемый в падении воркера файл анализируется один: если пул
+        упадет снова, виноват именно он.
+        """
+        while self.queue and len(self.in_flight) < self.workers * 4:
+            if self.in_flight and (self.queue[0] in self.suspects
+                                   or any(path in self.suspects for path, _ in self.in_flight.values())):
+                break
+            path = self.queue.popleft()
+            try:
+                st = os.stat(path)
+            except OSError:
+                self.queued.discard(path)
+                continue
+            self.in_flight[pool.submit(analyze_one, path, self.options)] = (path, st)
+
+    def collect(self, timeout):
+        """Забрать готовые результаты; возвращает False, если пул пришлось пересоздать
+
+        Падение воркера (BrokenProcessPool) обрывает все файлы в работе, а
+        виновника по исключению не узнать. Ошибка записывается, только если
+        файл был в работе один; остальные возвращаются в очередь
+        подозреваемыми и анализируются по одному в новом пуле.
+        """
+        if not self.in_flight:
+            return True
+        done, _ = wait(self.in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+        alone = len(self.in_flight) == 1
+        healthy = True
+        for future in done:
+            path, st = self.in_flight.pop(future)
+            self.queued.discard(path)
+            try:
+                result = future.result()
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    healthy = False
+                    if not alone:
+                        self._requeue(path)
+                        continue
+                result = {
+                    "status": "error",
+                    "message": f"Воркер завершился с ошибкой: {str(e)}",
+                    "file": path
+                }
+            self.suspects.discard(path)
+            self.state.mark(path, st, self.scope, result.get("status", "error"))
+            self.processed += 1
+            if self.on_result is not None:
+                self.on_result(result)
+            # Файл переписали, пока он анализировался, - разобрать еще раз
+            self.observe(path)
+        if not healthy:
+            # Остальные задачи упавшего пула тоже не выполнятся
+            for future, (path, _) in list(self.in_flight.items()):
+                future.cancel()
+                del self.in_flight[future]
+                self.queued.discard(path)
+                self._requeue(path)
+        return healthy
+
+    def _requeue(self, path):
+        """Вернуть файл в очередь без отметки в состоянии"""
+        self.suspects.add(path)
+        self.observe(path)
+
+    def run(self, stop_event):
+        """Работать до stop_event (threading.Event); запущенные файлы дорабатываются"""
+        pool = get_pool(self.workers)
+        try:
+            while not stop_event.is_set():
+                # Пока что-то в работе или ждет - просыпаемся чаще
+                timeout = 0.2 if (self.in_flight or self.pending) else 1.0
+                for path in self.source.poll(0 if self.in_flight else timeout):
+                    self.observe(path)
+                self.promote()
+                self.submit(pool)
+                if not self.collect(timeout if self.in_flight else 0):
+                    # Воркер упал целиком - такой пул больше не работает
+                    reset_pool()
+                    pool = get_pool(self.workers)
+                if self.on_tick is not None:
+                    self.on_tick()
+            while self.in_flight:
+                if not self.collect(1.0):
+                    break
+        finally:
+            self.source.close()
+            self.state.close()
@@ -1,9 +1,218 @@
 #!/usr/bin/env python3
 """
 МЕНЕДЖЕР КОДИРОВОК - гарантированная работа с UTF-8
+
+Кодировка определяется за одно чтение файла кусками: сначала BOM, потом
+проверка UTF-8 инкрементальным декодером, а если файл не UTF-8 - выбор
+между cp1251 и cp866 по частотам байтов (какая кодировка дает больше
+обычных русских букв). check/fix принимают и папку: все текстовые файлы
+в ней проверяются параллельно, итог - JSON-отчет.
 """
+import argparse
+import codecs
+import json
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024
+# Для выбора cp1251/cp866 хватает первых нескольких мегабайт старших байтов
+HISTOGRAM_SAMPLE = 4 * 1024 * 1024
+
+# BOM -> кодировка (UTF-8 с BOM читается как utf-8-sig, при исправлении BOM убирается)
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+SINGLE_BYTE_ENCODINGS = ('cp1251', 'cp866')
+
+RUSSIAN = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+
+# Частота русских букв в обычном тексте (на тысячу букв)
+_LETTER_FREQUENCY = {
+    'о': 110, 'е': 85, 'а': 80, 'и': 74, 'н': 67, 'т': 63, 'с': 55, 'р': 47, 'в': 45,
+    'л': 44, 'к': 35, 'м': 32, 'д': 30, 'п': 28, 'у': 26, 'я': 20, 'ы': 19, 'ь': 17,
+    'г': 17, 'з': 16, 'б': 16, 'ч': 14, 'й': 12, 'х': 10, 'ж': 9, 'ш': 7, 'ю': 6,
+    'ц': 5, 'щ': 4, 'э': 3, 'ф': 3, 'ъ': 1, 'ё': 1
+}
+
+# Байты ASCII - из куска их выбрасываем, считаем только старшую половину
+_ASCII = bytes(range(0x80))
+
+# Папка целиком: какие файлы считаются текстовыми
+TEXT_EXTENSIONS = ('.txt', '.md', '.py', '.json', '.csv', '.tsv', '.ini', '.cfg', '.log',
+                   '.xml', '.html', '.htm', '.bat', '.cmd', '.ps1', '.sh', '.sql', '.yml', '.yaml')
+SKIPPED_DIRS = ('.git', '.idea', '.venv', 'venv', '__pycache__', 'node_modules')
+
+
+def _byte_weights(encoding):
+    """Вес каждого старшего байта в кодировке: частота буквы, в которую он превращается
+
+    Заглавные весят вдвое меньше строчных; байты, которых в кодировке
+    нет, - None (файл с таким байтом не может быть в этой кодировке).
+    """
+    weights = {}
+    for value in range(0x80, 0x100):
+        try:
+            char = bytes([value]).decode(encoding)
+        except UnicodeDecodeError:
+            weights[value] = None
+            continue
+        if char in _LETTER_FREQUENCY:
+            weights[value] = _LETTER_FREQUENCY[char]
+        elif char.lower() in _LETTER_FREQUENCY:
+            weights[value] = _LETTER_FREQUENCY[char.lower()] / 2
+        else:
+            weights[value] = 0
+    return weights
+
+
+_WEIGHTS = {encoding: _byte_weights(encoding) for encoding in SINGLE_BYTE_ENCODINGS}
+
+
+def _single_byte_encoding(histogram):
+    """cp1251 или cp866 по частотам старших байтов: (кодировка, есть ли русские буквы)"""
+    best, best_score = None, None
+    for encoding in SINGLE_BYTE_ENCODINGS:
+        weights = _WEIGHTS[encoding]
+        if any(weights[value] is None for value in histogram):
+            continue
+        score = sum(weights[value] * count for value, count in histogram.items())
+        if best_score is None or score > best_score:
+            best, best_score = encoding, score
+    return best, bool(best_score)
+
+
+def detect_chunks(chunks, keep_text=False):
+    """Определить кодировку по кускам байтов за один проход
+
+    Пока куски проходят проверку декодером UTF-8 (или UTF-16 при BOM),
+    в них же ищутся русские буквы. С куска, на котором проверка не прошла,
+    копится гистограмма старших байтов (первые HISTOGRAM_SAMPLE) - по ней
+    выбирается cp1251 или cp866. keep_text=True сохраняет декодированный
+    текст (если файл в UTF), чтобы не декодировать его второй раз.
+
+    Возвращает dict: encoding (None - двоичный или неизвестный файл), bom,
+    chars, russian, size; ключ text - только при keep_text=True.
+    """
+    encoding = None
+    decoder = None
+    valid = True
+    bom = False
+    russian = False
+    chars = 0
+    size = 0
+    zeros = 0
+    parts = [] if keep_text else None
+    histogram = {}
+    sampled = 0
+
+    for chunk in chunks:
+        if decoder is None:
+            encoding = 'utf-8'
+            for mark, name in BOMS:
+                if chunk.startswith(mark):
+                    encoding, bom = name, True
+                    break
+            decoder = codecs.getincrementaldecoder(encoding)()
+        size += len(chunk)
+
+        if valid:
+            try:
+                text = decoder.decode(chunk)
+            except UnicodeDecodeError:
+                valid = False
+                parts = None
+            else:
+                chars += len(text)
+                # isascii() для str ничего не сканирует, поиск буквы - memchr
+                if not russian and not text.isascii():
+                    russian = any(ch in text for ch in RUSSIAN)
+                if parts is not None:
+                    parts.append(text)
+
+        if encoding != 'utf-16':
+            zeros += chunk.count(0)
+            if not valid and sampled < HISTOGRAM_SAMPLE:
+                high = chunk.translate(None, _ASCII)
+                sampled += len(high)
+                for value in set(high):
+                    histogram[value] = histogram.get(value, 0) + high.count(value)
+
+    if decoder is None:
+        # Пустой файл
+        info = {"encoding": "utf-8", "bom": False, "chars": 0, "russian": False, "size": 0}
+        if keep_text:
+            info["text"] = ""
+        return info
+
+    if valid:
+        try:
+            tail = decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            valid = False
+        else:
+            chars += len(tail)
+            if parts is not None:
+                parts.append(tail)
+
+    if valid:
+        if encoding == 'utf-8' and zeros:
+            encoding = None
+    elif zeros or encoding == 'utf-16':
+        # Нули в тексте или битый UTF-16 - не однобайтовая кодировка
+        encoding = None
+    else:
+        encoding, russian = _single_byte_encoding(histogram)
+        bom = False
+        chars = size
+
+    info = {
+        "encoding": encoding,
+        "bom": bom,
+        "chars": chars if encoding else 0,
+        "russian": russian if encoding else False,
+        "size": size
+    }
+    if keep_text:
+        # None - текст не UTF, его декодирует вызывающий по найденной кодировке
+        info["text"] = "".join(parts) if valid else None
+    return info
+
+
+def _read_chunks(f, chunk_size=CHUNK_SIZE):
+    """Файл кусками по chunk_size байт"""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _process_path(job):
+    """Проверка (и исправление) одного файла папки - выполняется в процессе-воркере"""
+    filepath, fix = job
+    started = time.perf_counter()
+    result = {"file": filepath}
+    try:
+        if fix:
+            content, info = EncodingManager.decode_file(filepath)
+        else:
+            info = EncodingManager.detect(filepath)
+        result.update({key: info[key] for key in ("encoding", "bom", "chars", "russian", "size")})
+        if info["encoding"] is None:
+            result["status"] = "unknown"
+        elif fix and (info["encoding"] != 'utf-8'):
+            EncodingManager.write_utf8(filepath, content)
+            result["status"] = "fixed"
+        else:
+            result["status"] = "ok"
+    except Exception as e:
+        result.update({"status": "error", "message": str(e)})
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
 
 
 class EncodingManager:
@@ -24,6 +233,32 @@ class EncodingManager:
             print(f'❌ Ошибка: {e}')
             return False
 
+    @staticmethod
+    def detect(filepath):
+        """Кодировка файла без чтения его целиком в память (см. detect_chunks)"""
+        with open(filepath, 'rb') as f:
+            return detect_chunks(_read_chunks(f))
+
+    @staticmethod
+    def decode_file(filepath):
+        """Прочитать файл один раз и декодировать: (текст или None, сведения о кодировке)"""
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        info = detect_chunks((data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)),
+                             keep_text=True)
+        content = info.pop("text")
+        if content is None and info["encoding"] is not None:
+            content = data.decode(info["encoding"])
+        return content, info
+
+    @staticmethod
+    def write_utf8(filepath, content):
+        """Записать текст как чистый UTF-8 через временный файл"""
+        temp_path = filepath + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        os.replace(temp_path, filepath)
+
     @staticmethod
     def read_file(filepath):
         """Прочитать файл с правильной кодировкой"""
@@ -31,23 +266,18 @@ class EncodingManager:
             print(f'❌ Файл не найден: {filepath}')
             return None
 
-        # Пробуем разные кодировки
-        encodings = ['utf-8', 'utf-8-sig', 'cp1251', 'cp866']
+        try:
+            content, info = EncodingManager.decode_file(filepath)
+        except Exception as e:
+            print(f'❌ Ошибка чтения: {e}')
+            return None
 
-        for encoding in encodings:
-            try:
-                with open(filepath, 'r', encoding=encoding) as f:
-                    content = f.read()
-                print(f'✅ Прочитан: {filepath} (кодировка: {encoding})')
-                return content
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                print(f'❌ Ошибка чтения: {e}')
-                return None
+        if content is None:
+            print(f'❌ Не удалось определить кодировку: {filepath}')
+            return None
 
-        print(f'❌ Не удалось определить кодировку: {filepath}')
-        return None
+        print(f'✅ Прочитан: {filepath} (кодировка: {info["encoding"]})')
+        return content
 
     @staticmethod
     def check_file(filepath):
@@ -56,21 +286,24 @@ class EncodingManager:
             print(f'❌ Файл не найден: {filepath}')
             return None
 
-        content = EncodingManager.read_file(filepath)
-        if content:
-            # Простая проверка на русский текст
-            russian = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
-            has_russian = any(ch in content for ch in russian)
+        try:
+            info = EncodingManager.detect(filepath)
+        except Exception as e:
+            print(f'❌ Ошибка чтения: {e}')
+            return False
 
-            if has_russian:
-                print(f'   Содержит русский текст: ДА')
-            else:
-                print(f'   Содержит русский текст: НЕТ')
+        if info["encoding"] is None:
+            print(f'❌ Не удалось определить кодировку: {filepath}')
+            return False
 
-            print(f'   Длина: {len(content)} символов')
-            return True
+        print(f'✅ Прочитан: {filepath} (кодировка: {info["encoding"]})')
+        if info["russian"]:
+            print(f'   Содержит русский текст: ДА')
+        else:
+            print(f'   Содержит русский текст: НЕТ')
 
-        return False
+        print(f'   Длина: {info["chars"]} символов')
+        return info["chars"] > 0
 
     @staticmethod
     def fix_file(filepath):
@@ -85,53 +318,134 @@ class EncodingManager:
 
         try:
             # Сохраняем как чистый UTF-8
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
+            EncodingManager.write_utf8(filepath, content)
             print(f'✅ Исправлен: {filepath} → UTF-8')
             return True
         except Exception as e:
             print(f'❌ Ошибка записи: {e}')
             return False
 
+    @staticmethod
+    def find_text_files(folder, extensions=TEXT_EXTENSIONS):
+        """Текстовые файлы папки и всех подпапок (служебные папки пропускаются)"""
+        files = []
+        for root, dirs, names in os.walk(folder):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+            for name in sorted(names):
+                if os.path.splitext(name)[1].lower() in extensions:
+                    files.append(os.path.join(root, name))
+        return files
+
+    @staticmethod
+    def check_folder(folder, fix=False, workers=None, extensions=TEXT_EXTENSIONS):
+        """Проверить (fix=True - и привести к UTF-8) все текстовые файлы папки параллельно
+
+        Возвращает отчет: сводку по кодировкам и результат каждого файла.
+        """
+        started = time.perf_counter()
+        files = EncodingManager.find_text_files(folder, extensions)
+        workers = workers or os.cpu_count() or 1
+        jobs = [(path, fix) for path in files]
+        if workers == 1 or len(files) < 2:
+            results = [_process_path(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, min(64, len(jobs) // (workers * 4)))
+                results = list(pool.map(_process_path, jobs, chunksize=chunksize))
+
+        encodings = {}
+        statuses = {}
+        for result in results:
+            encoding = result.get("encoding") or "unknown"
+            encodings[encoding] = encodings.get(encoding, 0) + 1
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+
+        return {
+            "folder": os.path.abspath(folder),
+            "mode": "fix" if fix else "check",
+            "files": len(results),
+            "encodings": encodings,
+            "statuses": statuses,
+            "seconds": round(time.perf_counter() - started, 3),
+            "results": results
+        }
+
+
+def run_folder(folder, fix, workers, report_path):
+    """check/fix для папки: сводка в консоль, полный отчет - в JSON"""
+    report = EncodingManager.check_folder(folder, fix=fix, workers=workers)
+    # Отчет в консоль - сводка уходит в stderr, чтобы stdout оставался чистым JSON
+    out = sys.stderr if report_path == '-' else sys.stdout
+    for result in report["results"]:
+        if result["status"] in ("fixed", "unknown", "error"):
+            mark = {"fixed": "✅ Исправлен", "unknown": "❓ Неизвестная кодировка",
+                    "error": "❌ Ошибка"}[result["status"]]
+            extra = f" ({result['encoding']} → UTF-8)" if result["status"] == "fixed" else ""
+            extra += f": {result['message']}" if result.get("message") else ""
+            print(f'{mark}: {result["file"]}{extra}', file=out)
+
+    summary = ", ".join(f"{name} - {count}" for name, count in sorted(report["encodings"].items()))
+    print(f'📊 Файлов: {report["files"]} за {report["seconds"]} с; кодировки: {summary or "нет"}',
+          file=out)
+
+    if report_path == '-':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'💾 Отчет: {report_path}')
+    return 0 if not report["statuses"].get("error") else 1
+
+
+def build_parser():
+    """Описание команд и аргументов"""
+    parser = argparse.ArgumentParser(prog="encoding_manager_fixed.py",
+                                     description="Менеджер кодировок - все в UTF-8")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="создать файл в UTF-8")
+    create.add_argument("file")
+    create.add_argument("text", nargs="+", help="текст (все слова после имени файла)")
+
+    read = commands.add_parser("read", help="прочитать файл в любой кодировке")
+    read.add_argument("file")
+
+    for name, help_text in (("check", "определить кодировку файла или всех файлов папки"),
+                            ("fix", "привести файл или все файлы папки к UTF-8")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path", help="файл или папка (обходится с подпапками)")
+        command.add_argument("-w", "--workers", type=int, default=None,
+                             help="процессов для папки (по умолчанию - по числу ядер)")
+        command.add_argument("--report", default=None,
+                             help="JSON-отчет для папки ('-' - вывод в консоль)")
+    return parser
 
-def main():
-    if len(sys.argv) < 2:
-        print('Использование:')
-        print('  python encoding_manager.py create <файл> "текст"')
-        print('  python encoding_manager.py read <файл>')
-        print('  python encoding_manager.py check <файл>')
-        print('  python encoding_manager.py fix <файл>')
-        return
 
+def main(argv=None):
+    args = build_parser().parse_args(argv)
     manager = EncodingManager()
-    cmd = sys.argv[1]
 
-    if cmd == 'create' and len(sys.argv) >= 4:
+    if args.command == 'create':
         # Объединяем все аргументы после имени файла
-        text = ' '.join(sys.argv[3:])
-        manager.create_file(sys.argv[2], text)
+        manager.create_file(args.file, ' '.join(args.text))
 
-    elif cmd == 'read' and len(sys.argv) == 3:
-        content = manager.read_file(sys.argv[2])
+    elif args.command == 'read':
+        content = manager.read_file(args.file)
         if content:
             print('\n=== СОДЕРЖИМОЕ ФАЙЛА ===')
             print(content)
             print('=' * 30)
 
-    elif cmd == 'check' and len(sys.argv) == 3:
-        manager.check_file(sys.argv[2])
+    elif os.path.isdir(args.path):
+        return run_folder(args.path, args.command == 'fix', args.workers, args.report)
 
-    elif cmd == 'fix' and len(sys.argv) == 3:
-        manager.fix_file(sys.argv[2])
+    elif args.command == 'check':
+        manager.check_file(args.path)
 
     else:
-        print('❌ Неверные аргументы')
-        print('Примеры:')
-        print('  python encoding_manager.py create test.txt "Привет мир"')
-        print('  python encoding_manager.py read test.txt')
-        print('  python encoding_manager.py check test.txt')
-        print('  python encoding_manager.py fix test.txt')
+        manager.fix_file(args.path)
+    return 0
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
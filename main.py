@@ -2,16 +2,79 @@ import sys
 import os
 import json
 import datetime
+import threading
 
 # Добавляем папку проекта в путь поиска модулей
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
+# С аргументами (python main.py batch ... / --help) - консольный режим analyzer:
+# Qt для него не нужен, и его импорт стоил бы заметной части запуска
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from analyzer import main as cli_main
+    sys.exit(cli_main())
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton,
                              QVBoxLayout, QWidget, QFileDialog, QLabel,
-                             QMessageBox)
-from PyQt5.QtCore import Qt
+                             QMessageBox, QProgressBar)
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class AnalysisSignals(QObject):
+    """Сигналы фоновой задачи анализа (доставляются в поток интерфейса)"""
+
+    file_done = pyqtSignal(int, int, object)  # готово, всего, результат файла
+    finished = pyqtSignal(object, bool)     # все результаты, была ли отмена
+
+
+class UpdateSignals(QObject):
+    """Сигналы фоновой проверки обновлений"""
+
+    checked = pyqtSignal(object, object)  # список обновлений или None, ошибка или None
+
+
+class AnalysisTask(QRunnable):
+    """Фоновый анализ пакета файлов - окно не зависает на больших документах
+
+    Сами файлы разбираются в пуле процессов (core.batch), а эта задача
+    только передает результаты в окно через сигналы.
+    """
+
+    def __init__(self, files, options=None):
+        super().__init__()
+        self.files = list(files)
+        self.options = options or {}
+        self.signals = AnalysisSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """Прервать пакет: новые файлы не запускаются"""
+        self.cancel_event.set()
+
+    def run(self):
+        from core.batch import iter_batch
+        from core.result_cache import ResultCache
+
+        results = []
+        cache = None
+        try:
+            # Соединение SQLite создаем в том же потоке, где им пользуемся
+            cache = ResultCache()
+            for result in iter_batch(self.files, cancel_event=self.cancel_event,
+                                     cache=cache, options=self.options):
+                results.append(result)
+                self.signals.file_done.emit(len(results), len(self.files), result)
+        except Exception as e:
+            results.append({
+                "status": "error",
+                "message": f"Ошибка пакетного анализа: {str(e)}",
+                "file": ""
+            })
+        finally:
+            if cache is not None:
+                cache.close()
+        self.signals.finished.emit(results, self.cancel_event.is_set())
 
 
 class MainWindow(QMainWindow):
@@ -23,6 +86,8 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setup_ui()
         self.selected_files = []
+        self.analysis_task = None
+        self.thread_pool = QThreadPool.globalInstance()
         self.last_folder = None
         self.last_file_folder = None
         self.load_config()
@@ -30,6 +95,10 @@ class MainWindow(QMainWindow):
         # Применяем базовые стили
         self.apply_basic_styles()
 
+        self.update_checker = None
+        self.updates_requested = False
+        self.start_update_checker()
+
     def load_config(self):
         """Загрузить сохраненные настройки из файла"""
         try:
@@ -143,6 +212,17 @@ class MainWindow(QMainWindow):
         self.btn_analyze.clicked.connect(self.analyze_file)
         self.btn_analyze.setEnabled(False)
 
+        self.btn_cancel = QPushButton("⏹ Остановить анализ")
+        self.btn_cancel.clicked.connect(self.cancel_analysis)
+        self.btn_cancel.setVisible(False)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+
+        self.progress_label = QLabel("")
+        self.progress_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.progress_label.setVisible(False)
+
         self.btn_check_updates = QPushButton("🔄 Проверить обновления")
         self.btn_check_updates.clicked.connect(self.check_updates)
 
@@ -160,6 +240,9 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.btn_select_file)
         layout.addWidget(self.btn_select_folder)
         layout.addWidget(self.btn_analyze)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.progress_label)
+        layout.addWidget(self.btn_cancel)
         layout.addSpacing(15)
 
         layout.addWidget(self.btn_check_updates)
@@ -225,98 +308,201 @@ class MainWindow(QMainWindow):
             )
 
     def analyze_file(self):
-        """Анализ файлов с использованием плагинов"""
+        """Запустить анализ всех выбранных файлов в фоне"""
         if not self.selected_files:
             QMessageBox.warning(self, "Нет файлов", "Сначала выберите файлы")
             return
 
-        file_to_analyze = self.selected_files[0]
+        if self.analysis_task is not None:
+            return
 
-        try:
-            # Пробуем использовать плагины
-            plugins = []
-
-            # DOCX плагин
-            try:
-                from plugins.docx_plugin import DocxPlugin
-                docx_plugin = DocxPlugin()
-                plugins.append(docx_plugin)
-                print(f"✅ Загружен DOCX плагин: {docx_plugin.name}")
-            except ImportError as e:
-                print(f"⚠️ DOCX плагин не загружен: {e}")
-
-            # PDF плагин
-            try:
-                from plugins.pdf_plugin import PDFPlugin
-                pdf_plugin = PDFPlugin()
-                plugins.append(pdf_plugin)
-                print(f"✅ Загружен PDF плагин: {pdf_plugin.name}")
-            except ImportError as e:
-                print(f"⚠️ PDF плагин не загружен: {e}")
-
-            # Ищем подходящий плагин
-            suitable_plugin = None
-            for plugin in plugins:
-                if hasattr(plugin, 'can_handle') and plugin.can_handle(file_to_analyze):
-                    suitable_plugin = plugin
-                    print(f"✅ Найден подходящий плагин: {plugin.name}")
-                    break
-
-            if suitable_plugin:
-                result = suitable_plugin.analyze(file_to_analyze)
-
-                if result["status"] == "success":
-                    stats = result["stats"]
-                    text = result.get("text_sample", "")
-
-                    # Форматируем красивое сообщение
-                    message = f"<h3>📄 Результаты анализа</h3>"
-                    message += f"<p><b>Файл:</b> {stats['file_name']}</p>"
-                    message += f"<p><b>Плагин:</b> {suitable_plugin.name}</p>"
-                    message += "<hr>"
-                    message += "<h4>📊 Статистика:</h4>"
-
-                    for key, value in stats.items():
-                        if key != 'file_name':
-                            message += f"<p>• <b>{key}:</b> {value}</p>"
-
-                    if text:
-                        message += "<hr>"
-                        message += "<h4>📝 Текст (первые 500 символов):</h4>"
-                        message += f"<pre>{text[:500]}...</pre>"
-
-                    # Создаем красивое сообщение
-                    msg_box = QMessageBox(self)
-                    msg_box.setWindowTitle("Результаты анализа")
-                    msg_box.setTextFormat(Qt.TextFormat.RichText)
-                    msg_box.setText(message)
-                    msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
-                    msg_box.exec()
-
-                else:
-                    QMessageBox.critical(self, "Ошибка", result["message"])
-            else:
-                QMessageBox.warning(self, "Не поддерживается",
-                                    "Формат файла не поддерживается\n\n"
-                                    "Поддерживаемые форматы:\n"
-                                    "• DOCX/DOC\n"
-                                    "• PDF")
+        # Если выбрана папка - туда выгружаются текст, картинки, таблицы и формулы
+        options = {}
+        if self.last_folder and os.path.isdir(self.last_folder):
+            options["output_dir"] = self.last_folder
+        if len(self.selected_files) > 1:
+            # Ядра заняты разными файлами - страницы одного файла по процессам не делим
+            options["text_workers"] = 1
+
+        task = AnalysisTask(self.selected_files, options)
+        task.signals.file_done.connect(self.on_file_analyzed)
+        task.signals.finished.connect(self.on_analysis_finished)
+        self.analysis_task = task
+
+        self.progress_bar.setRange(0, len(self.selected_files))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.progress_label.setText(f"Анализ: 0 из {len(self.selected_files)}")
+        self.progress_label.setVisible(True)
+        self.btn_cancel.setEnabled(True)
+        self.btn_cancel.setVisible(True)
+        self.btn_analyze.setEnabled(False)
+        self.btn_select_file.setEnabled(False)
+
+        self.thread_pool.start(task)
+
+    def cancel_analysis(self):
+        """Остановить текущий пакет анализа"""
+        if self.analysis_task is not None:
+            self.analysis_task.cancel()
+            self.btn_cancel.setEnabled(False)
+            self.progress_label.setText("Останавливаем анализ...")
+
+    def on_file_analyzed(self, done, total, result):
+        """Прогресс по одному файлу (вызывается в потоке интерфейса)"""
+        mark = "✅" if result.get("status") == "success" else "❌"
+        self.progress_bar.setValue(done)
+        self.progress_label.setText(
+            f"{mark} {os.path.basename(result.get('file', ''))} - {done} из {total}"
+        )
 
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка",
-                                 f"Не удалось прочитать файл:\n{str(e)}")
+    def on_analysis_finished(self, results, cancelled):
+        """Весь пакет обработан (или остановлен)"""
+        self.analysis_task = None
+        self.progress_bar.setVisible(False)
+        self.progress_label.setVisible(False)
+        self.btn_cancel.setVisible(False)
+        self.btn_analyze.setEnabled(True)
+        self.btn_select_file.setEnabled(True)
+
+        if len(results) == 1 and not cancelled:
+            self.show_file_result(results[0])
+        else:
+            self.show_batch_summary(results, cancelled)
+
+    def show_file_result(self, result):
+        """Подробные результаты анализа одного файла"""
+        if result["status"] == "unsupported":
+            QMessageBox.warning(self, "Не поддерживается",
+                                "Формат файла не поддерживается\n\n"
+                                "Поддерживаемые форматы:\n"
+                                "• DOCX/DOC\n"
+                                "• PDF")
+            return
+
+        if result["status"] != "success":
+            QMessageBox.critical(self, "Ошибка", result["message"])
+            return
+
+        stats = result["stats"]
+        text = result.get("text_sample", "")
+
+        # Форматируем красивое сообщение
+        message = f"<h3>📄 Результаты анализа</h3>"
+        message += f"<p><b>Файл:</b> {stats['file_name']}</p>"
+        message += f"<p><b>Плагин:</b> {result.get('plugin', '')}</p>"
+        message += "<hr>"
+        message += "<h4>📊 Статистика:</h4>"
+
+        for key, value in stats.items():
+            if key != 'file_name':
+                message += f"<p>• <b>{key}:</b> {value}</p>"
+
+        if result.get("output_folder"):
+            message += f"<p>📂 <b>Результаты сохранены в:</b> {result['output_folder']}</p>"
+
+        if text:
+            message += "<hr>"
+            message += "<h4>📝 Текст (первые 500 символов):</h4>"
+            message += f"<pre>{text[:500]}...</pre>"
+
+        # Создаем красивое сообщение
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle("Результаты анализа")
+        msg_box.setTextFormat(Qt.TextFormat.RichText)
+        msg_box.setText(message)
+        msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
+        msg_box.exec()
+
+    def show_batch_summary(self, results, cancelled):
+        """Сводка по пакету файлов"""
+        success = [r for r in results if r.get("status") == "success"]
+        failed = [r for r in results if r.get("status") != "success"]
+
+        message = "<h3>📄 Результаты пакетного анализа</h3>"
+        if cancelled:
+            message += f"<p>⏹ Анализ остановлен: обработано {len(results)} из {len(self.selected_files)}</p>"
+        message += f"<p>✅ <b>Успешно:</b> {len(success)}</p>"
+        message += f"<p>❌ <b>С ошибками:</b> {len(failed)}</p>"
+        if any(r.get("output_folder") for r in success):
+            message += f"<p>📂 <b>Результаты сохранены в:</b> {self.last_folder}</p>"
+
+        if failed:
+            message += "<hr><h4>Ошибки:</h4>"
+            for result in failed[:20]:
+                message += (f"<p>• <b>{os.path.basename(result.get('file', ''))}:</b> "
+                            f"{result.get('message', '')}</p>")
+
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle("Результаты анализа")
+        msg_box.setTextFormat(Qt.TextFormat.RichText)
+        msg_box.setText(message)
+        msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
+        msg_box.exec()
+
+    def closeEvent(self, event):
+        """При закрытии окна останавливаем фоновый анализ и проверку обновлений"""
+        if self.analysis_task is not None:
+            self.analysis_task.cancel()
+        if self.update_checker is not None:
+            # Поток - демон: идущую проверку не ждем дольше секунды
+            self.update_checker.stop(timeout=1)
+        super().closeEvent(event)
+
+    def start_update_checker(self):
+        """Фоновая проверка обновлений: сразу после запуска и дальше по расписанию
+
+        Манифест и хэши файлов кэшируются клиентом, так что повторная
+        проверка без изменений на сервере почти ничего не стоит.
+        """
+        from update_client import SimpleUpdateClient, UpdateChecker
+
+        self.update_signals = UpdateSignals()
+        self.update_signals.checked.connect(self.on_updates_checked)
+        client = SimpleUpdateClient(os.path.join(current_dir, "update_server"), current_dir)
+        self.update_checker = UpdateChecker(
+            client,
+            on_result=lambda updates: self.update_signals.checked.emit(updates, None),
+            on_error=lambda error: self.update_signals.checked.emit(None, error)
+        ).start()
 
     def check_updates(self):
-        """Проверить обновления"""
-        QMessageBox.information(
-            self,
-            "Обновления",
-            "✅ Ваша программа актуальна!\n\n"
-            "• Версия: 2.0 (стабильная)\n"
-            "• Поддержка: DOCX, PDF\n"
-            "• Система тем: отключена\n\n"
-            "Все функции работают корректно."
-        )
+        """Проверить обновления (в фоне - окно не ждет сети)"""
+        self.updates_requested = True
+        self.btn_check_updates.setEnabled(False)
+        self.btn_check_updates.setText("🔄 Проверяю обновления...")
+        self.update_checker.check_now()
+
+    def on_updates_checked(self, updates, error):
+        """Результат фоновой проверки обновлений"""
+        requested = self.updates_requested
+        self.updates_requested = False
+        self.btn_check_updates.setEnabled(True)
+        if updates:
+            self.btn_check_updates.setText(f"🔄 Доступны обновления ({len(updates)})")
+        else:
+            self.btn_check_updates.setText("🔄 Проверить обновления")
+
+        # Плановые проверки окно не дергают - только текст кнопки
+        if not requested:
+            return
+        if error is not None:
+            QMessageBox.warning(self, "Обновления", f"❌ Ошибка при проверке обновлений:\n{error}")
+        elif not updates:
+            QMessageBox.information(self, "Обновления", "✅ Ваша программа актуальна!")
+        else:
+            message = "<p><b>Доступны обновления:</b></p>"
+            for update in updates:
+                size = update['download_kb'] if update['download_kb'] is not None else update['size']
+                message += (f"<p>• <b>{update['name']}</b> {update['version']} ({size} КБ)"
+                            f"<br>{update['description']}</p>")
+            message += "<p>Установка: <code>python update_client.py --apply</code></p>"
+            msg_box = QMessageBox(self)
+            msg_box.setWindowTitle("Обновления")
+            msg_box.setTextFormat(Qt.TextFormat.RichText)
+            msg_box.setText(message)
+            msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
+            msg_box.exec()
 
 
 def main():
@@ -0,0 +1,145 @@
+# plugins/docx_incremental.py
+"""Повторный анализ DOCX только по изменившимся частям архива
+
+Word при каждом сохранении переписывает весь zip, но у неизменившихся
+частей CRC и размер в центральном каталоге остаются прежними. Отпечатки
+частей ({имя: [CRC, размер]}) сохраняются вместе с результатом, и при
+повторном анализе пересчитывается только то, что зависит от изменившихся
+частей:
+
+    body  - document.xml и его связи: абзацы, таблицы, формулы, текст
+    media - word/media/*: количество и выгрузка картинок
+    core  - docProps/core.xml: автор и дата создания
+
+Остальные части (стили, настройки, шрифты) на результат не влияют.
+Если изменилась структура пакета ([Content_Types].xml, _rels/.rels),
+документ разбирается заново целиком.
+"""
+
+import contextlib
+import posixpath
+import zipfile
+
+from core.instrument import span
+
+from plugins.docx_stream import (
+    export_media, find_main_part, media_entries, read_core_properties,
+    read_relationships, scan_document
+)
+
+STRUCTURE_PARTS = ('[Content_Types].xml', '_rels/.rels')
+CORE_PART = 'docProps/core.xml'
+
+GROUPS = ('body', 'media', 'core')
+
+
+def part_fingerprints(zf):
+    """Отпечатки частей архива из центрального каталога (без распаковки)"""
+    return {info.filename: [info.CRC, info.file_size]
+            for info in zf.infolist() if not info.is_dir()}
+
+
+def part_group(name, part_name):
+    """Группа, к которой относится часть архива, или None (не влияет на результат)"""
+    if name in STRUCTURE_PARTS:
+        return 'structure'
+    folder, main = posixpath.split(part_name)
+    if name == part_name or name == posixpath.join(folder, '_rels', main + '.rels'):
+        return 'body'
+    if name.startswith(posixpath.join(folder, 'media') + '/'):
+        return 'media'
+    if name == CORE_PART:
+        return 'core'
+    return None
+
+
+def changed_groups(old_parts, new_parts, part_name):
+    """Группы, в которых добавились, удалились или изменились части"""
+    groups = set()
+    for name in old_parts.keys() | new_parts.keys():
+        if old_parts.get(name) != new_parts.get(name):
+            group = part_group(name, part_name)
+            if group is not None:
+                groups.add(group)
+    return groups
+
+
+def read_docx_changes(file_path, previous=None, exporter=None, tables=None, formulas=None):
+    """Разобрать только изменившиеся группы частей; остальное взять из previous
+
+    previous - прошлое состояние: parts (отпечатки), stats, text_sample,
+    formulas_sample и, при выгрузке, exported_images. Без него (или если
+    изменилась структура пакета) разбирается все.
+
+    Возвращает поля статистики как read_docx плюс parts, changed
+    (изменившиеся группы) и reused (группы, взятые из previous).
+    """
+    with contextlib.ExitStack() as stack:
+        with span("open"):
+            zf = stack.enter_context(zipfile.ZipFile(file_path))
+            parts = part_fingerprints(zf)
+            part_name = find_main_part(zf)
+
+        old_parts = (previous or {}).get('parts')
+        if old_parts:
+            changed = changed_groups(old_parts, parts, part_name)
+            if 'structure' in changed:
+                changed = set(GROUPS)
+        else:
+            changed = set(GROUPS)
+
+        old_stats = previous.get('stats', {}) if old_parts else {}
+        scan = {'parts': parts, 'changed': sorted(changed)}
+        redo = set(changed)
+
+        exported = previous.get('exported_images') if old_parts else None
+        if 'media' in redo:
+            scan['media_files'] = len(media_entries(zf, part_name))
+            if exporter is not None:
+                with span("export"):
+                    exporter.forget('images')
+                    new_exported = export_media(zf, part_name, exporter)
+                # Ссылки на картинки в тексте поменялись - текст придется переписать
+                if new_exported != exported:
+                    redo.add('body')
+                exported = new_exported
+        else:
+            scan['media_files'] = old_stats.get('media_files', 0)
+        if exported is not None:
+            scan['exported_images'] = exported
+
+        if 'body' in redo:
+            image_refs = None
+            if exporter is not None:
+                # Куски (core.chunker) нарезаны из старого текста - тоже устарели
+                for kind in ('text', 'tables', 'formulas', 'chunks'):
+                    exporter.forget(kind)
+                image_refs = {rid: exported[target]
+                              for rid, target in read_relationships(zf, part_name).items()
+                              if target in exported}
+                # Текст, таблицы и формулы выгружаются в том же проходе разбора
+                with span("parse"), exporter.open_text('text', 'text.txt') as text_out:
+                    counts = scan_document(zf, part_name, tables=tables, formulas=formulas,
+                                           text_out=text_out, image_refs=image_refs)
+            else:
+                with span("parse"):
+                    counts = scan_document(zf, part_name, tables=tables, formulas=formulas)
+            scan.update(counts)
+            scan['table_sizes'] = [{'rows': t['rows'], 'columns': t['columns']}
+                                   for t in tables.summary()] if tables is not None else []
+            scan['formulas'] = formulas.count if formulas is not None else counts['equations']
+            scan['formulas_sample'] = formulas.samples if formulas is not None else []
+        else:
+            for key in ('paragraphs', 'tables', 'images', 'table_sizes', 'formulas'):
+                scan[key] = old_stats.get(key)
+            scan['text_sample'] = previous.get('text_sample', "")
+            scan['formulas_sample'] = previous.get('formulas_sample', [])
+
+        if 'core' in redo:
+            with span("metadata"):
+                scan['author'], scan['created'] = read_core_properties(zf)
+        else:
+            scan['author'], scan['created'] = old_stats.get('author'), old_stats.get('created')
+
+    scan['reused'] = [group for group in GROUPS if group not in redo]
+    return scan
@@ -0,0 +1,91 @@
+# plugins/docx_meta.py
+"""Быстрая статистика DOCX из свойств документа, без разбора текста
+
+Word при сохранении сам записывает число страниц, слов, знаков и абзацев
+в docProps/app.xml, а автора и даты - в docProps/core.xml. Здесь читаются
+только эти две маленькие части и центральный каталог zip (количество
+картинок, размеры частей) - document.xml не распаковывается вовсе,
+поэтому время не зависит от размера документа.
+
+Числа в app.xml - то, что посчитал Word при последнем сохранении: у
+файлов, собранных программами без пересчета статистики, их может не быть.
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+
+from plugins.docx_stream import find_main_part, media_entries, read_core_properties
+
+APP_PART = 'docProps/app.xml'
+APP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}'
+
+# Поле статистики -> элемент app.xml
+APP_COUNTS = {
+    'pages': 'Pages',
+    'words': 'Words',
+    'characters': 'Characters',
+    'characters_with_spaces': 'CharactersWithSpaces',
+    'paragraphs': 'Paragraphs',
+    'lines': 'Lines',
+}
+
+# Без хотя бы одного из этих чисел свойства считаются отсутствующими
+REQUIRED_COUNTS = ('pages', 'words', 'paragraphs')
+
+# Нули в счетчиках при document.xml больше этого - статистика не
+# пересчитывалась (так делает, например, шаблон python-docx)
+EMPTY_DOCUMENT_SIZE = 16 * 1024
+
+
+def read_app_properties(zf):
+    """Счетчики и приложение из docProps/app.xml (пустой dict, если части нет)"""
+    try:
+        with zf.open(APP_PART) as f:
+            root = ET.parse(f).getroot()
+    except KeyError:
+        return {}
+    props = {}
+    for key, tag in APP_COUNTS.items():
+        value = root.findtext(APP_NS + tag)
+        if value and value.strip().isdigit():
+            props[key] = int(value)
+    application = root.findtext(APP_NS + 'Application')
+    if application:
+        props['application'] = application.strip()
+    return props
+
+
+def read_docx_metadata(file_path):
+    """Статистика документа из свойств и центрального каталога
+
+    Возвращает None, если в app.xml нет счетчиков или они явно устарели
+    (документ придется разобрать целиком).
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        props = read_app_properties(zf)
+        if not any(key in props for key in REQUIRED_COUNTS):
+            return None
+
+        part_name = find_main_part(zf)
+        try:
+            document_size = zf.getinfo(part_name).file_size
+        except KeyError:
+            document_size = None
+        if not props.get('words') and not props.get('paragraphs') \
+                and (document_size or 0) > EMPTY_DOCUMENT_SIZE:
+            return None
+
+        author, created = read_core_properties(zf)
+        media = media_entries(zf, part_name)
+
+        return dict(
+            props,
+            author=author,
+            created=created,
+            media_files=len(media),
+            part_sizes={
+                'document': document_size,
+                'media': sum(info.file_size for info in media),
+                'total': sum(info.file_size for info in zf.infolist()),
+            }
+        )
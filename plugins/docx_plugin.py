@@ -1,15 +1,20 @@
 # plugins/docx_plugin.py
 """Плагин для анализа DOCX файлов"""
 
+import json
 import os
-from docx import Document
-
-# Импортируем базовый класс
 import sys
-import os
 
+# Импортируем базовый класс
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from core.plugin_base import DocumentPlugin
+from core.export import DocumentExporter, MANIFEST_NAME, document_folder
+from core.instrument import span
+from core.memory import active_limit
+from plugins.docx_incremental import read_docx_changes
+from plugins.docx_meta import read_docx_metadata
+from plugins.docx_tables import TableCollector
+from plugins.omml import FormulaCollector, M
 
 
 class DocxPlugin(DocumentPlugin):
@@ -18,30 +23,185 @@ class DocxPlugin(DocumentPlugin):
     def __init__(self):
         super().__init__()
         self.name = "DOCX Анализатор"
-        self.version = "1.0"
+        self.version = "1.7"
         self.supported_extensions = ['.docx', '.doc']
+        # 'stream' - быстрый однопроходный разбор, 'python-docx' - через Document()
+        self.engine = "stream"
+
+    def analyze(self, file_path, engine=None, output_dir=None, table_format="csv",
+                formula_format="latex", previous=None, level="standard", **options):
+        """Анализировать DOCX файл
+
+        level="metadata" - быстрая статистика из docProps/app.xml, core.xml
+        и центрального каталога архива, без разбора текста (если свойств
+        в файле нет - обычный разбор).
+
+        С output_dir текст, картинки, таблицы и формулы документа выгружаются
+        в папку документа (core.export.document_folder) вместе с manifest.json
+        (потоковый движок).
+        table_format - 'csv' или 'tsv', formula_format - 'latex' или 'linear'.
+        previous - прошлый результат этого файла (из кэша): разбираются только
+        изменившиеся части архива. При выгрузке прошлое состояние берется
+        из manifest.json папки документа.
+        При потолке памяти (core.memory) большие файлы всегда разбираются потоково.
+        """
+        if level == "metadata":
+            return self.analyze_metadata(file_path)
+
+        engine = engine or self.engine
+        limit = active_limit()
+        if limit is not None and limit.streaming(file_path):
+            # python-docx держит в памяти весь документ - при потолке памяти только потоково
+            engine = "stream"
+        if engine == "stream":
+            return self.analyze_stream(file_path, output_dir, table_format, formula_format, previous)
+        return self.analyze_python_docx(file_path)
+
+    def analyze_metadata(self, file_path):
+        """Только свойства документа; без них - потоковый разбор"""
+        try:
+            with span("metadata"):
+                meta = read_docx_metadata(file_path)
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Ошибка при анализе: {str(e)}"
+            }
 
-    def analyze(self, file_path):
-        """Анализировать DOCX файл"""
+        if meta is None:
+            # Счетчиков Word в файле нет - посчитать можно только разбором
+            result = self.analyze_stream(file_path)
+            if result["status"] == "success":
+                result["level"] = "metadata"
+                result["source"] = "document"
+            return result
+
+        stats = {'file_name': os.path.basename(file_path)}
+        stats.update(meta)
+        stats['author'] = meta['author'] or "Не указан"
+        stats['created'] = str(meta['created']) if meta['created'] else "Неизвестно"
+        return {"status": "success", "level": "metadata", "source": "docProps", "stats": stats}
+
+    def load_manifest_state(self, folder, settings, file_path):
+        """Прошлое состояние из manifest.json папки документа (если оно подходит)
+
+        Манифест другого документа (другой source) не подходит никогда: его
+        части архива к этому файлу отношения не имеют.
+        """
+        path = os.path.join(folder, MANIFEST_NAME)
         try:
-            # Открываем документ
-            doc = Document(file_path)
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("source") != os.path.abspath(file_path):
+            return None
+        if manifest.get("plugin_version") != self.version or manifest.get("settings") != settings:
+            return None
+        return manifest
+
+    def analyze_stream(self, file_path, output_dir=None, table_format="csv", formula_format="latex",
+                       previous=None):
+        """Анализ потоковым движком (без построения дерева python-docx)"""
+        tables = None
+        exporter = None
+        try:
+            settings = None
+            if output_dir:
+                settings = {"table_format": table_format, "formula_format": formula_format}
+                previous = self.load_manifest_state(document_folder(output_dir, file_path), settings,
+                                                    file_path)
+                if previous is not None:
+                    exporter = DocumentExporter.resume(document_folder(output_dir, file_path))
+                else:
+                    exporter = DocumentExporter(output_dir, file_path)
+
+            tables = TableCollector(exporter, table_format)
+            formulas = FormulaCollector(exporter, formula_format)
+            scan = read_docx_changes(file_path, previous, exporter, tables, formulas)
 
-            # Собираем статистику
             stats = {
                 'file_name': os.path.basename(file_path),
-                'paragraphs': len(doc.paragraphs),
-                'tables': len(doc.tables),
-                'images': 0,  # Пока упрощенно
-                'author': doc.core_properties.author or "Не указан",
-                'created': str(doc.core_properties.created) or "Неизвестно"
+                'paragraphs': scan['paragraphs'],
+                'tables': scan['tables'],
+                'images': scan['images'],
+                'media_files': scan['media_files'],
+                'table_sizes': scan['table_sizes'],
+                'formulas': scan['formulas'],
+                'author': scan['author'] or "Не указан",
+                'created': str(scan['created']) if scan['created'] else "Неизвестно"
+            }
+
+            result = {
+                "status": "success",
+                "stats": stats,
+                "text_sample": scan['text_sample'],
+                "parts": scan['parts']
+            }
+            if scan['formulas_sample']:
+                result["formulas_sample"] = scan['formulas_sample']
+            if scan['reused']:
+                result["incremental"] = {"changed": scan['changed'], "reused": scan['reused']}
+
+            if exporter is not None:
+                stats['images_exported'] = len(set(scan['exported_images'].values()))
+                result["output_folder"] = exporter.root
+                with span("export"):
+                    result["manifest"] = exporter.finish({
+                        "plugin": self.name,
+                        "plugin_version": self.version,
+                        "settings": settings,
+                        "stats": stats,
+                        "text_sample": scan['text_sample'],
+                        "formulas_sample": scan['formulas_sample'],
+                        "exported_images": scan['exported_images'],
+                        "parts": scan['parts'],
+                        "incremental": {"changed": scan['changed'], "reused": scan['reused']}
+                    })
+                exporter = None
+
+            return result
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Ошибка при анализе: {str(e)}"
             }
 
+        finally:
+            if tables is not None:
+                tables.close()
+            if exporter is not None:
+                exporter.close()
+
+    def analyze_python_docx(self, file_path):
+        """Анализ через python-docx (полное дерево документа в памяти)"""
+        try:
+            # Тяжелая библиотека - загружаем только когда она действительно нужна
+            from docx import Document
+
+            # Открываем документ (python-docx сразу разбирает его целиком)
+            with span("parse"):
+                doc = Document(file_path)
+
+            # Собираем статистику
+            with span("metadata"):
+                stats = {
+                    'file_name': os.path.basename(file_path),
+                    'paragraphs': len(doc.paragraphs),
+                    'tables': len(doc.tables),
+                    'images': len(doc.inline_shapes),
+                    'formulas': sum(1 for _ in doc.element.body.iter(M + 'oMath')),
+                    'author': doc.core_properties.author or "Не указан",
+                    'created': str(doc.core_properties.created) or "Неизвестно"
+                }
+
             # Извлекаем текст (первые 1000 символов)
             text_parts = []
-            for para in doc.paragraphs[:20]:  # Первые 20 абзацев
-                if para.text.strip():
-                    text_parts.append(para.text)
+            with span("text"):
+                for para in doc.paragraphs[:20]:  # Первые 20 абзацев
+                    if para.text.strip():
+                        text_parts.append(para.text)
 
             text_sample = "\n".join(text_parts)[:1000]
 
@@ -0,0 +1,368 @@
+# plugins/docx_stream.py
+"""Потоковый разбор DOCX за один проход без python-docx
+
+DOCX - это zip-архив. Вместо построения полного дерева объектов
+(Document() держит в памяти весь word/document.xml) читаем document.xml
+через iterparse прямо из архива и сразу выбрасываем обработанные
+абзацы и строки таблиц. Память ограничена одним абзацем/строкой,
+сколько бы мегабайт ни весил документ.
+"""
+
+import datetime
+import hashlib
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+from core.memory import check_memory
+
+# lxml (ставится вместе с python-docx) умеет отдавать события только по
+# нужным тегам - это в несколько раз быстрее; без него работает stdlib.
+# Загружается при первом разобранном документе, а не при импорте плагина
+_lxml_etree = False
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+M_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/math'
+A_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+V_NS = 'urn:schemas-microsoft-com:vml'
+REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+W = '{%s}' % W_NS
+M = '{%s}' % M_NS
+
+W_BODY = W + 'body'
+W_P = W + 'p'
+W_TBL = W + 'tbl'
+W_TR = W + 'tr'
+W_TC = W + 'tc'
+W_T = W + 't'
+W_TAB = W + 'tab'
+W_BR = W + 'br'
+W_CR = W + 'cr'
+W_DRAWING = W + 'drawing'
+W_PICT = W + 'pict'
+M_OMATH = M + 'oMath'
+A_BLIP = '{%s}blip' % A_NS
+V_IMAGEDATA = '{%s}imagedata' % V_NS
+R_EMBED = '{%s}embed' % R_NS
+R_ID = '{%s}id' % R_NS
+
+CORE_PROPS_NS = {
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'dcterms': 'http://purl.org/dc/terms/',
+}
+
+# Элементы, после закрытия которых их можно выбросить из дерева
+_RELEASABLE = (W_P, W_TR, W_TBL)
+
+# Элементы, о закрытии которых сообщает iter_closed
+SCAN_TAGS = (W_P, W_TBL, W_TR, W_DRAWING, W_PICT, M_OMATH, A_BLIP, V_IMAGEDATA)
+
+MEDIA_CHUNK_SIZE = 1024 * 1024
+
+# Память сверяется с потолком (core.memory) раз в столько элементов (маска: 2**n - 1)
+MEMORY_CHECK_EVERY = 4095
+
+
+def lxml_etree():
+    """Модуль lxml.etree или None, если lxml не установлен"""
+    global _lxml_etree
+    if _lxml_etree is False:
+        try:
+            from lxml import etree as module
+        except ImportError:
+            module = None
+        _lxml_etree = module
+    return _lxml_etree
+
+
+def find_main_part(zf):
+    """Путь к основной части документа (обычно word/document.xml)"""
+    try:
+        with zf.open('_rels/.rels') as f:
+            for rel in ET.parse(f).getroot().iter('{%s}Relationship' % REL_NS):
+                if rel.get('Type') == OFFICE_DOCUMENT_REL:
+                    return posixpath.normpath(rel.get('Target').lstrip('/'))
+    except KeyError:
+        pass
+    return 'word/document.xml'
+
+
+def paragraph_text(p):
+    """Текст абзаца так же, как его собирает python-docx (w:t, табуляции, переносы)"""
+    parts = []
+    for elem in p.iter():
+        tag = elem.tag
+        if tag == W_T:
+            if elem.text:
+                parts.append(elem.text)
+        elif tag == W_TAB:
+            parts.append('\t')
+        elif tag in (W_BR, W_CR):
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def read_core_properties(zf):
+    """Автор и дата создания из docProps/core.xml"""
+    author = None
+    created = None
+    try:
+        with zf.open('docProps/core.xml') as f:
+            root = ET.parse(f).getroot()
+        author = root.findtext('dc:creator', namespaces=CORE_PROPS_NS)
+        created = parse_w3cdtf(root.findtext('dcterms:created', namespaces=CORE_PROPS_NS))
+    except KeyError:
+        pass
+    return author, created
+
+
+def parse_w3cdtf(value):
+    """Дата в формате W3CDTF (2024-01-18T12:00:00Z) -> datetime или None"""
+    if not value:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+def _releasable(elem, parent):
+    """Можно ли выбросить закрывшийся элемент"""
+    if elem.tag not in _RELEASABLE:
+        return False
+    return not (elem.tag == W_P and parent is not None and parent.tag == W_TC)
+
+
+def iter_closed(f, tags):
+    """Пары (элемент, родитель) по мере закрытия нужных тегов
+
+    Абзацы, строки и таблицы освобождаются сразу после того, как
+    вызывающий код их обработал, поэтому в памяти не копится дерево.
+    Абзацы внутри ячеек живут до конца своей строки таблицы - из них
+    собирается текст ячеек.
+    """
+    etree = lxml_etree()
+    if etree is not None:
+        for _, elem in etree.iterparse(f, events=('end',), tag=tags,
+                                       resolve_entities=False, huge_tree=True):
+            parent = elem.getparent()
+            yield elem, parent
+            if _releasable(elem, parent):
+                elem.clear(keep_tail=True)
+                # Соседей в ячейке не трогаем - это абзацы с текстом ячейки
+                if parent is not None and parent.tag != W_TC:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+        return
+
+    stack = []
+    for event, elem in ET.iterparse(f, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if elem.tag not in tags:
+            continue
+
+        parent = stack[-1] if stack else None
+        yield elem, parent
+        if parent is not None and _releasable(elem, parent):
+            parent.remove(elem)
+
+
+def read_relationships(zf, part_name):
+    """Связи части документа: {rId: имя элемента архива}"""
+    folder, name = posixpath.split(part_name)
+    rels_name = posixpath.join(folder, '_rels', name + '.rels')
+    targets = {}
+    try:
+        with zf.open(rels_name) as f:
+            for rel in ET.parse(f).getroot().iter('{%s}Relationship' % REL_NS):
+                if rel.get('TargetMode') == 'External':
+                    continue
+                target = rel.get('Target', '')
+                if target.startswith('/'):
+                    targets[rel.get('Id')] = posixpath.normpath(target.lstrip('/'))
+                else:
+                    targets[rel.get('Id')] = posixpath.normpath(posixpath.join(folder, target))
+    except KeyError:
+        pass
+    return targets
+
+
+def scan_document(zf, part_name, sample_paragraphs=20, sample_chars=1000,
+                  tables=None, formulas=None, text_out=None, image_refs=None):
+    """Один проход по document.xml: счетчики и начало текста
+
+    Как и python-docx, абзацами и таблицами считаются только элементы
+    верхнего уровня w:body; рисунки и формулы - во всем документе.
+    Картинки - это ссылки a:blip / v:imagedata на файлы из word/media.
+    tables (TableCollector) получает каждую строку таблицы сразу после
+    ее разбора, formulas (FormulaCollector) - каждую формулу m:oMath.
+
+    text_out - файл для полного текста: абзацы по строкам, а вместо
+    таблиц, картинок и формул - ссылки на их файлы (image_refs: rId -> путь).
+    """
+    counts = {'paragraphs': 0, 'tables': 0, 'drawings': 0, 'images': 0, 'equations': 0}
+    text_parts = []
+    text_len = 0
+    sampled = 0
+    refs = []  # ссылки, которые встретились внутри текущего абзаца
+
+    with zf.open(part_name) as f:
+        for number, (elem, parent) in enumerate(iter_closed(f, SCAN_TAGS)):
+            if not number & MEMORY_CHECK_EVERY:
+                check_memory(part_name)
+            tag = elem.tag
+
+            if tag == W_DRAWING or tag == W_PICT:
+                counts['drawings'] += 1
+            elif tag == M_OMATH:
+                counts['equations'] += 1
+                if formulas is not None:
+                    ref = formulas.on_formula(elem)
+                    if ref:
+                        refs.append(f"[Формула {formulas.count}: {ref}]")
+            elif tag == A_BLIP or tag == V_IMAGEDATA:
+                # Ссылка на картинку из word/media (через связи документа)
+                counts['images'] += 1
+                if image_refs:
+                    ref = image_refs.get(elem.get(R_EMBED) or elem.get(R_ID))
+                    if ref:
+                        refs.append(f"[Рисунок: {ref}]")
+
+            top_level = parent is not None and parent.tag == W_BODY
+
+            if top_level and tag == W_P:
+                counts['paragraphs'] += 1
+                text = None
+                if sampled < sample_paragraphs and text_len < sample_chars:
+                    sampled += 1
+                    text = paragraph_text(elem)
+                    if text.strip():
+                        text_parts.append(text)
+                        text_len += len(text) + 1
+                if text_out is not None:
+                    if text is None:
+                        text = paragraph_text(elem)
+                    text_out.write(" ".join(part for part in [text] + refs if part))
+                    text_out.write("\n")
+                    refs = []
+            elif top_level and tag == W_TBL:
+                counts['tables'] += 1
+
+            if tables is not None:
+                if tag == W_TR and parent is not None:
+                    tables.on_row(elem, parent)
+                elif tag == W_TBL:
+                    info = tables.on_table_end(elem)
+                    if top_level and text_out is not None:
+                        for ref in refs:
+                            text_out.write(ref + "\n")
+                        refs = []
+                        if info.get('file'):
+                            text_out.write(f"[Таблица {info['table']}: tables/{info['file']}]\n")
+
+    counts['text_sample'] = "\n".join(text_parts)[:sample_chars]
+    return counts
+
+
+def media_entries(zf, part_name):
+    """Файлы картинок документа (word/media/*) из центрального каталога архива"""
+    prefix = posixpath.join(posixpath.dirname(part_name), 'media') + '/'
+    return [info for info in zf.infolist()
+            if info.filename.startswith(prefix) and not info.is_dir()]
+
+
+def _hash_entry(zf, info):
+    """SHA-256 элемента архива без записи на диск"""
+    digest = hashlib.sha256()
+    with zf.open(info) as src:
+        for chunk in iter(lambda: src.read(MEDIA_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_media(zf, part_name, exporter):
+    """Выгрузить картинки документа в папку images без дублей
+
+    Одинаковые картинки (логотип в каждом колонтитуле) пишутся один раз.
+    Кандидаты в дубли находим бесплатно - по CRC и размеру из центрального
+    каталога zip; только для них содержимое читается еще раз ради хэша.
+    Небольшие картинки уходят в фоновую запись экспортера, большие
+    переписываются из архива кусками.
+    Возвращает {имя в архиве: путь выгруженного файла (images/...)}.
+    """
+    exported = {}
+    by_hash = {}        # sha256 -> путь выгруженного файла
+    by_crc = set()      # (crc, размер) уже выгруженных картинок
+
+    for info in media_entries(zf, part_name):
+        check_memory(info.filename)
+        name = posixpath.basename(info.filename)
+        crc_key = (info.CRC, info.file_size)
+
+        if crc_key in by_crc:
+            digest = _hash_entry(zf, info)
+            if digest in by_hash:
+                exported[info.filename] = by_hash[digest]
+                continue
+
+        if info.file_size <= MEDIA_CHUNK_SIZE:
+            data = zf.read(info)
+            digest = hashlib.sha256(data).hexdigest()
+            ref = exporter.write_bytes('images', name, data)
+        else:
+            writer = exporter.open_binary('images', name)
+            digest = hashlib.sha256()
+            with writer as dst, zf.open(info) as src:
+                for chunk in iter(lambda: src.read(MEDIA_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            digest = digest.hexdigest()
+            ref = exporter.relative('images', name)
+
+        by_crc.add(crc_key)
+        by_hash[digest] = ref
+        exported[info.filename] = ref
+
+    return exported
+
+
+def read_docx(file_path, exporter=None, tables=None, formulas=None):
+    """Счетчики, начало текста и свойства DOCX за один проход по архиву
+
+    С exporter картинки выгружаются в images (без дублей), а полный
+    текст со ссылками - в text/text.txt; tables и formulas получают
+    таблицы и формулы в том же проходе.
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        part_name = find_main_part(zf)
+
+        image_refs = None
+        exported = None
+        if exporter is not None:
+            exported = export_media(zf, part_name, exporter)
+            image_refs = {rid: exported[target]
+                          for rid, target in read_relationships(zf, part_name).items()
+                          if target in exported}
+
+        if exporter is not None:
+            with exporter.open_text('text', 'text.txt') as text_out:
+                scan = scan_document(zf, part_name, tables=tables, formulas=formulas,
+                                     text_out=text_out, image_refs=image_refs)
+        else:
+            scan = scan_document(zf, part_name, tables=tables, formulas=formulas)
+
+        scan['author'], scan['created'] = read_core_properties(zf)
+        scan['media_files'] = len(media_entries(zf, part_name))
+        if exported is not None:
+            scan['exported_images'] = exported
+    return scan
@@ -0,0 +1,139 @@
+# plugins/docx_tables.py
+"""Выгрузка таблиц DOCX в CSV/TSV построчно
+
+Строки таблицы пишутся в файл сразу по мере разбора document.xml, так
+что таблица на десятки тысяч строк не собирается в памяти. Объединенные
+ячейки раскрываются: горизонтальное объединение (w:gridSpan) и
+вертикальное (w:vMerge) повторяют значение исходной ячейки, чтобы
+каждая строка файла читалась сама по себе.
+"""
+
+import csv
+
+from plugins.docx_stream import W, W_P, W_TC, paragraph_text
+
+W_TC_PR = W + 'tcPr'
+W_TR_PR = W + 'trPr'
+W_GRID_SPAN = W + 'gridSpan'
+W_V_MERGE = W + 'vMerge'
+W_GRID_BEFORE = W + 'gridBefore'
+W_VAL = W + 'val'
+
+TABLE_FORMATS = {'csv': ',', 'tsv': '\t'}
+
+
+def _int_val(elem, default):
+    """Числовой атрибут w:val"""
+    if elem is None:
+        return default
+    try:
+        return int(elem.get(W_VAL))
+    except (TypeError, ValueError):
+        return default
+
+
+def cell_text(tc):
+    """Текст ячейки: абзацы через перевод строки"""
+    return "\n".join(paragraph_text(p) for p in tc.iter(W_P))
+
+
+class _OpenTable:
+    """Таблица, которую сейчас пишем"""
+
+    def __init__(self, number, output=None, delimiter=','):
+        self.number = number
+        self.output = output  # ArtifactWriter экспортера или None
+        self.writer = None
+        if output is not None:
+            self.writer = csv.writer(output.file, delimiter=delimiter)
+        self.rows = 0
+        self.columns = 0
+        self.previous = []  # значения предыдущей строки - для w:vMerge
+
+
+class TableCollector:
+    """Получает строки таблиц от потокового разбора и пишет их в файлы
+
+    Без exporter (core.export.DocumentExporter) только считает строки
+    и столбцы каждой таблицы.
+    """
+
+    def __init__(self, exporter=None, table_format='csv'):
+        if table_format not in TABLE_FORMATS:
+            raise ValueError(f"Неизвестный формат таблиц: {table_format}")
+        self.exporter = exporter
+        self.table_format = table_format
+        self.delimiter = TABLE_FORMATS[table_format]
+        self.open_tables = {}
+        self.tables = []  # итог по закрытым таблицам
+        self._count = 0
+
+    def on_row(self, tr, tbl):
+        """Закрылась строка w:tr таблицы tbl"""
+        table = self.open_tables.get(tbl)
+        if table is None:
+            self._count += 1
+            output = None
+            if self.exporter is not None:
+                output = self.exporter.open_text(
+                    'tables', f"table_{self._count:03d}.{self.table_format}",
+                    encoding='utf-8-sig', newline=''
+                )
+            table = _OpenTable(self._count, output, self.delimiter)
+            self.open_tables[tbl] = table
+
+        values = []
+        tr_pr = tr.find(W_TR_PR)
+        skipped = _int_val(tr_pr.find(W_GRID_BEFORE) if tr_pr is not None else None, 0)
+        values.extend([""] * skipped)
+
+        for tc in tr.iter(W_TC):
+            tc_pr = tc.find(W_TC_PR)
+            span = 1
+            v_merge = None
+            if tc_pr is not None:
+                span = max(1, _int_val(tc_pr.find(W_GRID_SPAN), 1))
+                v_merge = tc_pr.find(W_V_MERGE)
+
+            if v_merge is not None and v_merge.get(W_VAL, 'continue') != 'restart':
+                # Продолжение вертикального объединения - значение из строки выше
+                column = len(values)
+                text = table.previous[column] if column < len(table.previous) else ""
+            elif table.writer is not None:
+                text = cell_text(tc)
+            else:
+                text = ""
+
+            values.extend([text] * span)
+
+        table.rows += 1
+        table.columns = max(table.columns, len(values))
+        table.previous = values
+        if table.writer is not None:
+            table.writer.writerow(values)
+
+    def on_table_end(self, tbl):
+        """Закрылась таблица tbl; возвращает итог по ней"""
+        table = self.open_tables.pop(tbl, None)
+        if table is None:
+            # Таблица без строк
+            self._count += 1
+            table = _OpenTable(self._count)
+
+        info = {'table': table.number, 'rows': table.rows, 'columns': table.columns}
+        if table.output is not None:
+            table.output.commit()
+            info['file'] = table.output.name
+        self.tables.append(info)
+        return info
+
+    def summary(self):
+        """Итог по таблицам в порядке их появления в документе"""
+        return sorted(self.tables, key=lambda info: info['table'])
+
+    def close(self):
+        """Выбросить недописанные файлы (например, при ошибке разбора)"""
+        for table in self.open_tables.values():
+            if table.output is not None:
+                table.output.discard()
+        self.open_tables.clear()
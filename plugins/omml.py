@@ -0,0 +1,222 @@
+# plugins/omml.py
+"""Формулы Office Math (OMML) -> LaTeX или линейный текст
+
+Формулы Word хранятся в document.xml как m:oMath (несколько формул
+в одном блоке - m:oMathPara). Преобразование работает с уже
+разобранным элементом m:oMath, поэтому вызывается прямо из потокового
+прохода, без повторного чтения документа.
+"""
+
+M_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/math'
+M = '{%s}' % M_NS
+M_VAL = M + 'val'
+
+FORMULA_FORMATS = {'latex': 'tex', 'linear': 'txt'}
+
+# Самые частые символы формул; остальное остается как есть (Unicode)
+LATEX_SYMBOLS = {
+    'α': r'\alpha', 'β': r'\beta', 'γ': r'\gamma', 'δ': r'\delta', 'ε': r'\varepsilon',
+    'ζ': r'\zeta', 'η': r'\eta', 'θ': r'\theta', 'λ': r'\lambda', 'μ': r'\mu',
+    'ν': r'\nu', 'ξ': r'\xi', 'π': r'\pi', 'ρ': r'\rho', 'σ': r'\sigma',
+    'τ': r'\tau', 'φ': r'\varphi', 'χ': r'\chi', 'ψ': r'\psi', 'ω': r'\omega',
+    'Γ': r'\Gamma', 'Δ': r'\Delta', 'Θ': r'\Theta', 'Λ': r'\Lambda', 'Π': r'\Pi',
+    'Σ': r'\Sigma', 'Φ': r'\Phi', 'Ψ': r'\Psi', 'Ω': r'\Omega',
+    '±': r'\pm', '∓': r'\mp', '×': r'\times', '·': r'\cdot', '÷': r'\div',
+    '≤': r'\le', '≥': r'\ge', '≠': r'\ne', '≈': r'\approx', '≡': r'\equiv',
+    '∞': r'\infty', '∂': r'\partial', '∇': r'\nabla', '→': r'\to', '∈': r'\in',
+    '∑': r'\sum', '∏': r'\prod', '∫': r'\int', '∬': r'\iint', '∮': r'\oint',
+}
+
+# Специальные символы LaTeX в обычном тексте формулы
+LATEX_ESCAPES = {
+    '\\': r'\backslash ', '%': r'\%', '#': r'\#', '&': r'\&', '_': r'\_',
+    '{': r'\{', '}': r'\}', '$': r'\$', '^': r'\hat{}', '~': r'\sim ',
+}
+
+# Имена функций, для которых в LaTeX есть своя команда; остальные
+# (tg, ctg, arctg, sh, ch...) выводятся через \operatorname
+LATEX_OPERATORS = frozenset((
+    'sin', 'cos', 'tan', 'cot', 'sec', 'csc', 'arcsin', 'arccos', 'arctan',
+    'sinh', 'cosh', 'tanh', 'coth', 'log', 'ln', 'lg', 'exp', 'lim', 'liminf', 'limsup',
+    'max', 'min', 'sup', 'inf', 'det', 'dim', 'ker', 'deg', 'arg', 'gcd', 'hom', 'Pr',
+))
+
+NARY_LINEAR = {'∑': 'sum', '∏': 'prod', '∫': 'int', '∬': 'iint', '∮': 'oint'}
+
+ACCENTS_LATEX = {'̂': r'\hat', '̃': r'\tilde', '̄': r'\bar', '⃗': r'\vec', '̇': r'\dot', '̈': r'\ddot'}
+
+
+def _prop(elem, container, name, default=None):
+    """Значение свойства вида <m:xxxPr><m:name m:val="..."/></m:xxxPr>"""
+    pr = elem.find(M + container)
+    if pr is None:
+        return default
+    node = pr.find(M + name)
+    if node is None:
+        return default
+    return node.get(M_VAL, default)
+
+
+class OmmlConverter:
+    """Рекурсивный обход m:oMath с выводом в LaTeX ('latex') или текст ('linear')"""
+
+    def __init__(self, output_format='latex'):
+        if output_format not in FORMULA_FORMATS:
+            raise ValueError(f"Неизвестный формат формул: {output_format}")
+        self.latex = output_format == 'latex'
+
+    def convert(self, omath):
+        """Строка для одной формулы m:oMath"""
+        return self._children(omath).strip()
+
+    def _children(self, elem):
+        return ''.join(self._node(child) for child in elem)
+
+    def _part(self, elem, name):
+        child = elem.find(M + name)
+        return self._children(child) if child is not None else ''
+
+    def _group(self, text):
+        if self.latex:
+            return '{' + text + '}'
+        return text if len(text) <= 1 else '(' + text + ')'
+
+    def _text(self, text):
+        if not self.latex:
+            return text
+        return ''.join(LATEX_ESCAPES.get(ch) or (LATEX_SYMBOLS.get(ch, ch) + (' ' if ch in LATEX_SYMBOLS else ''))
+                       for ch in text)
+
+    def _operator(self, fname):
+        """Имя функции в LaTeX: \\sin для известных, \\operatorname{tg} для остальных"""
+        if fname in LATEX_OPERATORS:
+            return '\\' + fname
+        if fname.isalpha():
+            return r'\operatorname{%s}' % fname
+        return fname
+
+    def _node(self, elem):
+        tag = elem.tag
+        if not isinstance(tag, str) or not tag.startswith(M):
+            # w:r внутри формулы и прочие не-math узлы - берем только текст
+            return ''.join(self._text(t) for t in elem.itertext())
+        name = tag[len(M):]
+
+        if name == 'r':
+            return ''.join(self._text(t.text or '') for t in elem.iter(M + 't'))
+        if name == 't':
+            return self._text(elem.text or '')
+        if name.endswith('Pr') or name in ('ctrlPr', 'argPr'):
+            return ''
+
+        if name == 'f':
+            num, den = self._part(elem, 'num'), self._part(elem, 'den')
+            if self.latex:
+                return r'\frac{%s}{%s}' % (num, den)
+            return f'{self._group(num)}/{self._group(den)}'
+        if name == 'sSup':
+            return self._part(elem, 'e') + '^' + self._group(self._part(elem, 'sup'))
+        if name == 'sSub':
+            return self._part(elem, 'e') + '_' + self._group(self._part(elem, 'sub'))
+        if name == 'sSubSup':
+            return (self._part(elem, 'e') + '_' + self._group(self._part(elem, 'sub'))
+                    + '^' + self._group(self._part(elem, 'sup')))
+        if name == 'sPre':
+            return ('{}_' + self._group(self._part(elem, 'sub')) + '^'
+                    + self._group(self._part(elem, 'sup')) + self._part(elem, 'e'))
+        if name == 'rad':
+            deg, base = self._part(elem, 'deg'), self._part(elem, 'e')
+            if self.latex:
+                return (r'\sqrt[%s]{%s}' % (deg, base)) if deg else (r'\sqrt{%s}' % base)
+            return (f'root({deg}, {base})') if deg else f'sqrt({base})'
+        if name == 'd':
+            return self._delimiter(elem)
+        if name == 'nary':
+            return self._nary(elem)
+        if name == 'func':
+            fname, arg = self._part(elem, 'fName'), self._part(elem, 'e')
+            if self.latex:
+                return self._operator(fname) + '{' + arg + '}'
+            return f'{fname}({arg})'
+        if name == 'acc':
+            char = _prop(elem, 'accPr', 'chr', '̂')
+            base = self._part(elem, 'e')
+            if self.latex:
+                return ACCENTS_LATEX.get(char, r'\hat') + '{' + base + '}'
+            return f'{base}{char}'
+        if name == 'bar':
+            base = self._part(elem, 'e')
+            return (r'\overline{%s}' % base) if self.latex else f'overline({base})'
+        if name in ('limLow', 'limUpp'):
+            base, lim = self._part(elem, 'e'), self._part(elem, 'lim')
+            mark = '_' if name == 'limLow' else '^'
+            if self.latex and base in LATEX_OPERATORS:
+                base = '\\' + base
+            return base + mark + self._group(lim)
+        if name == 'groupChr':
+            return self._part(elem, 'e')
+        if name == 'm':
+            rows = [[self._children(e) for e in mr.findall(M + 'e')] for mr in elem.findall(M + 'mr')]
+            if self.latex:
+                return r'\begin{matrix}' + r' \\ '.join(' & '.join(r) for r in rows) + r'\end{matrix}'
+            return '[' + '; '.join(', '.join(r) for r in rows) + ']'
+        if name == 'eqArr':
+            lines = [self._children(e) for e in elem.findall(M + 'e')]
+            if self.latex:
+                return r'\begin{aligned}' + r' \\ '.join(lines) + r'\end{aligned}'
+            return '\n'.join(lines)
+
+        # m:e, m:num, m:box, m:borderBox, m:oMathPara и т.п. - просто содержимое
+        return self._children(elem)
+
+    def _delimiter(self, elem):
+        beg = _prop(elem, 'dPr', 'begChr', '(')
+        end = _prop(elem, 'dPr', 'endChr', ')')
+        sep = _prop(elem, 'dPr', 'sepChr', '|')
+        inner = (sep if not self.latex else ' ' + sep + ' ').join(
+            self._children(e) for e in elem.findall(M + 'e')
+        )
+        if self.latex:
+            left = {'{': r'\{', '': '.'}.get(beg, beg)
+            right = {'}': r'\}', '': '.'}.get(end, end)
+            return r'\left' + left + inner + r'\right' + right
+        return beg + inner + end
+
+    def _nary(self, elem):
+        char = _prop(elem, 'naryPr', 'chr', '∫')
+        sub, sup, body = self._part(elem, 'sub'), self._part(elem, 'sup'), self._part(elem, 'e')
+        if self.latex:
+            out = LATEX_SYMBOLS.get(char, char)
+            if sub:
+                out += '_{' + sub + '}'
+            if sup:
+                out += '^{' + sup + '}'
+            return out + ' ' + body
+        out = NARY_LINEAR.get(char, char)
+        limits = ', '.join(x for x in (sub, sup) if x)
+        return f'{out}[{limits}]({body})' if limits else f'{out}({body})'
+
+
+class FormulaCollector:
+    """Получает формулы от потокового разбора; с exporter пишет каждую в свой файл"""
+
+    def __init__(self, exporter=None, output_format='latex'):
+        self.exporter = exporter
+        self.converter = OmmlConverter(output_format)
+        self.extension = FORMULA_FORMATS[output_format]
+        self.count = 0
+        self.samples = []  # первые несколько формул - для просмотра в результатах
+
+    def on_formula(self, omath):
+        """Закрылась формула m:oMath; возвращает путь выгруженного файла или None"""
+        self.count += 1
+        if self.exporter is None and len(self.samples) >= 5:
+            return None
+
+        text = self.converter.convert(omath)
+        if len(self.samples) < 5:
+            self.samples.append(text)
+
+        if self.exporter is None:
+            return None
+        return self.exporter.write_text('formulas', f"formula_{self.count:03d}.{self.extension}", text + "\n")
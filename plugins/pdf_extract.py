@@ -0,0 +1,183 @@
+# plugins/pdf_extract.py
+"""Полное извлечение текста PDF параллельно по диапазонам страниц
+
+Диапазон страниц делится на куски, каждый кусок обрабатывает отдельный
+процесс, который сам открывает файл (объекты PyPDF2 между процессами
+не передаются). Куски собираются строго по порядку страниц и могут
+сразу записываться на диск, не дожидаясь конца всего документа.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from core.memory import active_limit, check_memory, memory_limit_for
+
+MIN_CHUNK_PAGES = 8
+MAX_CHUNK_PAGES = 64
+
+# Атрибуты, которые страница наследует от узлов /Pages (PDF 32000, 7.7.3.4)
+INHERITED_PAGE_KEYS = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+def page_header(page_index):
+    """Заголовок страницы в извлеченном тексте"""
+    return f"--- Страница {page_index + 1} ---"
+
+
+def _walk_pages(pdf_reader, ref, inherit, position, start, stop, seen):
+    """Страницы [start, stop) поддерева ref; возвращает номер следующей страницы
+
+    Наследуемые атрибуты узлов /Pages переносятся в копию страницы, сам
+    узел не меняется. Поддеревья целиком до start пропускаются по /Count
+    без разбора их страниц.
+    """
+    from PyPDF2 import PageObject
+    from PyPDF2.generic import IndirectObject, NameObject
+
+    node = ref.get_object()
+    if "/Kids" not in node:
+        if position >= start:
+            page = PageObject(pdf_reader, ref if isinstance(ref, IndirectObject) else None)
+            page.update(node)
+            for key, value in inherit.items():
+                if key not in page:
+                    page[NameObject(key)] = value
+            yield page
+        return position + 1
+
+    if "/Count" in node and isinstance(node["/Count"], int) and position + node["/Count"] <= start:
+        return position + node["/Count"]
+
+    if isinstance(ref, IndirectObject):
+        if ref.idnum in seen:
+            raise ValueError(f"Цикл в дереве страниц (объект {ref.idnum})")
+        seen.add(ref.idnum)
+
+    inherit = dict(inherit)
+    inherit.update((key, node[key]) for key in INHERITED_PAGE_KEYS if key in node)
+    for kid in node["/Kids"]:
+        if position >= stop:
+            break
+        position = yield from _walk_pages(pdf_reader, kid, inherit, position, start, stop, seen)
+    return position
+
+
+def iter_pages(pdf_reader, start, stop):
+    """Объекты страниц [start, stop) обходом дерева /Kids
+
+    В отличие от pdf_reader.pages не строит список всех страниц документа
+    и не держит ссылок на уже пройденные: страница живет, пока с ней
+    работает вызывающий.
+    """
+    root = pdf_reader.trailer["/Root"].get_object().raw_get("/Pages")
+    return _walk_pages(pdf_reader, root, {}, 0, start, stop, set())
+
+
+def iter_range(file_path, start, stop, release=False):
+    """Текст страниц [start, stop) по одной странице
+
+    release=True - после каждой страницы выбрасывать разобранные объекты
+    PyPDF2 (шрифты, потоки содержимого): память не растет с числом
+    страниц, но общие ресурсы разбираются заново для каждой страницы.
+    """
+    import PyPDF2
+
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        pages = iter_pages(pdf_reader, start, stop)
+        for i in range(start, stop):
+            page = next(pages, None)
+            if page is None:
+                # В дереве страниц меньше, чем было заявлено
+                return
+            try:
+                text = page.extract_text() or ""
+            except MemoryError:
+                raise
+            except Exception as e:
+                # Одна битая страница не должна ронять весь документ
+                text = f"[Ошибка извлечения текста: {str(e)}]"
+            page = None
+            if release:
+                pdf_reader.resolved_objects.clear()
+            check_memory(f"страница {i + 1}")
+            yield text
+
+
+def extract_range(file_path, start, stop, memory_limit_mb=None):
+    """Текст страниц [start, stop) - выполняется в процессе-воркере"""
+    with memory_limit_for(memory_limit_mb) or nullcontext():
+        return list(iter_range(file_path, start, stop))
+
+
+def split_pages(page_count, workers, chunk_pages=None):
+    """Разбить страницы на диапазоны: по несколько кусков на процесс для балансировки"""
+    if chunk_pages is None:
+        chunk_pages = -(-page_count // (workers * 4)) if workers else page_count
+        chunk_pages = max(MIN_CHUNK_PAGES, min(MAX_CHUNK_PAGES, chunk_pages))
+    return [(start, min(start + chunk_pages, page_count))
+            for start in range(0, page_count, chunk_pages)]
+
+
+def iter_page_texts(file_path, page_count, workers=None, chunk_pages=None, release=False):
+    """Пары (номер страницы, текст) строго по порядку страниц
+
+    release=True - потоковый режим для огромных файлов: страницы по одной
+    в этом же процессе, разобранные объекты сразу освобождаются.
+    """
+    if release:
+        for offset, text in enumerate(iter_range(file_path, 0, page_count, release=True)):
+            yield offset, text
+        return
+
+    workers = workers or os.cpu_count() or 1
+    ranges = split_pages(page_count, workers, chunk_pages)
+
+    if workers == 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            for offset, text in enumerate(iter_range(file_path, start, stop)):
+                yield start + offset, text
+        return
+
+    # Потолок памяти действует и в процессах, которые разбирают куски страниц
+    limit = active_limit()
+    limit_mb = limit.limit_mb if limit is not None else None
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [(start, pool.submit(extract_range, file_path, start, stop, limit_mb))
+                   for start, stop in ranges]
+        # Ждем куски по порядку: остальные в это время уже обрабатываются
+        for start, future in futures:
+            for offset, text in enumerate(future.result()):
+                yield start + offset, text
+
+
+def _notify(pages, on_page):
+    for i, text in pages:
+        on_page(i, text)
+        yield i, text
+
+
+def extract_full_text(file_path, page_count, out=None, workers=None, chunk_pages=None, release=False,
+                      on_page=None):
+    """Весь текст PDF
+
+    Если указан out (открытый текстовый файл) - текст пишется туда
+    постранично и в памяти не копится; возвращается количество символов.
+    Иначе возвращается сам текст. on_page(номер, текст) вызывается для
+    каждой страницы по порядку - например, чтобы собрать превью, не
+    извлекая первые страницы еще раз.
+    """
+    pages = iter_page_texts(file_path, page_count, workers, chunk_pages, release)
+    if on_page is not None:
+        pages = _notify(pages, on_page)
+
+    if out is None:
+        return "\n\n".join(f"{page_header(i)}\n{text}" for i, text in pages)
+
+    chars = 0
+    for i, text in pages:
+        block = f"{page_header(i)}\n{text}\n\n"
+        out.write(block)
+        chars += len(block)
+    return chars
@@ -0,0 +1,469 @@
+# plugins/pdf_meta.py
+"""Быстрое чтение метаданных PDF без разбора страниц
+
+Для сортировки архива нужны только число страниц, автор, название и
+шифрование. PdfReader ради этого строит дерево страниц, а здесь файл
+отображается в память (mmap) и читаются только:
+
+    startxref -> таблица xref (или xref-поток) -> trailer
+    /Root -> /Pages -> /Count         (число страниц без обхода дерева)
+    /Info -> /Author, /Title
+
+Поддерживаются классические таблицы xref, xref-потоки PDF 1.5 (в том
+числе с PNG-предикторами), объекты внутри объектных потоков и цепочки
+/Prev инкрементальных сохранений. Зашифрованные файлы и все, что
+разобрать не удалось, сообщаются исключением PdfMetaError - вызывающий
+код переходит на PyPDF2.
+"""
+
+import mmap
+import re
+import zlib
+
+TAIL_SIZE = 2048
+
+_WHITESPACE = b" \t\r\n\f\x00"
+_DELIMITERS = b"()<>[]{}/%"
+_NUMBER_RE = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_REF_RE = re.compile(rb"\s*(\d+)\s+(\d+)\s+R")
+_OBJ_RE = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj")
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)")
+_SUBSECTION_RE = re.compile(rb"\s*(\d+)\s+(\d+)[ \t]*\r?\n?")
+
+# PDFDocEncoding отличается от Latin-1 в 0x18-0x1F, 0x80-0x9F и 0xA0
+# (ISO 32000-1, приложение D.2)
+_PDFDOC_DIFFERENCES = str.maketrans({
+    0x18: "\u02d8", 0x19: "\u02c7", 0x1A: "\u02c6", 0x1B: "\u02d9",
+    0x1C: "\u02dd", 0x1D: "\u02db", 0x1E: "\u02da", 0x1F: "\u02dc",
+    0x80: "\u2022", 0x81: "\u2020", 0x82: "\u2021", 0x83: "\u2026",
+    0x84: "\u2014", 0x85: "\u2013", 0x86: "\u0192", 0x87: "\u2044",
+    0x88: "\u2039", 0x89: "\u203a", 0x8A: "\u2212", 0x8B: "\u2030",
+    0x8C: "\u201e", 0x8D: "\u201c", 0x8E: "\u201d", 0x8F: "\u2018",
+    0x90: "\u2019", 0x91: "\u201a", 0x92: "\u2122", 0x93: "\ufb01",
+    0x94: "\ufb02", 0x95: "\u0141", 0x96: "\u0152", 0x97: "\u0160",
+    0x98: "\u0178", 0x99: "\u017d", 0x9A: "\u0131", 0x9B: "\u0142",
+    0x9C: "\u0153", 0x9D: "\u0161", 0x9E: "\u017e", 0xA0: "\u20ac",
+})
+
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b",
+            ord("f"): b"\f", ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+
+
+def _at(data, pos, token):
+    """Стоит ли token в позиции pos (у mmap нет startswith)"""
+    return data[pos:pos + len(token)] == token
+
+
+class PdfMetaError(Exception):
+    """Структура PDF не поддерживается быстрым чтением"""
+
+
+class Ref:
+    """Косвенная ссылка "n g R" """
+
+    __slots__ = ("number", "generation")
+
+    def __init__(self, number, generation):
+        self.number = number
+        self.generation = generation
+
+
+class _Parser:
+    """Разбор одного объекта PDF (словари, массивы, строки, числа, ссылки)"""
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def skip_space(self):
+        data = self.data
+        while self.pos < len(data):
+            ch = data[self.pos]
+            if ch in _WHITESPACE:
+                self.pos += 1
+            elif ch == 0x25:  # % - комментарий до конца строки
+                while self.pos < len(data) and data[self.pos] not in b"\r\n":
+                    self.pos += 1
+            else:
+                break
+
+    def parse(self):
+        self.skip_space()
+        data = self.data
+        if self.pos >= len(data):
+            raise PdfMetaError("Неожиданный конец данных")
+        ch = data[self.pos]
+
+        if _at(data, self.pos, b"<<"):
+            return self._dict()
+        if ch == 0x3C:  # <
+            return self._hex_string()
+        if ch == 0x28:  # (
+            return self._literal_string()
+        if ch == 0x2F:  # /
+            return self._name()
+        if ch == 0x5B:  # [
+            self.pos += 1
+            items = []
+            while True:
+                self.skip_space()
+                if data[self.pos:self.pos + 1] == b"]":
+                    self.pos += 1
+                    return items
+                items.append(self.parse())
+
+        ref = _REF_RE.match(data, self.pos)
+        if ref:
+            self.pos = ref.end()
+            return Ref(int(ref.group(1)), int(ref.group(2)))
+        number = _NUMBER_RE.match(data, self.pos)
+        if number:
+            self.pos = number.end()
+            text = number.group()
+            return float(text) if b"." in text else int(text)
+
+        word = self._word()
+        if word == b"true":
+            return True
+        if word == b"false":
+            return False
+        if word == b"null":
+            return None
+        raise PdfMetaError(f"Неизвестный токен: {word[:20]!r}")
+
+    def _word(self):
+        start = self.pos
+        data = self.data
+        while self.pos < len(data) and data[self.pos] not in _WHITESPACE \
+                and data[self.pos] not in _DELIMITERS:
+            self.pos += 1
+        return bytes(data[start:self.pos])
+
+    def _name(self):
+        self.pos += 1
+        raw = self._word()
+        # #xx - шестнадцатеричный код символа в имени
+        return "/" + re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]),
+                            raw).decode('latin-1')
+
+    def _dict(self):
+        self.pos += 2
+        result = {}
+        while True:
+            self.skip_space()
+            if _at(self.data, self.pos, b">>"):
+                self.pos += 2
+                return result
+            key = self.parse()
+            if not isinstance(key, str):
+                raise PdfMetaError("Ключ словаря - не имя")
+            result[key] = self.parse()
+
+    def _hex_string(self):
+        end = self.data.find(b">", self.pos)
+        if end < 0:
+            raise PdfMetaError("Незакрытая hex-строка")
+        digits = re.sub(rb"\s+", b"", bytes(self.data[self.pos + 1:end]))
+        self.pos = end + 1
+        if len(digits) % 2:
+            digits += b"0"
+        return bytes.fromhex(digits.decode('ascii'))
+
+    def _literal_string(self):
+        data = self.data
+        self.pos += 1
+        depth = 1
+        out = bytearray()
+        while self.pos < len(data):
+            ch = data[self.pos]
+            self.pos += 1
+            if ch == 0x5C:  # обратная косая черта
+                nxt = data[self.pos]
+                self.pos += 1
+                if nxt in _ESCAPES:
+                    out += _ESCAPES[nxt]
+                elif 0x30 <= nxt <= 0x37:
+                    digits = bytes([nxt])
+                    while len(digits) < 3 and 0x30 <= data[self.pos] <= 0x37:
+                        digits += bytes([data[self.pos]])
+                        self.pos += 1
+                    out.append(int(digits, 8) & 0xFF)
+                elif nxt == 0x0D:
+                    if data[self.pos] == 0x0A:
+                        self.pos += 1
+                elif nxt != 0x0A:
+                    out.append(nxt)
+                continue
+            if ch == 0x28:
+                depth += 1
+            elif ch == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return bytes(out)
+            out.append(ch)
+        raise PdfMetaError("Незакрытая строка")
+
+
+def decode_text(value):
+    """Текстовая строка PDF -> str (UTF-16 с BOM, UTF-8 с BOM или PDFDocEncoding)"""
+    if isinstance(value, str):
+        return value
+    if value.startswith(b"\xfe\xff"):
+        return value[2:].decode('utf-16-be', 'replace')
+    if value.startswith(b"\xff\xfe"):
+        return value[2:].decode('utf-16-le', 'replace')
+    if value.startswith(b"\xef\xbb\xbf"):
+        return value[3:].decode('utf-8', 'replace')
+    # PDFDocEncoding: Latin-1, кроме нескольких диапазонов (кавычки, тире, лигатуры)
+    return value.decode('latin-1').translate(_PDFDOC_DIFFERENCES)
+
+
+def _png_unpredict(data, columns):
+    """Снять PNG-предиктор (обычно Up) со строк xref-потока"""
+    row_size = columns + 1
+    previous = bytearray(columns)
+    out = bytearray()
+    for start in range(0, len(data), row_size):
+        kind = data[start]
+        row = bytearray(data[start + 1:start + row_size])
+        if kind == 2:
+            for i in range(len(row)):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind == 1:
+            for i in range(1, len(row)):
+                row[i] = (row[i] + row[i - 1]) & 0xFF
+        elif kind != 0:
+            raise PdfMetaError(f"PNG-предиктор {kind} не поддерживается")
+        out += row
+        previous = row
+    return bytes(out)
+
+
+class PdfMeta:
+    """Доступ к объектам PDF через xref по отображенному в память файлу"""
+
+    def __init__(self, data):
+        self.data = data
+        # Разделы xref от нового сохранения к старому: подразделы классической
+        # таблицы (start, count, pos, hybrid) читаются по запросу, xref-потоки -
+        # словари; hybrid - записи /XRefStm того же сохранения или None
+        self.sections = []
+        self.trailer = {}
+        self._objstm_cache = {}
+        self._read_xref_chain()
+
+    def _read_xref_chain(self):
+        tail = self.data[max(0, len(self.data) - TAIL_SIZE):]
+        matches = list(_STARTXREF_RE.finditer(tail))
+        if not matches:
+            raise PdfMetaError("Не найден startxref")
+        offset = int(matches[-1].group(1))
+
+        seen = set()
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            if _at(self.data, offset, b"xref"):
+                subsections, trailer = self._read_xref_table(offset)
+                # Гибридные файлы: классическая таблица + xref-поток для объектов,
+                # которые читатели без xref-потоков должны видеть свободными
+                hybrid = None
+                stm = trailer.get("/XRefStm")
+                if isinstance(stm, int) and stm not in seen:
+                    seen.add(stm)
+                    hybrid, _ = self._read_xref_stream(stm)
+                self.sections.extend((start, count, pos, hybrid) for start, count, pos in subsections)
+                if hybrid is not None:
+                    self.sections.append(hybrid)
+            else:
+                entries, trailer = self._read_xref_stream(offset)
+                self.sections.append(entries)
+            # Более новые сохранения уже прочитаны - их ключи важнее
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            prev = trailer.get("/Prev")
+            offset = prev if isinstance(prev, int) else None
+
+    def _read_xref_table(self, offset):
+        """(подразделы таблицы (start, count, pos) с записями по 20 байт, trailer)"""
+        data = self.data
+        pos = offset + 4
+        subsections = []
+        while True:
+            match = _SUBSECTION_RE.match(data, pos)
+            if not match:
+                break
+            start, count = int(match.group(1)), int(match.group(2))
+            subsections.append((start, count, match.end()))
+            pos = match.end() + count * 20
+        parser = _Parser(data, pos)
+        parser.skip_space()
+        if not _at(data, parser.pos, b"trailer"):
+            raise PdfMetaError("Не найден trailer")
+        parser.pos += 7
+        return subsections, parser.parse()
+
+    def _read_xref_stream(self, offset):
+        """(записи xref-потока {номер: запись}, нужные ключи его словаря)"""
+        stream_dict, body = self._read_stream_object(offset)
+        if stream_dict.get("/Type") != "/XRef":
+            raise PdfMetaError("По startxref нет ни таблицы, ни xref-потока")
+        widths = stream_dict["/W"]
+        size = stream_dict.get("/Size", 0)
+        index = stream_dict.get("/Index", [0, size])
+        if len(body) < sum(widths) * sum(index[1::2]):
+            raise PdfMetaError("xref-поток короче, чем заявлено")
+
+        entries = {}
+        pos = 0
+        for start, count in zip(index[0::2], index[1::2]):
+            for number in range(start, start + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(body[pos:pos + width], "big") if width else None)
+                    pos += width
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1:
+                    entries[number] = (fields[1],)
+                elif kind == 2:
+                    entries[number] = (None, fields[1], fields[2])
+                else:
+                    entries[number] = None
+        return entries, {key: value for key, value in stream_dict.items()
+                if key in ("/Root", "/Info", "/Encrypt", "/Prev", "/Size")}
+
+    def entry(self, number):
+        """Запись xref объекта: (смещение,), (None, поток, индекс) или None"""
+        for section in self.sections:
+            if isinstance(section, dict):
+                if number in section:
+                    return section[number]
+                continue
+            start, count, pos, hybrid = section
+            if start <= number < start + count:
+                raw = self.data[pos + (number - start) * 20:pos + (number - start) * 20 + 20]
+                if raw[17:18] == b"n":
+                    return (int(raw[:10]),)
+                if raw[17:18] == b"f":
+                    # В гибридном файле "свободный" объект может лежать в /XRefStm
+                    return hybrid.get(number) if hybrid is not None else None
+                raise PdfMetaError("Записи xref не по 20 байт")
+        return None
+
+    def _read_stream_object(self, offset):
+        """(словарь, распакованные данные) потокового объекта по смещению"""
+        match = _OBJ_RE.match(self.data, offset)
+        if not match:
+            raise PdfMetaError(f"Нет объекта по смещению {offset}")
+        parser = _Parser(self.data, match.end())
+        stream_dict = parser.parse()
+        parser.skip_space()
+        if not _at(self.data, parser.pos, b"stream"):
+            raise PdfMetaError("Ожидался поток")
+        start = parser.pos + 6
+        if self.data[start:start + 2] == b"\r\n":
+            start += 2
+        elif self.data[start:start + 1] in (b"\n", b"\r"):
+            start += 1
+        length = self.resolve(stream_dict.get("/Length"))
+        if not isinstance(length, int):
+            raise PdfMetaError("Нет длины потока")
+        raw = bytes(self.data[start:start + length])
+        return stream_dict, self._decode(stream_dict, raw)
+
+    def _decode(self, stream_dict, raw):
+        filters = stream_dict.get("/Filter")
+        if filters is None:
+            return raw
+        if isinstance(filters, str):
+            filters = [filters]
+        if filters != ["/FlateDecode"]:
+            raise PdfMetaError(f"Фильтр {filters} не поддерживается")
+        data = zlib.decompress(raw)
+        params = self.resolve(stream_dict.get("/DecodeParms")) or {}
+        if isinstance(params, list):
+            params = params[0] or {}
+        predictor = params.get("/Predictor", 1)
+        if predictor >= 10:
+            data = _png_unpredict(data, params.get("/Columns", 1))
+        elif predictor != 1:
+            raise PdfMetaError(f"Предиктор {predictor} не поддерживается")
+        return data
+
+    def _object_from_stream(self, stream_number, index):
+        cached = self._objstm_cache.get(stream_number)
+        if cached is None:
+            found = self.entry(stream_number)
+            if not found or found[0] is None:
+                raise PdfMetaError(f"Нет объектного потока {stream_number}")
+            stream_dict, body = self._read_stream_object(found[0])
+            count, first = stream_dict["/N"], stream_dict["/First"]
+            numbers = [int(x) for x in bytes(body[:first]).split()]
+            cached = (body, first, numbers[1:2 * count:2])
+            self._objstm_cache[stream_number] = cached
+        body, first, positions = cached
+        return _Parser(body, first + positions[index]).parse()
+
+    def get(self, number):
+        """Объект по номеру (None, если его нет)"""
+        found = self.entry(number)
+        if found is None:
+            return None
+        if found[0] is None:
+            return self._object_from_stream(found[1], found[2])
+        match = _OBJ_RE.match(self.data, found[0])
+        if not match:
+            raise PdfMetaError(f"Неверное смещение объекта {number}")
+        return _Parser(self.data, match.end()).parse()
+
+    def resolve(self, value):
+        """Разыменовать ссылку (цепочку ссылок)"""
+        depth = 0
+        while isinstance(value, Ref):
+            depth += 1
+            if depth > 32:
+                raise PdfMetaError("Зацикленные ссылки")
+            value = self.get(value.number)
+        return value
+
+
+def read_pdf_metadata(file_path):
+    """Число страниц, автор, название и шифрование PDF без разбора страниц
+
+    Возвращает словарь pages/author/title/encrypted (author/title - None,
+    если их нет). Зашифрованный файл или неподдерживаемая структура -
+    PdfMetaError.
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise PdfMetaError("Пустой файл")
+        try:
+            if not _at(data, 0, b"%PDF-"):
+                raise PdfMetaError("Нет заголовка %PDF-")
+            meta = PdfMeta(data)
+
+            if "/Encrypt" in meta.trailer:
+                # Строки и объектные потоки зашифрованы - нужен PyPDF2 с ключом
+                raise PdfMetaError("Файл зашифрован")
+            root = meta.resolve(meta.trailer.get("/Root"))
+            if not isinstance(root, dict):
+                raise PdfMetaError("Нет каталога /Root")
+            pages = meta.resolve(meta.resolve(root.get("/Pages")) or {})
+            count = meta.resolve(pages.get("/Count")) if isinstance(pages, dict) else None
+            if not isinstance(count, int):
+                raise PdfMetaError("Нет /Count в дереве страниц")
+
+            author = title = None
+            info = meta.resolve(meta.trailer.get("/Info"))
+            if isinstance(info, dict):
+                author = meta.resolve(info.get("/Author"))
+                title = meta.resolve(info.get("/Title"))
+                author = decode_text(author) if isinstance(author, (bytes, str)) else None
+                title = decode_text(title) if isinstance(title, (bytes, str)) else None
+
+            return {"pages": count, "author": author, "title": title, "encrypted": False}
+        except (IndexError, KeyError, TypeError, ValueError, zlib.error) as e:
+            raise PdfMetaError(f"Ошибка структуры PDF: {str(e)}") from e
+        finally:
+            data.close()
@@ -2,8 +2,29 @@
 """Простейший плагин для анализа PDF файлов"""
 
 import os
-import PyPDF2
 from core.plugin_base import DocumentPlugin
+from core.export import DocumentExporter
+from core.instrument import span
+from core.memory import active_limit, check_memory
+from plugins.pdf_extract import extract_full_text, page_header
+from plugins.pdf_meta import PdfMetaError, read_pdf_metadata
+
+SAMPLE_PAGES = 3
+SAMPLE_CHARS = 1000
+
+
+class TextSample:
+    """Превью текста: непустые страницы из первых SAMPLE_PAGES"""
+
+    def __init__(self):
+        self.parts = []
+
+    def add(self, page_index, text):
+        if page_index < SAMPLE_PAGES and text and text.strip():
+            self.parts.append(f"{page_header(page_index)}\n{text}")
+
+    def text(self):
+        return "\n\n".join(self.parts)[:SAMPLE_CHARS]
 
 
 class PDFPlugin(DocumentPlugin):
@@ -12,42 +33,133 @@ class PDFPlugin(DocumentPlugin):
     def __init__(self):
         super().__init__()
         self.name = "PDF Анализатор"
-        self.version = "1.0"
+        self.version = "1.3"
         self.supported_extensions = ['.pdf']
 
-    def analyze(self, file_path):
-        """Анализировать PDF файл"""
+    def analyze(self, file_path, level="standard", output_dir=None, text_workers=None, **options):
+        """Анализировать PDF файл
+
+        level="metadata" - только число страниц, автор, название и
+        шифрование, без разбора страниц (см. plugins.pdf_meta).
+
+        level="full" - извлечь текст всех страниц (параллельно, кусками
+        страниц по процессам) и вернуть его в "text". С output_dir полный
+        текст всегда выгружается в <output_dir>/<имя файла>-<хэш пути>/text/text.txt
+        вместе с manifest.json.
+
+        При потолке памяти (core.memory) большой файл разбирается по одной
+        странице в этом же процессе с освобождением объектов каждой страницы.
+        """
+        if level == "metadata":
+            return self.analyze_metadata(file_path)
+
+        limit = active_limit()
+        streaming = limit is not None and limit.streaming(file_path)
         try:
+            # PyPDF2 загружается при первом PDF, а не при старте программы
+            import PyPDF2
+
             with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
+                with span("open"):
+                    pdf_reader = PyPDF2.PdfReader(file)
+                check_memory("открытие PDF")
 
                 # Собираем статистику
-                stats = {
-                    'file_name': os.path.basename(file_path),
-                    'pages': len(pdf_reader.pages),
-                    'author': pdf_reader.metadata.get('/Author', 'Не указан') if pdf_reader.metadata else 'Не указан',
-                    'title': pdf_reader.metadata.get('/Title',
-                                                     'Без названия') if pdf_reader.metadata else 'Без названия',
-                    'encrypted': pdf_reader.is_encrypted
-                }
-
-                # Извлекаем текст с первых 3 страниц
-                text_parts = []
-                for i, page in enumerate(pdf_reader.pages[:3]):
-                    text = page.extract_text()
-                    if text.strip():
-                        text_parts.append(f"--- Страница {i + 1} ---\n{text}")
+                with span("metadata"):
+                    stats = self.reader_stats(file_path, pdf_reader)
 
-                text_sample = "\n\n".join(text_parts)[:1000]
+                # Без выгрузки и полного текста превью - только первые страницы
+                sample = TextSample()
+                if not output_dir and level != "full":
+                    with span("text"):
+                        for i, page in enumerate(pdf_reader.pages[:SAMPLE_PAGES]):
+                            sample.add(i, page.extract_text())
 
-                return {
+                result = {
                     "status": "success",
                     "stats": stats,
-                    "text_sample": text_sample
+                    "text_sample": ""
                 }
 
+            # Иначе превью собирается из полного текста по ходу извлечения
+            if output_dir:
+                with span("export"):
+                    self.export(file_path, stats['pages'], result, output_dir, text_workers, streaming,
+                                on_page=sample.add)
+            elif level == "full":
+                with span("text"):
+                    text = extract_full_text(file_path, stats['pages'], workers=text_workers,
+                                             release=streaming, on_page=sample.add)
+                stats["text_chars"] = len(text)
+                result["text"] = text
+            result["text_sample"] = sample.text()
+
+            if streaming:
+                stats["streaming"] = True
+            return result
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Ошибка при анализе PDF: {str(e)}"
+            }
+
+    @staticmethod
+    def reader_stats(file_path, pdf_reader):
+        """Статистика документа по открытому PdfReader"""
+        return {
+            'file_name': os.path.basename(file_path),
+            'pages': len(pdf_reader.pages),
+            'author': str(pdf_reader.metadata.get('/Author', 'Не указан')) if pdf_reader.metadata else 'Не указан',
+            'title': str(pdf_reader.metadata.get('/Title',
+                                                 'Без названия')) if pdf_reader.metadata else 'Без названия',
+            'encrypted': pdf_reader.is_encrypted
+        }
+
+    def analyze_metadata(self, file_path):
+        """Только метаданные: trailer, xref и /Info напрямую из файла
+
+        Зашифрованные и необычные файлы читаются через PyPDF2, но тоже
+        без извлечения текста.
+        """
+        try:
+            with span("metadata"):
+                try:
+                    meta = read_pdf_metadata(file_path)
+                except PdfMetaError:
+                    import PyPDF2
+
+                    with open(file_path, 'rb') as file:
+                        stats = self.reader_stats(file_path, PyPDF2.PdfReader(file))
+                else:
+                    stats = {
+                        'file_name': os.path.basename(file_path),
+                        'pages': meta['pages'],
+                        'author': meta['author'] if meta['author'] is not None else 'Не указан',
+                        'title': meta['title'] if meta['title'] is not None else 'Без названия',
+                        'encrypted': meta['encrypted']
+                    }
+            return {"status": "success", "level": "metadata", "stats": stats}
+
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"Ошибка при анализе PDF: {str(e)}"
-            }
\ No newline at end of file
+            }
+
+    def export(self, file_path, page_count, result, output_dir, workers=None, release=False, on_page=None):
+        """Выгрузить полный текст в папку документа и записать манифест"""
+        exporter = DocumentExporter(output_dir, file_path)
+        try:
+            with span("text"), exporter.open_text('text', 'text.txt') as out:
+                result["stats"]["text_chars"] = extract_full_text(
+                    file_path, page_count, out=out, workers=workers, release=release, on_page=on_page
+                )
+            result["output_folder"] = exporter.root
+            result["manifest"] = exporter.finish({
+                "plugin": self.name,
+                "plugin_version": self.version,
+                "stats": result["stats"]
+            })
+        finally:
+            exporter.close()
@@ -0,0 +1,43 @@
+# tests/test_batch.py
+"""Пакетный анализ (core.batch): сбой кэша не превращает готовый результат в ошибку"""
+
+import sqlite3
+
+import pytest
+
+from benchmarks.corpus import write_docx
+from core.batch import iter_batch
+
+
+class LockedCache:
+    """Кэш, в который ничего нельзя записать (база заблокирована)"""
+
+    def __init__(self):
+        self.attempts = 0
+
+    def get(self, file_path, plugin, options=None):
+        return None
+
+    def previous(self, file_path, plugin, options=None):
+        return None
+
+    def put(self, file_path, plugin, result, options=None):
+        self.attempts += 1
+        raise sqlite3.OperationalError("database is locked")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cache_failure_keeps_result(tmp_path, capsys, workers):
+    files = []
+    for number in range(3):
+        path = str(tmp_path / f"doc{number}.docx")
+        write_docx(path, 10, seed=number)
+        files.append(path)
+
+    cache = LockedCache()
+    results = list(iter_batch(files, workers=workers, cache=cache))
+
+    assert sorted(result["file"] for result in results) == files
+    assert [result["status"] for result in results] == ["success"] * 3
+    assert cache.attempts == 3
+    assert "не сохранен в кэш" in capsys.readouterr().err
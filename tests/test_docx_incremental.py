@@ -0,0 +1,116 @@
+# tests/test_docx_incremental.py
+"""Повторный анализ DOCX только по изменившимся частям (plugins/docx_incremental.py)"""
+
+import json
+import os
+import zipfile
+
+import pytest
+
+from benchmarks.corpus import write_docx
+from plugins.docx_plugin import DocxPlugin
+
+OLD_TIME = 1_000_000_000
+
+# Группа -> (часть архива, правка ее содержимого)
+EDITS = {
+    "body": ("word/document.xml", lambda data: data.replace("поверка".encode(), "ПОВЕРКА".encode(), 1)),
+    "media": ("word/media/image1.png", lambda data: data + b"\x00"),
+    "core": ("docProps/core.xml", lambda data: data.replace("Бенчмарк".encode(), "Иванов".encode())),
+    "structure": ("[Content_Types].xml", lambda data: data.replace(b"</Types>", b" </Types>")),
+}
+
+
+def edit_part(path, name, change):
+    """Переписать архив с измененной частью name (как Word - весь zip заново)"""
+    with zipfile.ZipFile(path) as zf:
+        entries = [(info, zf.read(info)) for info in zf.infolist()]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for info, data in entries:
+            new_data = change(data) if info.filename == name else data
+            if info.filename == name:
+                assert new_data != data
+            zf.writestr(info, new_data)
+
+
+def artifact_times(manifest_path):
+    """{путь выгруженного файла: mtime} по манифесту"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    root = os.path.dirname(manifest_path)
+    return {a["path"]: os.stat(os.path.join(root, *a["path"].split("/"))).st_mtime_ns
+            for a in manifest["artifacts"]}, manifest
+
+
+@pytest.fixture
+def docx(tmp_path):
+    path = tmp_path / "doc.docx"
+    write_docx(path, 40, tables=1, images=2)
+    return str(path)
+
+
+@pytest.mark.parametrize("group", ["body", "media", "core"])
+def test_only_changed_group_is_reparsed(docx, group):
+    plugin = DocxPlugin()
+    previous = plugin.analyze(docx)
+    assert previous["status"] == "success"
+
+    unchanged = plugin.analyze(docx, previous=previous)
+    assert unchanged["incremental"] == {"changed": [], "reused": ["body", "media", "core"]}
+
+    edit_part(docx, *EDITS[group])
+    result = plugin.analyze(docx, previous=previous)
+    assert result["incremental"]["changed"] == [group]
+    assert group not in result["incremental"]["reused"]
+    assert len(result["incremental"]["reused"]) == 2
+
+    # Собранное из прошлого результата совпадает с полным разбором
+    full = plugin.analyze(docx)
+    assert result["stats"] == full["stats"]
+    assert result["text_sample"] == full["text_sample"]
+    assert result["parts"] == full["parts"]
+
+
+def test_structure_change_reparses_everything(docx):
+    plugin = DocxPlugin()
+    previous = plugin.analyze(docx)
+    edit_part(docx, *EDITS["structure"])
+    result = plugin.analyze(docx, previous=previous)
+    assert "incremental" not in result
+    assert result["stats"] == plugin.analyze(docx)["stats"]
+
+
+def test_unchanged_artifacts_are_reused(docx, tmp_path):
+    plugin = DocxPlugin()
+    output_dir = str(tmp_path / "out")
+    manifest_path = plugin.analyze(docx, output_dir=output_dir)["manifest"]
+
+    def rerun(group):
+        # Старое время у всех файлов: переписанный файл его потеряет
+        times, _ = artifact_times(manifest_path)
+        root = os.path.dirname(manifest_path)
+        for path in times:
+            os.utime(os.path.join(root, *path.split("/")), ns=(OLD_TIME, OLD_TIME))
+        edit_part(docx, *EDITS[group])
+        result = plugin.analyze(docx, output_dir=output_dir)
+        assert result["status"] == "success"
+        times, manifest = artifact_times(manifest_path)
+        rewritten = {path.split("/")[0] for path, mtime in times.items() if mtime != OLD_TIME}
+        return manifest, rewritten
+
+    manifest, rewritten = rerun("core")
+    assert manifest["incremental"] == {"changed": ["core"], "reused": ["body", "media"]}
+    assert manifest["stats"]["author"] == "Иванов"
+    assert rewritten == set()
+
+    manifest, rewritten = rerun("body")
+    assert manifest["incremental"] == {"changed": ["body"], "reused": ["media", "core"]}
+    assert "images" not in rewritten and "text" in rewritten
+    text_path = os.path.join(os.path.dirname(manifest_path), "text", "text.txt")
+    with open(text_path, 'r', encoding='utf-8') as f:
+        assert "ПОВЕРКА" in f.read()
+
+    manifest, rewritten = rerun("media")
+    assert manifest["incremental"]["changed"] == ["media"]
+    assert "images" in rewritten
+    assert manifest["stats"]["images_exported"] == 2
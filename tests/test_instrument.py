@@ -0,0 +1,35 @@
+# tests/test_instrument.py
+"""Журнал метрик Prometheus (core.instrument): последние результаты не застревают в памяти"""
+
+import time
+
+from core.instrument import PrometheusMetricsSink
+
+RESULT = {"plugin": "DOCX Анализатор", "status": "success", "seconds": 0.5}
+
+
+def test_idle_flush_writes_last_results(tmp_path):
+    path = tmp_path / "docx_analyzer.prom"
+    sink = PrometheusMetricsSink(str(path), flush_interval=0.05)
+    sink.record(RESULT)
+    sink.maybe_flush()
+    # До flush_interval файл не переписывается
+    assert not path.exists()
+
+    time.sleep(0.06)
+    sink.maybe_flush()
+    assert 'docx_analyzer_files_total{plugin="DOCX Анализатор",status="success"} 1' \
+        in path.read_text(encoding='utf-8')
+    sink.close()
+
+
+def test_counters_survive_restart(tmp_path):
+    path = str(tmp_path / "docx_analyzer.prom")
+    for _ in range(2):
+        sink = PrometheusMetricsSink(path)
+        sink.record(RESULT)
+        sink.close()
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    assert 'status="success"} 2' in text
+    assert 'docx_analyzer_file_seconds_total{plugin="DOCX Анализатор"} 1' in text
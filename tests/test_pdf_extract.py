@@ -0,0 +1,50 @@
+# tests/test_pdf_extract.py
+"""Постраничное извлечение текста PDF (plugins/pdf_extract.py) на синтетическом корпусе"""
+
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+from benchmarks.corpus import write_pdf
+from plugins.pdf_extract import iter_range
+
+
+def peak_memory(path, pages):
+    """Пик памяти Python при потоковом извлечении всех страниц (тексты не копятся)"""
+    tracemalloc.start()
+    try:
+        for _ in iter_range(path, 0, pages, release=True):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_range_reads_only_requested_pages(tmp_path):
+    path = tmp_path / "doc.pdf"
+    write_pdf(path, 12)
+    texts = list(iter_range(str(path), 5, 8))
+    assert [text.split("\n")[0] for text in texts] == ["Страница 6", "Страница 7", "Страница 8"]
+    # Диапазон за концом документа обрезается, а не дает ошибок
+    assert len(list(iter_range(str(path), 10, 20))) == 2
+
+
+def test_release_matches_cached_text(tmp_path):
+    path = tmp_path / "doc.pdf"
+    write_pdf(path, 6)
+    assert list(iter_range(str(path), 0, 6, release=True)) == list(iter_range(str(path), 0, 6))
+
+
+def test_release_memory_is_flat(tmp_path):
+    small, large = tmp_path / "small.pdf", tmp_path / "large.pdf"
+    write_pdf(small, 10)
+    write_pdf(large, 40)
+    # Разовые расходы (импорты, кэши модулей) - до замеров
+    peak_memory(str(small), 10)
+
+    small_peak = peak_memory(str(small), 10)
+    large_peak = peak_memory(str(large), 40)
+    # Страниц вчетверо больше, а пик растет только на таблицу xref и /Kids
+    assert large_peak < small_peak * 1.5
@@ -0,0 +1,170 @@
+# tests/test_pdf_meta.py
+"""Быстрое чтение метаданных PDF (plugins/pdf_meta.py) на собранных вручную файлах"""
+
+import re
+import zlib
+
+import pytest
+
+from benchmarks.corpus import write_pdf
+from plugins.pdf_meta import PdfMetaError, decode_text, read_pdf_metadata
+
+HEADER = b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n"
+
+
+def utf16(text):
+    """Текстовая строка PDF в UTF-16BE с BOM"""
+    return b"<FEFF" + text.encode('utf-16-be').hex().encode() + b">"
+
+
+def page_tree(count, first):
+    """Узел /Pages из count страниц с номерами объектов начиная с first"""
+    kids = b" ".join(b"%d 0 R" % number for number in range(first, first + count))
+    return b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % count
+
+
+def append_section(data, objects, trailer):
+    """Дописать к файлу объекты и классическую таблицу xref
+
+    У второго и следующих сохранений в trailer добавляется /Prev - как при
+    инкрементальном сохранении.
+    """
+    out = bytearray(data)
+    offsets = {}
+    for number, body in sorted(objects.items()):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    previous = re.findall(rb"startxref\s+(\d+)", bytes(data))
+    xref = len(out)
+    out += b"xref\n"
+    if not previous:
+        out += b"0 1\n0000000000 65535 f \n"
+    for number in sorted(offsets):
+        out += b"%d 1\n%010d 00000 n \n" % (number, offsets[number])
+    if previous:
+        trailer += b" /Prev " + previous[-1]
+    out += b"trailer\n<< " + trailer + b" >>\nstartxref\n%d\n%%%%EOF\n" % xref
+    return bytes(out)
+
+
+def png_up(rows):
+    """Строки xref-потока под PNG-предиктором Up (как пишут Acrobat и qpdf)"""
+    out = bytearray()
+    previous = bytes(len(rows[0]))
+    for row in rows:
+        out.append(2)
+        out += bytes((value - above) & 0xFF for value, above in zip(row, previous))
+        previous = row
+    return bytes(out)
+
+
+def xref_stream_pdf():
+    """PDF 1.5: каталог, дерево страниц и /Info в объектном потоке, xref-поток с предиктором"""
+    packed = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: page_tree(2, 4),
+        3: b"<< /Title " + utf16("Протокол поверки счётчика") + b" /Author (Lab \\223le) >>",
+    }
+    header, body = b"", b""
+    for number, obj in packed.items():
+        header += b"%d %d " % (number, len(body))
+        body += obj + b"\n"
+
+    out = bytearray(HEADER)
+    offsets = {}
+
+    def obj(number, chunk):
+        offsets[number] = len(out)
+        out.extend(b"%d 0 obj\n" % number + chunk + b"\nendobj\n")
+
+    obj(4, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>")
+    obj(5, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>")
+    stream = zlib.compress(header + body)
+    obj(10, b"<< /Type /ObjStm /N 3 /First %d /Filter /FlateDecode /Length %d >>\nstream\n"
+        % (len(header), len(stream)) + stream + b"\nendstream")
+
+    offsets[11] = len(out)
+    rows = []
+    for number in range(12):
+        if number in packed:
+            rows.append(bytes([2]) + (10).to_bytes(4, "big") + (number - 1).to_bytes(2, "big"))
+        elif number in offsets:
+            rows.append(bytes([1]) + offsets[number].to_bytes(4, "big") + bytes(2))
+        else:
+            rows.append(bytes(7))
+    stream = zlib.compress(png_up(rows))
+    out += (b"11 0 obj\n<< /Type /XRef /Size 12 /W [1 4 2] /Root 1 0 R /Info 3 0 R "
+            b"/Filter /FlateDecode /DecodeParms << /Columns 7 /Predictor 12 >> /Length %d >>\n"
+            b"stream\n" % len(stream) + stream + b"\nendstream\nendobj\n")
+    out += b"startxref\n%d\n%%%%EOF\n" % offsets[11]
+    return bytes(out)
+
+
+def test_classic_xref(tmp_path):
+    path = tmp_path / "classic.pdf"
+    write_pdf(path, 7)
+    assert read_pdf_metadata(path) == {"pages": 7, "author": "Бенчмарк",
+                                       "title": "Синтетический отчет", "encrypted": False}
+
+
+def test_xref_stream_and_object_stream(tmp_path):
+    path = tmp_path / "objstm.pdf"
+    path.write_bytes(xref_stream_pdf())
+    meta = read_pdf_metadata(path)
+    assert meta["pages"] == 2
+    assert meta["title"] == "Протокол поверки счётчика"
+    assert meta["author"] == "Lab ﬁle"
+
+
+def test_incremental_update_wins(tmp_path):
+    data = append_section(HEADER, {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: page_tree(1, 3),
+        3: b"<< /Type /Page /Parent 2 0 R >>",
+        4: b"<< /Title (Draft) /Author (Ivanov) >>",
+    }, b"/Size 5 /Root 1 0 R /Info 4 0 R")
+    # Второе сохранение: страница добавлена, название заменено, автор остался в старом /Info
+    data = append_section(data, {
+        2: page_tree(2, 3),
+        4: b"<< /Title " + utf16("Итоговый отчёт") + b" /Author (Ivanov) >>",
+        5: b"<< /Type /Page /Parent 2 0 R >>",
+    }, b"/Size 6 /Root 1 0 R /Info 4 0 R")
+    path = tmp_path / "incremental.pdf"
+    path.write_bytes(data)
+
+    meta = read_pdf_metadata(path)
+    assert meta["pages"] == 2
+    assert meta["title"] == "Итоговый отчёт"
+    assert meta["author"] == "Ivanov"
+
+
+def test_info_string_encodings(tmp_path):
+    # PDFDocEncoding: 0x84 - длинное тире, 0x8D/0x8E - кавычки, 0xA0 - евро, прочее как Latin-1
+    data = append_section(HEADER, {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [] /Count 0 >>",
+        3: b"<< /Title (\x8dCaf\xe9\x8e \x84 10 \xa0) /Author <FEFF0421043C04380440043D043E0432> >>",
+    }, b"/Size 4 /Root 1 0 R /Info 3 0 R")
+    path = tmp_path / "encodings.pdf"
+    path.write_bytes(data)
+
+    meta = read_pdf_metadata(path)
+    assert meta["pages"] == 0
+    assert meta["title"] == "“Café” — 10 €"
+    assert meta["author"] == "Смирнов"
+    assert decode_text(b"\xff\xfe" + "ёж".encode('utf-16-le')) == "ёж"
+
+
+def test_missing_info_and_broken_file(tmp_path):
+    data = append_section(HEADER, {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [] /Count 0 >>",
+    }, b"/Size 3 /Root 1 0 R")
+    path = tmp_path / "plain.pdf"
+    path.write_bytes(data)
+    assert read_pdf_metadata(path) == {"pages": 0, "author": None, "title": None, "encrypted": False}
+
+    path.write_bytes(data[:len(data) // 2])
+    with pytest.raises(PdfMetaError):
+        read_pdf_metadata(path)
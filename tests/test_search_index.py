@@ -0,0 +1,109 @@
+# tests/test_search_index.py
+"""Полнотекстовый поиск по основам слов (core/search_index.py)"""
+
+import os
+
+import pytest
+
+from benchmarks.corpus import write_docx
+from core.search_index import SearchIndex, query_terms, stem
+from plugins.docx_plugin import DocxPlugin
+
+DOCUMENTS = {
+    "manometr.docx": "Методика поверки манометров. Поверку выполняет аккредитованная лаборатория.",
+    "schetchik.docx": "Счётчик газа внесен в реестр под номером 12345-24. Интервал между поверками 2 года.",
+    "termometr.docx": "Термометр лабораторный, регистрационный номер 54321-19, калибровка раз в год.",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite"), commit_every=1)
+    for name, text in DOCUMENTS.items():
+        index.add(str(tmp_path / name), str(tmp_path / "out" / name), name, text)
+    index.flush()
+    yield index
+    index.close()
+
+
+def names(result):
+    return sorted(hit["name"] for hit in result["hits"])
+
+
+def test_inflected_forms_share_stem(index):
+    assert stem("поверка") == stem("поверки") == stem("поверками") == stem("поверку")
+    for query in ("поверка", "поверки", "поверками", "ПОВЕРКУ"):
+        assert names(index.search(query)) == ["manometr.docx", "schetchik.docx"], query
+
+
+def test_yo_and_e_are_equal(index):
+    for query in ("счетчик", "счётчик", "СЧЁТЧИКИ"):
+        result = index.search(query)
+        assert names(result) == ["schetchik.docx"], query
+        # Фрагмент цитирует текст как есть - с "ё"
+        assert "[Счётчик]" in result["hits"][0]["snippet"]
+
+
+def test_registry_number_is_one_token(index):
+    assert query_terms("12345-24") == [(["12345", "24"], False)]
+    result = index.search("12345-24")
+    assert names(result) == ["schetchik.docx"]
+    assert "[12345-24]" in result["hits"][0]["snippet"]
+    # Части номера в другом порядке или чужой год - другой номер
+    assert index.search("24-12345")["matches"] == 0
+    assert index.search("12345-19")["matches"] == 0
+
+
+@pytest.mark.parametrize("query", [
+    '"поверка', 'поверка"', "поверка*", "*", "NEAR(поверка методика)", "name:поверка",
+    "(поверка", "поверка)", "NOT поверка", "поверка OR", "AND", "^поверка", "-поверка",
+    "'; DROP TABLE documents; --", "{name}: поверка", "",
+])
+def test_hostile_query_characters(index, query):
+    result = index.search(query)
+    assert set(result) == {"matches", "ranked", "truncated", "hits"}
+    assert result["matches"] == len(result["hits"])
+    assert index.count() == len(DOCUMENTS)
+
+
+def test_operator_words_are_plain_words(index):
+    # Кавычки, звездочка и скобки не превращаются в синтаксис FTS5
+    assert names(index.search('"поверка"')) == ["manometr.docx", "schetchik.docx"]
+    assert names(index.search("(поверка) манометр*")) == ["manometr.docx"]
+    assert index.search("поверка NOT манометр")["matches"] == 0
+
+
+def test_removed_and_reindexed_documents_leave_results(index, tmp_path):
+    source = str(tmp_path / "manometr.docx")
+    assert index.remove(source)
+    assert not index.remove(source)
+    index.flush()
+    assert names(index.search("поверка")) == ["schetchik.docx"]
+
+    # Повторный анализ заменяет текст: старые слова больше не находятся
+    index.add(str(tmp_path / "termometr.docx"), str(tmp_path / "out"), "termometr.docx",
+              "Термометр после ремонта, поверка выполнена.")
+    index.flush()
+    assert index.search("калибровка")["matches"] == 0
+    assert names(index.search("поверка")) == ["schetchik.docx", "termometr.docx"]
+    assert index.count() == 2
+
+
+def test_indexed_folder_is_pruned_with_source(tmp_path):
+    path = tmp_path / "doc.docx"
+    write_docx(path, 30)
+    result = DocxPlugin().analyze(str(path), output_dir=str(tmp_path / "out"))
+
+    index = SearchIndex(str(tmp_path / "search.sqlite"))
+    try:
+        assert index.add_result(result)
+        # Тот же текст (SHA-256 из манифеста) второй раз не перечитывается
+        assert not index.add_result(result)
+        index.flush()
+        assert index.search("поверки")["matches"] == 1
+
+        os.remove(path)
+        assert index.prune() == 1
+        assert index.search("поверки")["matches"] == 0
+    finally:
+        index.close()
@@ -0,0 +1,26 @@
+# tests/test_startup.py
+"""Холодный старт консольного режима не загружает тяжелые модули"""
+
+import subprocess
+import sys
+
+from benchmarks.startup import PROJECT_DIR, parse_importtime
+
+# Нужны только при анализе файлов или в serve/watch, но не для --help
+LAZY_MODULES = ("asyncio", "PyPDF2", "docx", "concurrent.futures.process")
+
+
+def imported_modules(*args):
+    completed = subprocess.run([sys.executable, "-X", "importtime"] + list(args), cwd=PROJECT_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                               encoding='utf-8', errors='replace')
+    assert completed.returncode == 0, completed.stderr
+    return {name for name, _, _, _ in parse_importtime(completed.stderr)}
+
+
+def test_analyzer_help_imports_no_heavy_modules():
+    modules = imported_modules("analyzer.py", "--help")
+    assert "argparse" in modules
+    loaded = [name for name in LAZY_MODULES
+              if name in modules or any(module.startswith(name + ".") for module in modules)]
+    assert loaded == []
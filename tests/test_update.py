@@ -0,0 +1,189 @@
+# tests/test_update.py
+"""Клиент обновлений против локального сервера (update_server/local_server.py)"""
+
+import json
+import os
+import shutil
+import sys
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from conftest import PROJECT_DIR
+
+sys.path.append(os.path.join(PROJECT_DIR, "update_server"))
+
+import update_client
+from build_manifest import build
+from local_server import make_server
+from update_client import SimpleUpdateClient, UpdateError, parse_version
+
+OLD_FILES = {
+    "main.py": "print('старая версия')\n" * 50,
+    "core/engine.py": "".join(f"STEP_{i} = {i}\n" for i in range(200)),
+}
+NEW_FILES = {
+    "main.py": "print('новая версия')\n" * 50,
+    "core/engine.py": "".join(f"STEP_{i} = {i * 2 if i == 100 else i}\n" for i in range(200)),
+}
+
+
+def write_tree(root, files):
+    for path, text in files.items():
+        target = os.path.join(root, *path.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def read_tree(root, files):
+    result = {}
+    for path in files:
+        with open(os.path.join(root, *path.split("/")), 'r', encoding='utf-8') as f:
+            result[path] = f.read()
+    return result
+
+
+def write_manifest(server_dir, version):
+    manifest_path = os.path.join(server_dir, "all_updates.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    manifest["core_updates"] = [{"version": version, "description": "Ядро",
+                                 "files": ["main.py", "core/"]}]
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def release(tmp_path):
+    """Сервер с выпусками 1.0.0 и 1.1.0 (с дельтами) и установка версии 1.0.0"""
+    source, server_dir, install = tmp_path / "source", tmp_path / "server", tmp_path / "install"
+    server_dir.mkdir()
+    write_tree(source, OLD_FILES)
+    write_manifest(server_dir, "1.0.0")
+    build(str(source), str(server_dir))
+    write_tree(source, NEW_FILES)
+    write_manifest(server_dir, "1.1.0")
+    build(str(source), str(server_dir))
+    write_tree(install, OLD_FILES)
+    return server_dir, install
+
+
+@pytest.fixture
+def server(release):
+    """Локальный сервер обновлений на свободном порту; (url, папка сервера, установка)"""
+    server_dir, install = release
+    httpd = make_server(str(server_dir), port=0, quiet=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}", server_dir, install
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_semver_ordering():
+    assert parse_version("1.10.0") > parse_version("1.9.3")
+    assert parse_version("2.0.0") > parse_version("2.0.0-rc.1") > parse_version("2.0.0-beta.11")
+    assert parse_version("2.0.0-beta.11") > parse_version("2.0.0-beta.2")
+    assert parse_version("1.2") == parse_version("1.2.0+build.5")
+
+
+def test_older_release_is_not_offered(server):
+    url, _, install = server
+    client = SimpleUpdateClient(url, str(install))
+    assert [update["version"] for update in client.find_updates()] == ["1.1.0"]
+
+    client.current_versions["core"] = "1.10.0"
+    assert client.find_updates() == []
+
+
+def test_apply_uses_deltas_and_verifies(server):
+    url, _, install = server
+    client = SimpleUpdateClient(url, str(install))
+    updates = client.find_updates()
+    summary = client.apply_updates(updates)
+
+    assert summary["files"] == ["core/engine.py", "main.py"]
+    assert read_tree(install, NEW_FILES) == NEW_FILES
+    # Дельты меньше файлов целиком
+    assert summary["downloaded_bytes"] < sum(len(text.encode('utf-8')) for text in NEW_FILES.values())
+    assert client.current_versions["core"] == "1.1.0"
+
+
+def test_hash_mismatch_is_rejected(server):
+    url, server_dir, install = server
+    manifest = json.loads((server_dir / "all_updates.json").read_text(encoding='utf-8'))
+    # Без дельт файл качается целиком - и приходит испорченным
+    shutil.rmtree(server_dir / "deltas")
+    (server_dir / "objects" / manifest["files"]["main.py"]["sha256"]).write_bytes("подмена".encode("utf-8"))
+
+    client = SimpleUpdateClient(url, str(install))
+    with pytest.raises(UpdateError):
+        client.apply_updates(client.find_updates())
+    assert read_tree(install, OLD_FILES) == OLD_FILES
+
+
+def test_failed_swap_rolls_back(server, monkeypatch):
+    url, _, install = server
+    client = SimpleUpdateClient(url, str(install))
+    updates = client.find_updates()
+
+    real_replace = os.replace
+    swapped = []
+
+    def failing_replace(src, dst):
+        # Вторая замена установленного файла проверенным из staging падает
+        if update_client.STAGING_DIR in str(src) and "files" in str(src):
+            swapped.append(dst)
+            if len(swapped) == 2:
+                raise OSError("диск переполнен")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(update_client.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        client.apply_updates(updates)
+    monkeypatch.undo()
+
+    assert len(swapped) == 2
+    assert read_tree(install, OLD_FILES) == OLD_FILES
+
+
+def test_manifest_conditional_request(server):
+    url, _, install = server
+    with urlopen(f"{url}/all_updates.json") as response:
+        etag = response.headers["ETag"]
+    assert etag
+
+    request = Request(f"{url}/all_updates.json", headers={"If-None-Match": etag})
+    with pytest.raises(HTTPError) as error:
+        urlopen(request)
+    assert error.value.code == 304
+
+    client = SimpleUpdateClient(url, str(install))
+    client.load_manifest()
+    assert client.manifest_changed
+    client._save_cache()
+    again = SimpleUpdateClient(url, str(install))
+    again.load_manifest()
+    assert not again.manifest_changed
+    assert again.manifest == client.manifest
+
+
+def test_path_outside_install_is_rejected(server):
+    url, server_dir, install = server
+    manifest_path = server_dir / "all_updates.json"
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    manifest["files"]["../outside.py"] = manifest["files"]["main.py"]
+    manifest["core_updates"][0]["files"].append("../outside.py")
+    manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+
+    client = SimpleUpdateClient(url, str(install))
+    with pytest.raises(UpdateError):
+        client.find_updates()
+    assert not (install.parent / "outside.py").exists()
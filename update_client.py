@@ -1,74 +1,526 @@
 """
 Простейший клиент для проверки обновлений ВСЕГО
+
+Манифест (update_server/all_updates.json) описывает обновления ядра,
+плагинов и настроек. В манифесте версии 2 у каждого файла есть SHA-256
+и размер, а для прошлых версий файла - готовые двоичные дельты:
+
+    "files": {
+      "core/batch.py": {"sha256": "...", "size": 10402,
+                        "deltas": {"<sha256 старой версии>": {"sha256": "...", "size": 812}}}
+    }
+
+Клиент считает хэши своих файлов и скачивает только отличающиеся: дельту,
+если для его версии файла она есть, иначе файл целиком. Загрузки идут
+параллельно во временную папку и продолжаются с места обрыва (Range).
+Каждый файл сверяется с хэшем из манифеста, и только когда проверены все,
+файлы заменяются (os.replace, при ошибке - откат из резервных копий).
+
+Источник - папка (по умолчанию update_server) или адрес сервера:
+    python update_client.py                          - показать обновления
+    python update_client.py --apply --source http://127.0.0.1:8000
 """
 
+import argparse
+import hashlib
 import json
 import os
+import shutil
+import struct
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
 from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+MANIFEST_NAME = "all_updates.json"
+STATE_FILE = ".update_state.json"
+CACHE_FILE = ".update_cache.json"
+STAGING_DIR = ".update_staging"
+BACKUP_DIR = ".update_backup"
+OBJECTS_DIR = "objects"
+DELTAS_DIR = "deltas"
+
+CHUNK_SIZE = 256 * 1024
+DEFAULT_WORKERS = 4
+DOWNLOAD_TIMEOUT = 30
+# Фоновая проверка обновлений - раз в 6 часов
+DEFAULT_CHECK_INTERVAL = 6 * 60 * 60
+
+DELTA_MAGIC = b"DADELTA1"
+_COPY = struct.Struct(">cQI")
+_INSERT = struct.Struct(">cI")
+
+
+class UpdateError(Exception):
+    """Обновление не удалось (файл не скачался, хэш не совпал...)"""
+
+
+def parse_version(version):
+    """Ключ сортировки версии по правилам semver: 1.2.10 > 1.2.9, 1.0.0 > 1.0.0-beta.2
+
+    Недостающие части считаются нулями (1.2 == 1.2.0), метаданные сборки
+    (+...) не учитываются.
+    """
+    version = str(version).strip().lstrip("vV").split("+", 1)[0]
+    release, _, prerelease = version.partition("-")
+    numbers = []
+    for part in release.split("."):
+        try:
+            numbers.append(int(part))
+        except ValueError:
+            raise ValueError(f"Неверная версия: {version}")
+    while len(numbers) < 3:
+        numbers.append(0)
+    if not prerelease:
+        # Версия без суффикса старше любой своей предварительной
+        return tuple(numbers), (1,)
+    identifiers = tuple((0, int(part), "") if part.isdigit() else (1, 0, part)
+                        for part in prerelease.split("."))
+    return tuple(numbers), (0,) + identifiers
+
+
+def file_sha256(path):
+    """SHA-256 файла (читается кусками)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_delta(old, new):
+    """Двоичная дельта old -> new: копии кусков старого файла и вставки нового
+
+    Файлы сравниваются по строкам (для двоичных файлов строка - кусок до
+    байта \\n), дельта сжимается zlib.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    old_offsets = [0]
+    for line in old_lines:
+        old_offsets.append(old_offsets[-1] + len(line))
+
+    out = []
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            out.append(_COPY.pack(b"C", old_offsets[i1], old_offsets[i2] - old_offsets[i1]))
+        elif j2 > j1:
+            data = b"".join(new_lines[j1:j2])
+            out.append(_INSERT.pack(b"I", len(data)))
+            out.append(data)
+    return DELTA_MAGIC + zlib.compress(b"".join(out), 9)
+
+
+def apply_delta(old, delta):
+    """Собрать новый файл из старого и дельты (make_delta)"""
+    if not delta.startswith(DELTA_MAGIC):
+        raise UpdateError("Неверный формат дельты")
+    ops = zlib.decompress(delta[len(DELTA_MAGIC):])
+    parts = []
+    position = 0
+    while position < len(ops):
+        op = ops[position:position + 1]
+        if op == b"C":
+            _, offset, length = _COPY.unpack_from(ops, position)
+            position += _COPY.size
+            if offset + length > len(old):
+                raise UpdateError("Дельта не подходит к этой версии файла")
+            parts.append(old[offset:offset + length])
+        elif op == b"I":
+            _, length = _INSERT.unpack_from(ops, position)
+            position += _INSERT.size
+            parts.append(ops[position:position + length])
+            position += length
+        else:
+            raise UpdateError("Неверный формат дельты")
+    return b"".join(parts)
+
+
+def inside(root, relative):
+    """Путь relative (через /) внутри папки root; выход за ее пределы - UpdateError
+
+    Пути берутся из манифеста, поэтому "../", абсолютные пути и ссылки
+    наружу не должны позволить записать файл вне папки программы.
+    """
+    root = Path(root).resolve()
+    target = (root / relative).resolve()
+    if target == root or not target.is_relative_to(root):
+        raise UpdateError(f"{relative}: путь вне папки {root}")
+    return target
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
 
 class SimpleUpdateClient:
     """Клиент проверки обновлений"""
 
-    def __init__(self):
+    def __init__(self, source="update_server", install_dir=".", workers=DEFAULT_WORKERS):
+        self.source = source.rstrip("/")
+        self.remote = self.source.startswith(("http://", "https://"))
+        self.install_dir = Path(install_dir)
+        self.workers = workers
+        self.manifest = None
+        self.manifest_changed = False
+        self._cache = None
+        self._cache_dirty = False
         self.current_versions = {
             "core": "1.0.0",
             "docx_plugin": "1.0.0",
             "pdf_plugin": "1.0.0"
         }
+        self.current_versions.update(self._load_state().get("versions", {}))
 
-    def check_updates(self):
-        """Проверить все доступные обновления"""
-        print("🔍 Проверяю обновления...")
+    # --- источник обновлений ---
+
+    def _open(self, relative, offset=0):
+        """Открыть файл источника с позиции offset: (поток, offset фактически)
+
+        Сервер без поддержки Range отдает файл с начала - тогда offset 0.
+        """
+        if not self.remote:
+            f = open(os.path.join(self.source, *relative.split("/")), 'rb')
+            f.seek(offset)
+            return f, offset
+        request = Request(f"{self.source}/{quote(relative)}")
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+        try:
+            response = urlopen(request, timeout=DOWNLOAD_TIMEOUT)
+        except HTTPError as e:
+            if e.code == 416 and offset:
+                # Часть уже целиком скачана (или больше файла) - начинаем заново
+                return self._open(relative, 0)
+            raise
+        return response, offset if response.status == 206 else 0
+
+    def load_manifest(self):
+        """Манифест из источника; если он не менялся - разобранный из кэша
+
+        Папка: сверяются время изменения и размер файла. Сервер: условный
+        запрос с If-None-Match/If-Modified-Since, ответ 304 - манифест тот же.
+        self.manifest_changed - прочитан ли манифест заново.
+        """
+        cache = self._load_cache()
+        cached = cache.get("manifest") if cache.get("source") == self.source else None
+        validator = cache.get("validator", {}) if cached is not None else {}
+
+        if not self.remote:
+            stat = os.stat(os.path.join(self.source, MANIFEST_NAME))
+            current = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            if cached is not None and validator == current:
+                return self._use_manifest(cached, changed=False)
+            stream, _ = self._open(MANIFEST_NAME)
+        else:
+            request = Request(f"{self.source}/{MANIFEST_NAME}")
+            if validator.get("etag"):
+                request.add_header("If-None-Match", validator["etag"])
+            if validator.get("last_modified"):
+                request.add_header("If-Modified-Since", validator["last_modified"])
+            try:
+                stream = urlopen(request, timeout=DOWNLOAD_TIMEOUT)
+            except HTTPError as e:
+                if e.code == 304 and cached is not None:
+                    return self._use_manifest(cached, changed=False)
+                raise
+            current = {"etag": stream.headers.get("ETag"),
+                       "last_modified": stream.headers.get("Last-Modified")}
+
+        with stream:
+            manifest = json.loads(stream.read().decode('utf-8'))
+        cache.update({"source": self.source, "validator": current, "manifest": manifest})
+        self._cache_dirty = True
+        return self._use_manifest(manifest, changed=True)
+
+    def _use_manifest(self, manifest, changed):
+        self.manifest = manifest
+        self.manifest_changed = changed
+        return manifest
+
+    # --- состояние установки ---
+
+    def _load_state(self):
+        try:
+            with open(self.install_dir / STATE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        path = self.install_dir / STATE_FILE
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"versions": self.current_versions}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
 
+    def _load_cache(self):
+        """Кэш проверок: манифест с его валидатором и хэши установленных файлов"""
+        if self._cache is None:
+            try:
+                with open(self.install_dir / CACHE_FILE, 'r', encoding='utf-8') as f:
+                    self._cache = json.load(f)
+            except (OSError, ValueError):
+                self._cache = {}
+        return self._cache
+
+    def _save_cache(self):
+        if not self._cache_dirty:
+            return
+        path = self.install_dir / CACHE_FILE
+        temp_path = path.with_name(path.name + ".tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+            self._cache_dirty = False
+        except OSError:
+            # Кэш - только ускорение, без него проверка просто будет медленнее
+            pass
+
+    def local_sha256(self, relative):
+        """Хэш установленного файла или None, если его нет
+
+        Пока у файла те же время изменения и размер, хэш берется из кэша.
+        """
+        path = inside(self.install_dir, relative)
         try:
-            # Пока читаем из локального файла (позже - с сервера)
-            updates_file = Path("update_server/all_updates.json")
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        hashes = self._load_cache().setdefault("hashes", {})
+        known = hashes.get(relative)
+        if known is not None and known[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return known[2]
+        sha256 = file_sha256(path)
+        hashes[relative] = [stat.st_mtime_ns, stat.st_size, sha256]
+        self._cache_dirty = True
+        return sha256
+
+    # --- проверка ---
 
-            if not updates_file.exists():
-                print("❌ Файл обновлений не найден")
-                return []
+    def update_files(self, update):
+        """Файлы обновления (папки из "files" раскрываются по манифесту)"""
+        listed = update.get("files") or ([update["file"]] if update.get("file") else [])
+        known = (self.manifest or {}).get("files", {})
+        files = []
+        for entry in listed:
+            if entry.endswith("/"):
+                files.extend(sorted(path for path in known if path.startswith(entry)))
+            else:
+                files.append(entry)
+        return files
 
-            with open(updates_file, 'r', encoding='utf-8') as f:
-                all_updates = json.load(f)
+    def changed_files(self, update):
+        """Файлы обновления, хэш которых отличается от установленных: {путь: хэш у нас}"""
+        known = self.manifest.get("files", {})
+        changed = {}
+        for path in self.update_files(update):
+            if path in known:
+                local = self.local_sha256(path)
+                if local != known[path]["sha256"]:
+                    changed[path] = local
+        return changed
 
+    def download_size(self, changed):
+        """Сколько байт придется скачать: дельты, где они есть, иначе файлы целиком"""
+        known = self.manifest.get("files", {})
+        total = 0
+        for path, local in changed.items():
+            delta = known[path].get("deltas", {}).get(local) if local else None
+            total += delta["size"] if delta else known[path]["size"]
+        return total
+
+    def find_updates(self):
+        """Доступные обновления (ошибки источника - исключением)
+
+        Манифест берется из кэша, если он не менялся, хэши установленных
+        файлов - тоже (по времени изменения и размеру).
+        """
+        all_updates = self.load_manifest()
+        try:
+            hashed = "files" in all_updates
             available_updates = []
 
-            # Проверяем обновления ядра
-            for core_update in all_updates.get("core_updates", []):
-                if self._is_newer_version(core_update["version"], self.current_versions["core"]):
-                    available_updates.append({
-                        "type": "core",
-                        "name": "Ядро программы",
-                        "version": core_update["version"],
-                        "description": core_update["description"],
-                        "size": core_update["size_kb"]
-                    })
+            sections = (
+                ("core", all_updates.get("core_updates", [])),
+                ("plugin", all_updates.get("plugin_updates", [])),
+                ("config", all_updates.get("config_updates", [])),
+            )
+            for kind, updates in sections:
+                for update in updates:
+                    key = "core" if kind == "core" else update.get("name")
+                    current_ver = self.current_versions.get(key, "0.0.0")
+                    version = update.get("version")
 
-            # Проверяем обновления плагинов
-            for plugin_update in all_updates.get("plugin_updates", []):
-                plugin_name = plugin_update["name"]
-                current_ver = self.current_versions.get(plugin_name, "0.0.0")
+                    if hashed:
+                        # По хэшам видно, что действительно нужно скачать;
+                        # более старую версию поверх новой не ставим
+                        if version and self._is_newer_version(current_ver, version):
+                            continue
+                        changed = self.changed_files(update)
+                        if not changed:
+                            continue
+                    else:
+                        if kind == "config" or not self._is_newer_version(version, current_ver):
+                            continue
+                        changed = {}
 
-                if self._is_newer_version(plugin_update["version"], current_ver):
+                    if kind == "core":
+                        name = "Ядро программы"
+                    elif kind == "plugin":
+                        name = f"Плагин: {key}"
+                    else:
+                        name = f"Настройки: {key}"
                     available_updates.append({
-                        "type": "plugin",
-                        "name": f"Плагин: {plugin_name}",
-                        "version": plugin_update["version"],
-                        "description": plugin_update["description"],
-                        "size": plugin_update["size_kb"]
+                        "type": kind,
+                        "key": key,
+                        "name": name,
+                        "version": version or "-",
+                        "description": update.get("description", ""),
+                        "size": update.get("size_kb", 0),
+                        "changed_files": changed,
+                        "download_kb": round(self.download_size(changed) / 1024, 1) if changed else None
                     })
 
             return available_updates
+        finally:
+            self._save_cache()
 
+    def check_updates(self):
+        """Проверить все доступные обновления"""
+        print("🔍 Проверяю обновления...")
+
+        try:
+            return self.find_updates()
+        except FileNotFoundError:
+            print("❌ Файл обновлений не найден")
+            return []
         except Exception as e:
             print(f"❌ Ошибка при проверке обновлений: {e}")
             return []
 
     def _is_newer_version(self, new_version, current_version):
-        """Сравнить версии (упрощенно)"""
-        # Простое сравнение строк
-        return new_version != current_version
+        """Новее ли new_version, чем current_version (сравнение по semver)"""
+        return parse_version(new_version) > parse_version(current_version)
+
+    # --- установка ---
+
+    def _download(self, relative, part_path, size, sha256):
+        """Скачать файл источника в part_path с докачкой; сверить размер и хэш"""
+        for attempt in range(2):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if offset > size:
+                offset = 0
+            if offset < size:
+                stream, offset = self._open(relative, offset)
+                with stream, open(part_path, 'r+b' if offset else 'wb') as out:
+                    out.seek(offset)
+                    out.truncate()
+                    shutil.copyfileobj(stream, out, CHUNK_SIZE)
+            if os.path.getsize(part_path) == size and file_sha256(part_path) == sha256:
+                return
+            # Битая или чужая часть - второй раз качаем с нуля
+            _remove(part_path)
+        raise UpdateError(f"{relative}: хэш скачанного файла не совпадает с манифестом")
+
+    def _stage_file(self, path, local_sha, staging):
+        """Подготовить новую версию файла в staging; возвращает (путь в staging, байт скачано)"""
+        entry = self.manifest["files"][path]
+        target = inside(self.install_dir, path)
+        staged = inside(staging / "files", path)
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        delta = entry.get("deltas", {}).get(local_sha) if local_sha else None
+
+        if delta is not None:
+            part = inside(staging / "parts", f"{local_sha}-{entry['sha256']}.delta")
+            part.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self._download(f"{DELTAS_DIR}/{local_sha}-{entry['sha256']}.delta",
+                               part, delta["size"], delta["sha256"])
+                with open(part, 'rb') as f:
+                    delta_bytes = f.read()
+                with open(target, 'rb') as f:
+                    new = apply_delta(f.read(), delta_bytes)
+                if hashlib.sha256(new).hexdigest() == entry["sha256"]:
+                    with open(staged, 'wb') as f:
+                        f.write(new)
+                    return staged, delta["size"]
+            except (OSError, UpdateError):
+                pass
+            # Дельта не подошла - качаем файл целиком
+
+        part = inside(staging / "parts", entry["sha256"])
+        part.parent.mkdir(parents=True, exist_ok=True)
+        self._download(f"{OBJECTS_DIR}/{entry['sha256']}", part, entry["size"], entry["sha256"])
+        os.replace(part, staged)
+        return staged, entry["size"]
+
+    def _swap(self, staged_files):
+        """Заменить файлы проверенными из staging; при ошибке вернуть старые"""
+        backup_root = self.install_dir / BACKUP_DIR
+        replaced = []
+        try:
+            for path, staged in staged_files:
+                target = inside(self.install_dir, path)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                backup = inside(backup_root, path)
+                if target.exists():
+                    backup.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(target, backup)
+                replaced.append((target, backup))
+                os.replace(staged, target)
+        except OSError:
+            for target, backup in reversed(replaced):
+                if backup.exists():
+                    os.replace(backup, target)
+                else:
+                    _remove(target)
+            raise
+        shutil.rmtree(backup_root, ignore_errors=True)
+
+    def apply_updates(self, updates=None):
+        """Скачать, проверить и установить обновления (по умолчанию - все доступные)
+
+        Возвращает сводку: установленные файлы и сколько байт скачано.
+        """
+        if updates is None:
+            updates = self.check_updates()
+        if self.manifest is None or "files" not in self.manifest:
+            raise UpdateError("В манифесте нет хэшей файлов - установка невозможна")
+
+        changed = {}
+        for update in updates:
+            changed.update(update["changed_files"])
+        staging = self.install_dir / STAGING_DIR
+
+        if changed:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {path: pool.submit(self._stage_file, path, local, staging)
+                           for path, local in sorted(changed.items())}
+                # Все файлы должны скачаться и пройти проверку до первой замены
+                staged = {path: future.result() for path, future in futures.items()}
+            self._swap([(path, staged_path) for path, (staged_path, _) in staged.items()])
+            downloaded = sum(size for _, size in staged.values())
+        else:
+            downloaded = 0
+
+        for update in updates:
+            if update["version"] != "-":
+                self.current_versions[update["key"]] = update["version"]
+        self._save_state()
+        shutil.rmtree(staging, ignore_errors=True)
+        return {"files": sorted(changed), "downloaded_bytes": downloaded}
 
     def show_updates(self):
         """Показать доступные обновления"""
@@ -86,9 +538,91 @@ class SimpleUpdateClient:
             print(f"   Версия: {update['version']}")
             print(f"   Описание: {update['description']}")
             print(f"   Размер: {update['size']} КБ")
+            if update["changed_files"]:
+                print(f"   Изменилось файлов: {len(update['changed_files'])}, "
+                      f"скачать: {update['download_kb']} КБ")
             print()
+        return updates
+
+
+class UpdateChecker:
+    """Периодическая проверка обновлений в фоновом потоке
+
+    Окно и анализ не ждут сети: проверка идет в потоке-демоне, результат
+    передается в on_result(список обновлений), ошибка - в on_error(исключение).
+    Оба вызываются из фонового потока - в Qt их нужно передавать через сигнал.
+    """
+
+    def __init__(self, client, interval=DEFAULT_CHECK_INTERVAL, on_result=None, on_error=None):
+        self.client = client
+        self.interval = interval
+        self.on_result = on_result
+        self.on_error = on_error
+        self.last_updates = None
+        self.last_checked = None
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запустить поток (первая проверка - сразу)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="update-checker", daemon=True)
+            self._thread.start()
+        return self
+
+    def check_now(self):
+        """Проверить вне очереди, не дожидаясь интервала"""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        """Остановить поток; идущая проверка доводится до конца"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                updates = self.client.find_updates()
+            except Exception as e:
+                self.last_error = e
+                if self.on_error is not None:
+                    self.on_error(e)
+            else:
+                self.last_updates = updates
+                self.last_error = None
+                self.last_checked = time.time()
+                if self.on_result is not None:
+                    self.on_result(updates)
+            self._wake.wait(self.interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="update_client.py", description="Обновления программы")
+    parser.add_argument("--source", default="update_server",
+                        help="папка или адрес сервера обновлений")
+    parser.add_argument("--install-dir", default=".", help="папка установленной программы")
+    parser.add_argument("--apply", action="store_true", help="скачать и установить обновления")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help="параллельных загрузок")
+    args = parser.parse_args(argv)
+
+    client = SimpleUpdateClient(args.source, args.install_dir, args.workers)
+    updates = client.show_updates()
+    if args.apply and updates:
+        try:
+            summary = client.apply_updates(updates)
+        except (UpdateError, OSError) as e:
+            print(f"❌ Обновление не установлено: {e}")
+            return 1
+        print(f"✅ Установлено файлов: {len(summary['files'])}, "
+              f"скачано {summary['downloaded_bytes'] / 1024:.1f} КБ")
+    return 0
 
 
 if __name__ == "__main__":
-    client = SimpleUpdateClient()
-    client.show_updates()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Сборка выпуска обновлений: хэши файлов, объекты и дельты для all_updates.json
+
+Файлы из "files"/"file" обновлений манифеста (папки - с подпапками)
+берутся из папки программы и кладутся в objects/<sha256>. Для прошлых
+версий каждого файла (последние --history хэшей, их объекты уже лежат
+в objects/) строятся дельты deltas/<старый>-<новый>.delta - если дельта
+заметно меньше файла. Манифест дополняется разделом "files" (версия 2)
+и перезаписывается атомарно. Если файлы выпуска импортируют модуль
+программы, которого в выпуске нет, сборка останавливается: клиент
+получил бы программу, которая не запускается.
+
+    python update_server/build_manifest.py --source .
+"""
+
+import argparse
+import ast
+import datetime
+import hashlib
+import json
+import math
+import os
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SERVER_DIR))
+
+from update_client import DELTAS_DIR, MANIFEST_NAME, OBJECTS_DIR, make_delta
+
+DEFAULT_HISTORY = 3
+# Дельта больше этой доли файла не стоит того, чтобы ее собирать на клиенте
+MAX_DELTA_RATIO = 0.8
+SKIPPED_DIRS = ("__pycache__", ".git", ".idea", ".venv", "venv")
+
+
+def write_atomic(path, data):
+    """Записать файл целиком через временный файл"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def release_paths(manifest, source):
+    """Пути файлов всех обновлений (через /), папки раскрываются"""
+    paths = []
+    for section in ("core_updates", "plugin_updates", "config_updates"):
+        for update in manifest.get(section, []):
+            entries = update.get("files") or ([update["file"]] if update.get("file") else [])
+            for entry in entries:
+                if not entry.endswith("/"):
+                    paths.append(entry)
+                    continue
+                for root, dirs, names in os.walk(os.path.join(source, entry)):
+                    dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+                    for name in sorted(names):
+                        if not name.endswith((".pyc", ".tmp")):
+                            relative = os.path.relpath(os.path.join(root, name), source)
+                            paths.append(relative.replace(os.sep, "/"))
+    return list(dict.fromkeys(paths))
+
+
+def module_path(name, source):
+    """Файл модуля программы (через /) или None, если это не модуль из source"""
+    base = name.replace(".", "/")
+    for candidate in (base + ".py", base + "/__init__.py"):
+        if os.path.isfile(os.path.join(source, *candidate.split("/"))):
+            return candidate
+    return None
+
+
+def missing_imports(paths, source):
+    """Модули программы, которые импортируют файлы выпуска, но в выпуск не входят
+
+    Возвращает {модуль: файл, который его импортирует}. Учитываются и
+    отложенные импорты внутри функций.
+    """
+    released = set(paths)
+    missing = {}
+    for path in paths:
+        if not path.endswith(".py"):
+            continue
+        with open(os.path.join(source, *path.split("/")), 'rb') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                # from package import module - имя может быть и модулем
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for name in names:
+                module = module_path(name, source)
+                if module is not None and module not in released:
+                    missing.setdefault(module, path)
+    return missing
+
+
+def build(source, server_dir=SERVER_DIR, history=DEFAULT_HISTORY):
+    """Собрать выпуск; возвращает обновленный манифест
+
+    Выпуск без модуля, который импортируют его файлы, - ValueError.
+    """
+    manifest_path = os.path.join(server_dir, MANIFEST_NAME)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    paths = release_paths(manifest, source)
+    missing = missing_imports(paths, source)
+    if missing:
+        raise ValueError("в выпуске нет модулей: " + ", ".join(
+            f"{module} (импортирует {path})" for module, path in sorted(missing.items())))
+    previous = manifest.get("files", {})
+    os.makedirs(os.path.join(server_dir, OBJECTS_DIR), exist_ok=True)
+    os.makedirs(os.path.join(server_dir, DELTAS_DIR), exist_ok=True)
+
+    files = {}
+    for path in paths:
+        with open(os.path.join(source, *path.split("/")), 'rb') as f:
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        object_path = os.path.join(server_dir, OBJECTS_DIR, sha256)
+        if not os.path.exists(object_path):
+            write_atomic(object_path, data)
+
+        old = previous.get(path, {})
+        older = [old["sha256"]] + old.get("history", []) if old.get("sha256") else []
+        older = [sha for sha in dict.fromkeys(older) if sha != sha256][:history]
+
+        deltas = {}
+        for old_sha in older:
+            old_object = os.path.join(server_dir, OBJECTS_DIR, old_sha)
+            if not os.path.exists(old_object):
+                continue
+            delta_path = os.path.join(server_dir, DELTAS_DIR, f"{old_sha}-{sha256}.delta")
+            if os.path.exists(delta_path):
+                with open(delta_path, 'rb') as f:
+                    delta = f.read()
+            else:
+                with open(old_object, 'rb') as f:
+                    delta = make_delta(f.read(), data)
+                if len(delta) > len(data) * MAX_DELTA_RATIO:
+                    continue
+                write_atomic(delta_path, delta)
+            deltas[old_sha] = {"sha256": hashlib.sha256(delta).hexdigest(), "size": len(delta)}
+
+        files[path] = {"sha256": sha256, "size": len(data)}
+        if older:
+            files[path]["history"] = older
+        if deltas:
+            files[path]["deltas"] = deltas
+
+    for section in ("core_updates", "plugin_updates", "config_updates"):
+        for update in manifest.get(section, []):
+            entries = update.get("files") or ([update["file"]] if update.get("file") else [])
+            size = sum(info["size"] for path, info in files.items()
+                       if any(path == entry or (entry.endswith("/") and path.startswith(entry))
+                              for entry in entries))
+            update["size_kb"] = math.ceil(size / 1024)
+
+    manifest["manifest_version"] = 2
+    manifest["last_updated"] = datetime.datetime.now().isoformat(timespec="seconds")
+    manifest["files"] = files
+    write_atomic(manifest_path, (json.dumps(manifest, ensure_ascii=False, indent=2) + "\n").encode('utf-8'))
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="build_manifest.py",
+                                     description="Собрать выпуск обновлений (хэши, объекты, дельты)")
+    parser.add_argument("--source", default=os.path.dirname(SERVER_DIR), help="папка программы")
+    parser.add_argument("--server-dir", default=SERVER_DIR, help="папка сервера обновлений")
+    parser.add_argument("--history", type=int, default=DEFAULT_HISTORY,
+                        help="для скольких прошлых версий файла строить дельты")
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = build(args.source, args.server_dir, args.history)
+    except ValueError as e:
+        print(f"❌ Выпуск не собран: {e}")
+        return 1
+    deltas = sum(len(info.get("deltas", {})) for info in manifest["files"].values())
+    size = sum(info["size"] for info in manifest["files"].values())
+    print(f"✅ Выпуск: файлов {len(manifest['files'])} ({size / 1024:.1f} КБ), дельт {deltas}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Локальный сервер обновлений для проверки клиента (http.server + Range + ETag)
+
+Раздает папку сервера обновлений (манифест, objects/, deltas/) и понимает
+заголовок Range, чтобы клиент мог докачивать файлы с места обрыва. У файлов
+есть ETag (время изменения и размер): на If-None-Match / If-Modified-Since
+с неизменившимся файлом сервер отвечает 304 без тела.
+
+    python update_server/local_server.py --port 8000
+    python update_client.py --source http://127.0.0.1:8000 --install-dir копия/ --apply
+"""
+
+import argparse
+import os
+import re
+import sys
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)$")
+
+
+def file_etag(path):
+    """ETag файла по времени изменения и размеру"""
+    stat = os.stat(path)
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler с ответами 206 на Range: bytes=N-[M] и ETag"""
+
+    def send_head(self):
+        self.range_remaining = None
+        self.etag = None
+        match = _RANGE.match(self.headers.get("Range", ""))
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            self.etag = file_etag(path)
+            if_none_match = self.headers.get("If-None-Match")
+            # If-Modified-Since проверяет базовый обработчик - и только
+            # если If-None-Match нет (так требует RFC 9110)
+            if if_none_match is not None:
+                tags = [tag.strip() for tag in if_none_match.split(",")]
+                if self.etag in tags or "*" in tags:
+                    self.send_response(304)
+                    self.end_headers()
+                    return None
+        if match is None or not os.path.isfile(path):
+            return super().send_head()
+
+        f = open(path, 'rb')
+        size = os.fstat(f.fileno()).st_size
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        if start >= size or start > end:
+            f.close()
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        self.range_remaining = end - start + 1
+        return f
+
+    def end_headers(self):
+        if getattr(self, "etag", None) is not None:
+            self.send_header("ETag", self.etag)
+        super().end_headers()
+
+    def copyfile(self, source, outputfile):
+        remaining = self.range_remaining
+        if remaining is None:
+            return super().copyfile(source, outputfile)
+        while remaining > 0:
+            data = source.read(min(64 * 1024, remaining))
+            if not data:
+                break
+            outputfile.write(data)
+            remaining -= len(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(directory=SERVER_DIR, host="127.0.0.1", port=8000, quiet=False):
+    """Сервер (еще не запущенный); port=0 - любой свободный"""
+    server = ThreadingHTTPServer((host, port), partial(RangeRequestHandler, directory=directory))
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="local_server.py", description="Локальный сервер обновлений")
+    parser.add_argument("--directory", default=SERVER_DIR, help="папка сервера обновлений")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("-q", "--quiet", action="store_true", help="не печатать запросы")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.directory, args.host, args.port, args.quiet)
+    print(f"🟢 Сервер обновлений: http://{args.host}:{server.server_address[1]} "
+          f"({args.directory}). Остановка - Ctrl+C")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
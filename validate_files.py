@@ -1,23 +1,303 @@
 #!/usr/bin/env python3
-"""Проверка кодировки файлов"""
+"""Проверка текстовых файлов перед загрузкой: NUL-байты, битый UTF-8, смешанные переводы строк
+
+Дерево обходится через os.scandir (тип берется из записи каталога, stat -
+только для подходящих файлов), папки и файлы из --exclude отсекаются еще
+при обходе.
+Файлы проверяются в пуле потоков кусками: большие - через mmap, маленькие -
+одним чтением. Ошибки чтения не глотаются, а попадают в отчет.
+
+    python validate_files.py                       - проверить текущую папку
+    python validate_files.py docs/ --report scan.json --exclude "*.min.json"
+
+Код выхода 1 - найдены проблемы (удобно как проверка перед загрузкой).
+"""
+import argparse
+import codecs
+import fnmatch
+import json
+import mmap
 import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_EXTENSIONS = ('.py', '.md', '.txt', '.json')
+DEFAULT_EXCLUDES = ('.git', '.venv', 'venv', '__pycache__', '.idea', 'node_modules', '.cache')
+CHUNK_SIZE = 1024 * 1024
+# Файлы меньше этого читаются одним read - mmap для них дороже
+MMAP_THRESHOLD = 256 * 1024
+
+# Файлы отдаются потокам пачками - на сотнях тысяч мелких файлов
+# накладные расходы на задачу пула больше самой проверки
+BATCH_FILES = 64
+BATCH_BYTES = 4 * 1024 * 1024
+
+PROBLEMS = ("nul", "invalid_utf8", "mixed_eol", "error")
+
+
+def compile_excludes(excludes):
+    """Все маски одним регулярным выражением (None - маски не заданы)"""
+    if not excludes:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in excludes))
+
+
+def iter_files(root, extensions=DEFAULT_EXTENSIONS, excludes=DEFAULT_EXCLUDES, errors=None):
+    """Файлы дерева с нужными расширениями: (путь, размер) в порядке обхода
+
+    extensions=None - все файлы. Маски excludes сравниваются с именем и
+    с путем от корня (через /). Папки, которые не удалось открыть,
+    дописываются в errors (список результатов).
+    """
+    excluded = compile_excludes(excludes)
+    stack = [(root, "")]
+    while stack:
+        folder, prefix = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as e:
+            if errors is not None:
+                errors.append({"file": folder, "status": "error", "problems": ["error"],
+                               "message": str(e)})
+            continue
 
-print("Проверка файлов...")
+        subfolders = []
+        for entry in entries:
+            relative_path = prefix + entry.name
+            if excluded is not None and (excluded.match(entry.name) or excluded.match(relative_path)):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append((entry.path, relative_path + "/"))
+                elif entry.is_file() and (extensions is None or
+                                          os.path.splitext(entry.name)[1].lower() in extensions):
+                    yield entry.path, entry.stat().st_size
+            except OSError as e:
+                if errors is not None:
+                    errors.append({"file": entry.path, "status": "error", "problems": ["error"],
+                                   "message": str(e)})
+        # Стек - обратный порядок, чтобы папки шли по алфавиту
+        stack.extend(reversed(subfolders))
+
+
+def _iter_chunks(f, size):
+    """Содержимое файла кусками: большие файлы через mmap, маленькие - одним чтением"""
+    if size < MMAP_THRESHOLD:
+        yield f.read()
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start in range(0, len(mm), CHUNK_SIZE):
+            yield mm[start:start + CHUNK_SIZE]
+
+
+def check_file(path, size=None):
+    """Проверить один файл; результат - dict с найденными проблемами"""
+    result = {"file": path}
+    nul_at = None
+    utf8_error_at = None
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    lf = crlf = cr = 0
+    previous_cr = False
+    offset = 0
+
+    try:
+        if size is None:
+            size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            for chunk in _iter_chunks(f, size):
+                if not chunk:
+                    continue
+                if nul_at is None:
+                    position = chunk.find(b'\x00')
+                    if position >= 0:
+                        nul_at = offset + position
 
-for root, dirs, files in os.walk('.'):
-    if '.git' in root or '.venv' in root:
-        continue
-    for file in files:
-        if file.endswith(('.py', '.md', '.txt', '.json')):
-            path = os.path.join(root, file)
+                # Кусок из одного ASCII проверять незачем, если декодер не ждет
+                # продолжения символа из прошлого куска
+                if utf8_error_at is None and not (chunk.isascii() and not decoder.getstate()[0]):
+                    try:
+                        decoder.decode(chunk)
+                    except UnicodeDecodeError as e:
+                        utf8_error_at = offset + e.start
+
+                pairs = chunk.count(b'\r\n')
+                crlf += pairs
+                lf += chunk.count(b'\n') - pairs
+                cr += chunk.count(b'\r') - pairs
+                # \r в конце прошлого куска и \n в начале этого - один CRLF
+                if previous_cr and chunk[0] == 0x0A:
+                    crlf += 1
+                    lf -= 1
+                    cr -= 1
+                previous_cr = chunk[-1] == 0x0D
+                offset += len(chunk)
+
+        if utf8_error_at is None:
             try:
-                with open(path, 'rb') as f:
-                    data = f.read()
-                if b'\x00' in data:
-                    print(f"ПРОБЛЕМА: {path}: NULL байты")
-                else:
-                    print(f"OK: {path}")
-            except:
-                pass
-
-print("Проверка завершена")
\ No newline at end of file
+                decoder.decode(b'', final=True)
+            except UnicodeDecodeError:
+                utf8_error_at = offset
+    except (OSError, ValueError) as e:
+        result.update({"status": "error", "problems": ["error"], "message": str(e)})
+        return result
+
+    problems = []
+    if nul_at is not None:
+        problems.append("nul")
+        result["nul_offset"] = nul_at
+    if utf8_error_at is not None:
+        problems.append("invalid_utf8")
+        result["utf8_error_offset"] = utf8_error_at
+    if sum(1 for count in (lf, crlf, cr) if count) > 1:
+        problems.append("mixed_eol")
+        result["line_endings"] = {"lf": lf, "crlf": crlf, "cr": cr}
+
+    result["size"] = offset
+    result["status"] = "problem" if problems else "ok"
+    result["problems"] = problems
+    return result
+
+
+def check_batch(files):
+    """Проверить пачку файлов [(путь, размер), ...] в одном потоке"""
+    return [check_file(path, size) for path, size in files]
+
+
+def iter_batches(files):
+    """Пачки файлов: до BATCH_FILES штук или BATCH_BYTES байт"""
+    batch, batch_bytes = [], 0
+    for path, size in files:
+        batch.append((path, size))
+        batch_bytes += size
+        if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+            yield batch
+            batch, batch_bytes = [], 0
+    if batch:
+        yield batch
+
+
+def scan(root, extensions=DEFAULT_EXTENSIONS, excludes=DEFAULT_EXCLUDES, workers=None,
+         keep_ok=False, on_result=None):
+    """Проверить все подходящие файлы дерева в пуле потоков; отчет - dict
+
+    В очереди пула держим не больше workers * 4 пачек файлов, чтобы сотни
+    тысяч путей не превращались в сотни тысяч висящих Future. keep_ok=True -
+    в отчет попадают и файлы без проблем. on_result(результат) вызывается
+    для каждого файла по мере готовности.
+    """
+    started = time.perf_counter()
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    results = []
+    counts = {name: 0 for name in PROBLEMS}
+    totals = {"files": 0, "bytes": 0}
+
+    def collect(result):
+        totals["files"] += 1
+        totals["bytes"] += result.get("size", 0)
+        for name in result["problems"]:
+            counts[name] += 1
+        if keep_ok or result["status"] != "ok":
+            results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for batch in iter_batches(iter_files(root, extensions, excludes, errors)):
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        collect(result)
+            pending.add(pool.submit(check_batch, batch))
+        for future in pending:
+            for result in future.result():
+                collect(result)
+
+    for error in errors:
+        counts["error"] += 1
+        results.append(error)
+        if on_result is not None:
+            on_result(error)
+
+    seconds = time.perf_counter() - started
+    results.sort(key=lambda result: result["file"])
+    return {
+        "root": os.path.abspath(root),
+        "extensions": sorted(extensions) if extensions is not None else None,
+        "excludes": list(excludes),
+        "workers": workers,
+        "files": totals["files"],
+        "bytes": totals["bytes"],
+        "seconds": round(seconds, 3),
+        "files_per_s": round(totals["files"] / seconds, 1) if seconds else None,
+        "mb_per_s": round(totals["bytes"] / (1024 * 1024) / seconds, 1) if seconds else None,
+        "problems": counts,
+        "results": results
+    }
+
+
+def build_parser():
+    """Описание аргументов"""
+    parser = argparse.ArgumentParser(prog="validate_files.py",
+                                     description="Проверка текстовых файлов перед загрузкой")
+    parser.add_argument("root", nargs="?", default=".", help="папка (по умолчанию текущая)")
+    parser.add_argument("--ext", nargs="+", default=None,
+                        help=f"расширения файлов (по умолчанию {' '.join(DEFAULT_EXTENSIONS)})")
+    parser.add_argument("--all-files", action="store_true", help="проверять файлы с любым расширением")
+    parser.add_argument("--exclude", nargs="+", default=[],
+                        help="маски имен или путей от корня, которые пропускаются (*.min.json, data/raw)")
+    parser.add_argument("--no-default-excludes", action="store_true",
+                        help=f"не пропускать {', '.join(DEFAULT_EXCLUDES)}")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="потоков проверки")
+    parser.add_argument("--report", default=None, help="JSON-отчет ('-' - вывод в консоль)")
+    parser.add_argument("--keep-ok", action="store_true", help="включать в отчет файлы без проблем")
+    parser.add_argument("-q", "--quiet", action="store_true", help="не печатать проблемные файлы")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.root):
+        print(f"❌ Нет такой папки: {args.root}", file=sys.stderr)
+        return 2
+
+    extensions = None
+    if not args.all_files:
+        extensions = tuple(ext if ext.startswith('.') else '.' + ext
+                           for ext in (e.lower() for e in args.ext)) if args.ext else DEFAULT_EXTENSIONS
+    excludes = tuple(args.exclude) + (() if args.no_default_excludes else DEFAULT_EXCLUDES)
+
+    # Отчет в консоль - построчный вывод уходит в stderr, чтобы stdout оставался чистым JSON
+    out = sys.stderr if args.report == '-' else sys.stdout
+
+    def on_result(result):
+        if args.quiet or result["status"] == "ok":
+            return
+        if result["status"] == "error":
+            print(f"❌ {result['file']}: {result['message']}", file=out)
+        else:
+            print(f"⚠️ {result['file']}: {', '.join(result['problems'])}", file=out)
+
+    print("Проверка файлов...", file=out)
+    report = scan(args.root, extensions, excludes, args.workers, args.keep_ok, on_result)
+    problems = ", ".join(f"{name} - {count}" for name, count in report["problems"].items() if count)
+    print(f"{'⚠️' if problems else '✅'} Проверено файлов: {report['files']} "
+          f"({report['bytes'] / (1024 * 1024):.1f} МБ) за {report['seconds']} с, "
+          f"{report['files_per_s']} файлов/с; проблемы: {problems or 'нет'}", file=out)
+
+    if args.report == '-':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Отчет: {args.report}", file=out)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())